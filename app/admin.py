@@ -1,24 +1,105 @@
 # app/admin.py
+import os
+import sys
 import streamlit as st
-import sqlite3
 import pandas as pd
+import httpx
 import time
+import json
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# `streamlit run app/admin.py` only puts app/ on the path - add the project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.database import get_schedule_snapshot, get_schedule_version, apply_schedule_changes, SCHEDULE_COLUMNS
+from app.conversation_log import connect as connect_log, query_turns, list_languages, PAGE_SIZE
+
+load_dotenv()
 
 st.set_page_config(page_title="Vani Clinic Admin", layout="wide", page_icon="🏥")
 
-DB_PATH = "data/clinic.db"
+# The bot server, told to drop its schedule cache right after a save
+BOT_URL = os.getenv("BOT_URL", "http://127.0.0.1:8000")
+VERIFY_TOKEN = os.getenv("VERIFY_TOKEN") or "vani_secret_123"
 
 # --- HELPER FUNCTIONS ---
-def load_schedule():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM schedule", conn)
-    conn.close()
-    return df
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_schedule(version):
+    """ Schedule as a DataFrame - rebuilt only when `version` changes, so reruns are free """
+    rows = [dict(row) for row in get_schedule_snapshot().rows]
+    return pd.DataFrame(rows, columns=["id", *SCHEDULE_COLUMNS])
+
+def _plain(value):
+    # numpy scalars / NaN -> plain Python for sqlite3
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+def diff_schedule(original, edited):
+    """ Editor output vs. loaded table -> (inserts, updates, deletes) keyed by `id` """
+    columns = [c for c in SCHEDULE_COLUMNS if c in edited.columns]
+    is_new = edited["id"].isna()
+
+    inserts = [{c: _plain(row[c]) for c in columns} for _, row in edited[is_new].iterrows()]
+    inserts = [values for values in inserts if any(v is not None for v in values.values())]
+
+    before = original.set_index("id")[columns]
+    after = edited[~is_new].astype({"id": "int64"}).set_index("id")[columns]
+    deletes = [int(row_id) for row_id in before.index.difference(after.index)]
+
+    common = after.index.intersection(before.index)
+    old, new = before.loc[common], after.loc[common]
+    same = (old == new) | (old.isna() & new.isna())
+    changed = new[~same.all(axis=1)]
+    updates = [
+        (int(row_id), {c: _plain(row[c]) for c in columns if not same.at[row_id, c]})
+        for row_id, row in changed.iterrows()
+    ]
+    return inserts, updates, deletes
+
+def notify_bot():
+    """ Best effort: the bot also notices the commit through PRAGMA data_version within a second """
+    try:
+        httpx.post(f"{BOT_URL}/internal/schedule-changed", headers={"X-Verify-Token": VERIFY_TOKEN}, timeout=1.0)
+    except httpx.HTTPError:
+        pass
+
+def save_schedule(original_df, edited_df):
+    inserts, updates, deletes = diff_schedule(original_df, edited_df)
+    if not (inserts or updates or deletes):
+        return None
+    # One transaction; also invalidates this process's snapshot (-> new cache version)
+    result = apply_schedule_changes(inserts, updates, deletes)
+    notify_bot()
+    return result
+
+@st.cache_resource
+def log_connection():
+    # One read connection per dashboard process (WAL: never blocks the bot's writer)
+    return connect_log()
 
-def save_schedule(edited_df):
-    conn = sqlite3.connect(DB_PATH)
-    edited_df.to_sql("schedule", conn, if_exists="replace", index=False)
-    conn.close()
+TIME_RANGES = {"Last hour": timedelta(hours=1), "Last 24 hours": timedelta(days=1), "Last 7 days": timedelta(days=7), "Everything": None}
+
+def _stage_summary(stages_json):
+    # [{"stage": "stt", "ms": 812.4, "ok": true}, ...] -> "stt 812 · llm 1430 · tts ✗"
+    parts = []
+    for stage in json.loads(stages_json or "[]"):
+        parts.append(f"{stage['stage']} {stage['ms']:.0f}" if stage["ok"] else f"{stage['stage']} ✗")
+    return " · ".join(parts)
+
+def logs_frame(rows):
+    return pd.DataFrame([{
+        "time": datetime.fromtimestamp(row["created_at"]).strftime("%d %b %H:%M:%S"),
+        "sender": row["sender_id"],
+        "type": row["kind"],
+        "lang": row["language"],
+        "user said": row["transcript"],
+        "tool": row["tool_call"],
+        "reply": row["reply"],
+        "total ms": row["total_ms"],
+        "stages (ms)": _stage_summary(row["stages"]),
+        "error": row["error"],
+    } for row in rows])
 
 # --- UI LAYOUT ---
 st.title("🏥 City Health Clinic - Control Center")
@@ -26,7 +107,7 @@ st.markdown("---")
 
 # METRICS ROW (Visual Appeal)
 col1, col2, col3 = st.columns(3)
-df = load_schedule()
+df = load_schedule(get_schedule_version())
 total_docs = df['doctor_name'].nunique()
 on_leave = df[df['current_status'] == "ON LEAVE"].shape[0]
 
@@ -74,13 +155,54 @@ with tab1:
     
     # Save Button
     if st.button("💾 Save Changes", type="primary"):
-        save_schedule(edited_df)
-        st.success("✅ Database Updated Successfully!")
+        result = save_schedule(df, edited_df)
+        if result is None:
+            st.info("No changes to save.")
+        else:
+            st.success(f"✅ Database Updated: {result['updated']} changed, {result['inserted']} added, {result['deleted']} removed.")
         time.sleep(1)
         st.rerun()
 
 # === TAB 2: LIVE LOGS ===
 with tab2:
     st.header("Recent Conversations")
-    st.warning("Feature coming soon: Persistent Log Database integration.")
-    st.markdown("*Currently, logs are visible in the VS Code Terminal.*")
\ No newline at end of file
+    conn = log_connection()
+
+    # FILTERS (each one is served by an index - no full table scans)
+    f1, f2, f3, f4 = st.columns([2, 1, 1, 1])
+    sender_filter = f1.text_input("Sender (full number)", placeholder="919876543210").strip()
+    language_filter = f2.selectbox("Language", ["All", *list_languages(conn)])
+    range_filter = f3.selectbox("Time range", list(TIME_RANGES), index=1)
+    errors_only = f4.checkbox("Errors only")
+
+    # Keyset pagination: a stack of (created_at, id) cursors, reset whenever a filter changes
+    filters = (sender_filter, language_filter, range_filter, errors_only)
+    if st.session_state.get("log_filters") != filters:
+        st.session_state.log_filters = filters
+        st.session_state.log_cursors = [None]
+    cursors = st.session_state.log_cursors
+
+    window = TIME_RANGES[range_filter]
+    rows, next_cursor = query_turns(
+        conn,
+        sender_id=sender_filter or None,
+        language=None if language_filter == "All" else language_filter,
+        since=time.time() - window.total_seconds() if window else None,
+        errors_only=errors_only,
+        before=cursors[-1],
+    )
+
+    if rows:
+        st.dataframe(logs_frame(rows), use_container_width=True, hide_index=True)
+    else:
+        st.info("No conversations match these filters.")
+
+    # PAGER
+    p1, p2, p3 = st.columns([1, 2, 1])
+    if p1.button("⬅️ Newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    p2.caption(f"Page {len(cursors)} · {PAGE_SIZE} turns per page, newest first")
+    if p3.button("Older ➡️", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
@@ -1,60 +1,80 @@
 # app/admin_ai.py
-import os
+import asyncio
 import json
-import re
-from datetime import datetime # <--- NEW IMPORT
-from groq import Groq
-from dotenv import load_dotenv
-from app.database import update_doctor_schedule
+from datetime import datetime, timedelta # <--- NEW IMPORT
+from app.database import update_doctor_schedules
+from app.llm_gateway import LLM, MODEL
 
-load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-def process_admin_command(user_text):
+async def process_admin_command(user_text):
     # Get current day for "Today/Tomorrow" logic
-    today = datetime.now().strftime("%A") 
-    
+    now = datetime.now()
+    today = now.strftime("%A")
+    tomorrow = (now + timedelta(days=1)).strftime("%A")
+
     ADMIN_PROMPT = f"""
     You are the Database Admin AI. Current Day: {today}.
-    Extract commands to update the doctor schedule.
+    Extract EVERY command in the message to update the doctor schedule.
 
-    TOOLS:
-    - Update Status: {{"tool": "update_schedule", "name": "Dr. Name", "day": "Day", "status": "New Status"}}
+    OUTPUT: one JSON object with a list of operations (nothing else):
+    {{"operations": [{{"name": "Dr. Name", "day": "Day", "status": "New Status"}}, ...]}}
 
     RULES:
-    1. If the admin mentions a specific day (e.g., "Monday"), include it in "day".
-    2. If the admin says "Today", calculate the day from {today}.
-    3. If NO day is mentioned, output "ALL" in the "day" field (updates all days).
+    1. One operation per doctor per day. "Sharma and Gupta off Monday" is TWO operations.
+    2. If the admin mentions a specific day (e.g., "Monday"), include it in "day".
+    3. If the admin says "Today", use {today}. "Tomorrow" is {tomorrow}.
+    4. If NO day is mentioned, output "ALL" in the "day" field (updates all days).
+    5. Statuses: "Available", "ON LEAVE", "Delayed (1 hr)", "Emergency Leave" (or the admin's own words).
 
     EXAMPLES:
-    - "Mark Dr. Sharma absent on Monday" -> {{"tool": "update_schedule", "name": "Sharma", "day": "Monday", "status": "ON LEAVE"}}
-    - "Cancel Dr. Gupta today" -> {{"tool": "update_schedule", "name": "Gupta", "day": "{today}", "status": "Emergency Leave"}}
-    - "Dr. Anjali is available" -> {{"tool": "update_schedule", "name": "Anjali", "day": "ALL", "status": "Available"}}
+    - "Mark Dr. Sharma absent on Monday" -> {{"operations": [{{"name": "Sharma", "day": "Monday", "status": "ON LEAVE"}}]}}
+    - "Sharma and Gupta off Monday, Khan delayed today" -> {{"operations": [{{"name": "Sharma", "day": "Monday", "status": "ON LEAVE"}}, {{"name": "Gupta", "day": "Monday", "status": "ON LEAVE"}}, {{"name": "Khan", "day": "{today}", "status": "Delayed (1 hr)"}}]}}
+    - "Dr. Anjali is available" -> {{"operations": [{{"name": "Anjali", "day": "ALL", "status": "Available"}}]}}
     """
 
     messages = [{"role": "system", "content": ADMIN_PROMPT}, {"role": "user", "content": user_text}]
-    
+
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
+        response = await LLM.complete(
+            messages,
+            model=MODEL,
             temperature=0.1
         )
         ai_reply = response.choices[0].message.content
-        
-        json_match = re.search(r"\{[\s\S]*?\}", ai_reply)
-        if json_match:
-            tool_data = json.loads(json_match.group())
-            if tool_data.get("tool") == "update_schedule":
-                # PASS THE DAY TO THE DATABASE FUNCTION
-                result = update_doctor_schedule(
-                    tool_data["name"], 
-                    tool_data["status"], 
-                    tool_data.get("day", "ALL") # Default to ALL if missing
-                )
-                return result["message"]
-        
+
+        operations = extract_operations(ai_reply or "")
+        if operations:
+            # ONE batch: names/days resolved together, applied in a single transaction
+            result = await asyncio.to_thread(update_doctor_schedules, operations)
+            return result["message"]
+
         return ai_reply
 
     except Exception as e:
-        return f"Error: {str(e)}"
\ No newline at end of file
+        return f"Error: {str(e)}"
+
+
+def extract_operations(text):
+    """
+    Every update in the reply: {"operations": [...]}, a bare list, or the old
+    single {"tool": "update_schedule", ...} objects (however many there are).
+    """
+    decoder = json.JSONDecoder()
+    operations = []
+    start = 0
+    while True:
+        positions = [p for p in (text.find("{", start), text.find("[", start)) if p != -1]
+        if not positions:
+            break
+        start = min(positions)
+        try:
+            data, end = decoder.raw_decode(text, start)
+        except ValueError:
+            start += 1
+            continue
+        if isinstance(data, dict) and isinstance(data.get("operations"), list):
+            data = data["operations"]
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and item.get("name") and item.get("tool", "update_schedule") == "update_schedule":
+                operations.append({"name": item["name"], "day": item.get("day") or "ALL", "status": item.get("status")})
+        start = end
+    return operations
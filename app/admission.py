@@ -0,0 +1,146 @@
+# app/admission.py
+# 🚧 Admission control + graceful degradation under overload.
+#   - Bounded work queue: jobs.enqueue() refuses messages past MAX_QUEUE_DEPTH (or
+#     MAX_MAILBOX_DEPTH for one sender); refused senders get ONE templated "busy" text.
+#   - Per-stage concurrency limits (STAGE_LIMITS): however many workers run, only so many
+#     Whisper, Groq and edge-tts calls are in flight at once - the rest wait their turn.
+#   - Degradation ladder, by how long the message sat in its mailbox:
+#       voice reply -> text reply (no TTS) -> templated busy reply (no STT / LLM / TTS)
+import os
+import time
+import asyncio
+import contextvars
+from collections import deque
+from app.metrics import Counter
+
+# ⚙️ QUEUE BOUNDS (messages waiting for a worker)
+MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", "200"))
+MAX_MAILBOX_DEPTH = int(os.getenv("MAX_MAILBOX_DEPTH", "5"))     # One sender can't fill the queue
+
+# ⚙️ DEGRADATION LADDER (seconds waited in the mailbox before a worker picked the message up)
+DEGRADE_TEXT_AFTER = float(os.getenv("DEGRADE_TEXT_AFTER_S", "15"))
+DEGRADE_BUSY_AFTER = float(os.getenv("DEGRADE_BUSY_AFTER_S", "45"))
+
+# ⚙️ STAGE LIMITS: calls in flight per stage ("stt:8,llm:6,tts:6")
+STAGE_LIMITS = os.getenv("STAGE_LIMITS", "stt:8,llm:6,tts:6")
+
+# Keep the last N stage waits for the /stats percentiles
+WAIT_WINDOW = 500
+
+SHED = Counter("vani_shed_total", "Messages refused by the bounded queue", ("reason",))
+DEGRADED = Counter("vani_degraded_total", "Replies stepped down the degradation ladder", ("level", "reason"))
+
+# Set by the worker (app/jobs.py) before it runs a job: seconds the job waited in its mailbox
+QUEUE_WAIT = contextvars.ContextVar("vani_queue_wait", default=0.0)
+
+STATS = {
+    "shed_queue_full": 0,
+    "shed_mailbox_full": 0,
+    "degraded_text": 0,
+    "degraded_busy": 0,
+}
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def parse_limits(spec):
+    """ "stt:8,llm:6,tts:6" -> {"stt": 8, "llm": 6, "tts": 6} """
+    limits = {}
+    for part in spec.split(","):
+        name, _, limit = part.strip().partition(":")
+        if name and limit:
+            limits[name] = max(1, int(limit))
+    return limits
+
+
+class StageLimit:
+    """
+    Semaphore for one pipeline stage, with the numbers capacity planning needs:
+    calls, how many had to wait, and for how long.
+        async with STAGES["tts"]: ...
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self.stats = {"calls": 0, "waited": 0, "wait_seconds": 0.0}
+        self.wait_times = deque(maxlen=WAIT_WINDOW)
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def saturated(self):
+        """ Every slot is taken: a new call would queue """
+        return self.active + self.waiting >= self.limit
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.active += 1
+        self.stats["calls"] += 1
+        if waited > 0.001:
+            self.stats["waited"] += 1
+            self.stats["wait_seconds"] += waited
+        self.wait_times.append(waited)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.active -= 1
+        self._semaphore.release()
+        return False
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            "wait_seconds": round(self.stats["wait_seconds"], 2),
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "wait_p95_ms": round(_percentile(self.wait_times, 95) * 1000, 1),
+        }
+
+
+_limits = parse_limits(STAGE_LIMITS)
+STAGES = {name: StageLimit(name, _limits.get(name, default)) for name, default in (("stt", 8), ("llm", 6), ("tts", 6))}
+
+
+def record_shed(reason):
+    """ jobs.enqueue() refused a message ("queue_full" / "mailbox_full") """
+    STATS[f"shed_{reason}"] += 1
+    SHED.inc(reason=reason)
+
+
+def reply_level():
+    """ Rung of the ladder for the current job: ("voice" | "text" | "busy", reason) """
+    waited = QUEUE_WAIT.get()
+    if waited >= DEGRADE_BUSY_AFTER:
+        return "busy", "queue_wait"
+    if waited >= DEGRADE_TEXT_AFTER:
+        return "text", "queue_wait"
+    return "voice", None
+
+
+def record_degraded(level, reason):
+    STATS[f"degraded_{level}"] += 1
+    DEGRADED.inc(level=level, reason=reason)
+
+
+def get_stats():
+    return {
+        **STATS,
+        "max_queue_depth": MAX_QUEUE_DEPTH,
+        "max_mailbox_depth": MAX_MAILBOX_DEPTH,
+        "degrade_text_after_s": DEGRADE_TEXT_AFTER,
+        "degrade_busy_after_s": DEGRADE_BUSY_AFTER,
+        "stages": {name: stage.get_stats() for name, stage in STAGES.items()},
+    }
@@ -1,18 +1,41 @@
 # app/ai_engine.py
-import os
 import json
-import re
 from datetime import datetime  # <--- NEW IMPORT
-from groq import Groq
 from dotenv import load_dotenv
-from app.database import get_doctor_info  # The tool we made in Part A
-from app.database import get_doctor_info, get_clinic_overview  # <--- Import new function
+from app.database import get_doctor_info, get_clinic_overview, get_schedule_snapshot
+from app.router import asks_about_today, NEEDS_PHRASING
+from app import replies
+from app.metrics import span, annotate, record_error, TOOL_CALLS
+from app.llm_gateway import LLM, MODEL
 
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# 🛠️ NATIVE TOOL DEFINITION (Groq / OpenAI tool-calling format)
+TOOLS = [{
+    "type": "function",
+    "function": {
+        "name": "check_doctor",
+        "description": "Look up a doctor's or department's schedule and current status. Use 'all' for the full schedule. Symptoms can be passed in the patient's own words (any language).",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "description": "Doctor name or department in English, or the patient's symptom as they said it (e.g. 'Sharma', 'Cardiology', 'I feel feverish', 'सीने में दर्द', 'all')",
+                },
+            },
+            "required": ["name"],
+        },
+    },
+}]
 
-def chat_with_llama(user_text, language_code, history=[]):
+STATS = {"turns": 0, "streamed_turns": 0, "tool_calls": 0, "rendered_locally": 0, "second_completions": 0}
+
+TOOL_ERROR_REPLY = "I'm having trouble checking the schedule right now."
+
+
+def build_messages(user_text, language_code, history):
+    """ System prompt + history + the new user message """
     # 1. PREPARE PROMPT DATA
     # Result: "Friday, 06 December 2025, 07:30 PM" (Includes Date for future checks)
     current_time = datetime.now().strftime("%A, %d %B %Y, %I:%M %p") 
@@ -34,10 +57,8 @@ def chat_with_llama(user_text, language_code, history=[]):
     1. RESPONSE LANGUAGE: You MUST reply in the user's language ('{language_code}').
         - 'en' -> English, 'hi' -> Hindi, 'kn' -> Kannada, 'ml' -> Malayalam.
 
-    2. TIME CHECK (CRITICAL):
-        - ALWAYS compare the 'Current Time' with the doctor's schedule.
-        - If the doctor's hours are over (e.g., Schedule: 8am-8pm, Current Time: 8:43pm), say they are NOT available now but mention when they will be available next (e.g., "tomorrow at 8am").
-        - Be precise. 8:43 PM is AFTER 8:00 PM.
+    2. TIME CHECK: Tool results include computed `facts` (in_now, in_until, next_opening). Trust them - do not compare times yourself.
+        If a doctor is not in now, say so and give their next_opening.
 
     3. WALK-IN CLINIC LOGIC (CRITICAL):
         - This is a WALK-IN clinic. We do not have "slots" or "bookings".
@@ -46,18 +67,15 @@ def chat_with_llama(user_text, language_code, history=[]):
         - If the user asks for a specific time (e.g., "Tomorrow evening?"), compare it with the schedule. If it fits, say YES. Do not ask to check again.
     
     4. TOOL ARGUMENTS (CRITICAL): 
-        - The database is 100% ENGLISH.
-        - NEVER output Hindi/Kannada/Malayalam script inside the JSON.
-        - TRANSLATE patient terms to medical English terms.
+        - Use the `check_doctor` tool to look up schedules. Doctor names and departments are stored in ENGLISH.
+        - SYMPTOMS: pass the patient's own words, in any language. The database maps symptoms to departments itself.
+        - NAMES in Hindi/Kannada/Malayalam script: transliterate to English.
             EXAMPLES:
-            - User (Symptom): "I feel feverish" -> Tool: {{"tool": "check_doctor", "name": "General"}} 
-            - User (Hindi): "अंजली" -> Tool: {{"tool": "check_doctor", "name": "Anjali"}}
-            - User (Malayalam): "ഹൃദ്രോഗ വിദഗ്ധൻ" (Heart Doctor) -> Tool: {{"tool": "check_doctor", "name": "Cardiologist"}}
-            - "All doctors / Schedule" -> Tool: {{"tool": "check_doctor", "name": "all"}}
-        - PHONETIC CORRECTION: If the user says a name that SOUNDS like a doctor in the "CLINIC OVERVIEW", use the correct doctor's name.
-          - "Swarma" / "Sarma" -> {{"tool": "check_doctor", "name": "Sharma"}}
-          - "Gupta ji" -> {{"tool": "check_doctor", "name": "Gupta"}}
-          - "Anjili" -> {{"tool": "check_doctor", "name": "Anjali"}}
+            - User (Symptom): "I feel feverish" -> check_doctor(name="I feel feverish")
+            - User (Malayalam): "ഹൃദ്രോഗ വിദഗ്ധൻ" -> check_doctor(name="ഹൃദ്രോഗ വിദഗ്ധൻ")
+            - User (Hindi): "अंजली" -> check_doctor(name="Anjali")
+            - "All doctors / Schedule" -> check_doctor(name="all")
+        - NAMES: Pass doctor names as heard (e.g. "Swarma", "Gupta ji"). The database fixes spelling and phonetic mistakes itself.
 
     5. AUDIO FORMAT (CRITICAL):
        - You are speaking on a VOICE CALL. Do not use visual formatting.
@@ -77,67 +95,218 @@ def chat_with_llama(user_text, language_code, history=[]):
     8. STOPPING RULE (CRITICAL): 
         - If the user says "No", "Thanks", "Bye", "Okay", or "That's all", DO NOT CALL ANY TOOLS.
         - Just say a polite goodbye or "You're welcome".
+    """
+
+    return [{"role": "system", "content": system_prompt_text}] + history + [{"role": "user", "content": user_text}]
+
+
+def _run_tool(doctor_name):
+    """ check_doctor -> db_result (None if the lookup crashed) """
+    STATS["tool_calls"] += 1
+    TOOL_CALLS.inc(tool="check_doctor")
+    print(f"🛠️ AI is calling tool for: {doctor_name}")
+    annotate(tool_call=doctor_name)
+    try:
+        with span("tool"):
+            return get_doctor_info(doctor_name)
+    except Exception as e:
+        print(f"❌ Tool Error: {e}")
+        return None
+
+
+def _followup_messages(messages, content, tool_call, doctor_name, db_result):
+    """ Conversation for the 2nd completion: the assistant's tool call + the tool result """
+    if "error" in db_result and db_result["error"] == "not_found":
+        valid_list = ", ".join(db_result["valid_departments"])
+        if db_result.get("specialty"):
+            tool_content = f"'{doctor_name}' needs {db_result['specialty']}, which this clinic does not have. Available Departments are: {valid_list}. Inform the user politely."
+        else:
+            tool_content = f"No doctor or specialty found matching '{doctor_name}'. Available Departments are: {valid_list}. Inform the user politely."
+    else:
+        tool_content = json.dumps(db_result)
+
+    if tool_call:
+        return messages + [
+            {"role": "assistant", "content": content or "", "tool_calls": [{
+                "id": tool_call["id"],
+                "type": "function",
+                "function": {"name": tool_call["name"], "arguments": tool_call["arguments"]},
+            }]},
+            {"role": "tool", "tool_call_id": tool_call["id"], "content": tool_content},
+        ]
+    return messages + [
+        {"role": "assistant", "content": content},
+        {"role": "user", "content": f"TOOL RESULT: {tool_content}"},
+    ]
+
+
+async def chat_with_llama(user_text, language_code, history=[]):
+    messages = build_messages(user_text, language_code, history)
+
+    # 3. CALL LLAMA with native tool calling (Lower temperature for precision)
+    STATS["turns"] += 1
+    with span("llm_first"):
+        response = await LLM.complete(
+            messages,
+            model=MODEL,
+            tools=TOOLS,
+            tool_choice="auto",
+            temperature=0.1  # <-- Lowered for reliable tool arguments
+        )
+
+    message = response.choices[0].message
+    tool_call = message.tool_calls[0] if message.tool_calls else None
+
+    # 4. PARSE THE TOOL ARGUMENTS
+    # Native tool calls come as clean JSON. Some replies still put the JSON in the text,
+    # so fall back to a real JSON decoder (handles nested braces, unlike a regex).
+    try:
+        if tool_call:
+            doctor_name = json.loads(tool_call.function.arguments)["name"]
+        else:
+            legacy = _find_json_tool(message.content or "")
+            if legacy is None:
+                # 5. NO TOOL NEEDED (e.g., "Hi", "No thanks")
+                return message.content
+            doctor_name = legacy["name"]
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"❌ Tool Argument Error: {e}")
+        record_error("tool_arguments")
+        return TOOL_ERROR_REPLY
+
+    # 5. RUN THE TOOL (The Hands)
+    db_result = _run_tool(doctor_name)
+    if db_result is None:
+        return TOOL_ERROR_REPLY
+
+    # 6. RENDER LOCALLY when the answer is just "here is the schedule" (no 2nd LLM call)
+    if not NEEDS_PHRASING.search(user_text):
+        STATS["rendered_locally"] += 1
+        return render_tool_result(db_result, user_text, language_code)
+
+    # 7. FREE-FORM PHRASING NEEDED -> one more completion with the tool result
+    STATS["second_completions"] += 1
+    native_call = {"id": tool_call.id, "name": tool_call.function.name, "arguments": tool_call.function.arguments} if tool_call else None
+    final_messages = _followup_messages(messages, message.content, native_call, doctor_name, db_result)
+
+    try:
+        with span("llm_second"):
+            final_response = await LLM.complete(
+                final_messages,
+                model=MODEL,
+                temperature=0.1
+            )
+        return final_response.choices[0].message.content
+    except Exception as e:
+        print(f"❌ Second Completion Error: {e}")
+        return render_tool_result(db_result, user_text, language_code)
+
 
-    TOOLS:
-    - Search: {{"tool": "check_doctor", "name": "english_keyword"}}
-    - Output ONLY JSON if using a tool.
+async def stream_chat_with_llama(user_text, language_code, history=[]):
+    """
+    Same turn as chat_with_llama, but yields the reply text while it is generated
+    (the voice pipeline starts TTS on the first finished sentence).
     """
+    messages = build_messages(user_text, language_code, history)
+    STATS["turns"] += 1
+    STATS["streamed_turns"] += 1
 
-    messages = [{"role": "system", "content": system_prompt_text}] + history + [{"role": "user", "content": user_text}]
-    
-    # 3. CALL LLAMA (Lower temperature for precision)
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=messages,
-        temperature=0.1  # <-- Lowered for reliable JSON/Tool output
-    )
-    
-    ai_reply = response.choices[0].message.content
-    
-    # 4. ROBUST JSON DETECTION (The fix for the crash)
-    # This regex searches the whole string for the first JSON object { ... }
-    json_match = re.search(r"\{[\s\S]*?\}", ai_reply) 
-    
-    # Check if a JSON object was found AND if it contains the tool name
-    if json_match and "check_doctor" in ai_reply:
+    content = ""
+    yielded = 0             # How much of `content` already went out
+    tool_call = None        # Native tool call, assembled from deltas
+    with span("llm_first"):
+        async for chunk in LLM.stream(messages, model=MODEL, tools=TOOLS, tool_choice="auto", temperature=0.1):
+            delta = chunk.choices[0].delta if chunk.choices else None
+            if delta is None:
+                continue
+            for call in delta.tool_calls or []:
+                if tool_call is None:
+                    tool_call = {"id": "", "name": "", "arguments": ""}
+                tool_call["id"] = call.id or tool_call["id"]
+                if call.function:
+                    tool_call["name"] = call.function.name or tool_call["name"]
+                    tool_call["arguments"] += call.function.arguments or ""
+            if delta.content:
+                content += delta.content
+                # Hold everything once a "{" shows up: it may be a tool call written as text
+                if tool_call is None and "{" not in content:
+                    yield content[yielded:]
+                    yielded = len(content)
+
+    # PARSE THE TOOL ARGUMENTS (native first, then JSON inside the text)
+    try:
+        if tool_call:
+            doctor_name = json.loads(tool_call["arguments"])["name"]
+        else:
+            legacy = _find_json_tool(content)
+            if legacy is None:
+                # NO TOOL NEEDED - flush whatever was held back
+                if content[yielded:]:
+                    yield content[yielded:]
+                return
+            doctor_name = legacy["name"]
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"❌ Tool Argument Error: {e}")
+        record_error("tool_arguments")
+        yield TOOL_ERROR_REPLY
+        return
+
+    db_result = _run_tool(doctor_name)
+    if db_result is None:
+        yield TOOL_ERROR_REPLY
+        return
+
+    if not NEEDS_PHRASING.search(user_text):
+        STATS["rendered_locally"] += 1
+        yield render_tool_result(db_result, user_text, language_code)
+        return
+
+    STATS["second_completions"] += 1
+    final_messages = _followup_messages(messages, content, tool_call, doctor_name, db_result)
+    streamed_any = False
+    try:
+        with span("llm_second"):
+            async for chunk in LLM.stream(final_messages, model=MODEL, temperature=0.1):
+                delta = chunk.choices[0].delta if chunk.choices else None
+                if delta is not None and delta.content:
+                    streamed_any = True
+                    yield delta.content
+    except Exception as e:
+        print(f"❌ Second Completion Error: {e}")
+        if not streamed_any:
+            yield render_tool_result(db_result, user_text, language_code)
+
+
+def _find_json_tool(text):
+    """ Legacy path: {"tool": "check_doctor", "name": ...} written inside the reply text """
+    if "check_doctor" not in text:
+        return None
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
         try:
-            # Extract the raw JSON string
-            json_str = json_match.group() 
-            tool_data = json.loads(json_str)
-            doctor_name = tool_data["name"]
-            
-            # Run the Python Tool (The Hands)
-            print(f"🛠️ AI is calling tool for: {doctor_name}")
-            db_result = get_doctor_info(doctor_name)
-            
-            # ... (Rest of your existing tool result handling logic is fine) ...
-            if "error" in db_result and db_result["error"] == "not_found":
-                # The DB search failed. We give this info to Llama.
-                valid_list = ", ".join(db_result["valid_departments"])
-                tool_msg = f"TOOL RESULT: No doctor or specialty found matching '{doctor_name}'. Available Departments are: {valid_list}. Inform the user politely."
-                
-                final_messages = messages + [
-                    {"role": "assistant", "content": ai_reply},
-                    {"role": "user", "content": tool_msg}
-                ]
-            else:
-                # Success! We found data.
-                final_messages = messages + [
-                    {"role": "assistant", "content": ai_reply},
-                    {"role": "user", "content": f"TOOL RESULT: {json.dumps(db_result)}"}
-                ]
-            
-            # Generate the final answer (Success OR Failure)
-            final_response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=final_messages
-            )
-            return final_response.choices[0].message.content
-        
-        except Exception as e:
-            # This handles both JSONDecodeError and any error in the tool logic
-            print(f"❌ JSON Parsing/Tool Error: {e}")
-            return "I'm having trouble checking the schedule right now."
-
-    # 5. NO TOOL NEEDED (e.g., "Hi", "No thanks")
-    return ai_reply
\ No newline at end of file
+            data, _ = decoder.raw_decode(text, start)
+            if isinstance(data, dict) and data.get("tool") == "check_doctor":
+                return data
+        except ValueError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+
+def render_tool_result(db_result, user_text, language_code):
+    """ check_doctor result -> spoken answer in the user's language (no LLM) """
+    if db_result.get("error") == "not_found":
+        return replies.render_not_found(db_result["valid_departments"], language_code, db_result.get("specialty"))
+    if db_result.get("type") == "full_schedule":
+        return replies.render_full_schedule(db_result["data"], language_code)
+
+    snapshot = get_schedule_snapshot()
+    departments = {name: rows[0]["department"] for name, rows in snapshot.by_doctor.items()}
+    # "In now / today?" is answered from the computed facts (in_now, in_until, next_opening)
+    facts = db_result.get("facts") if asks_about_today(user_text) else None
+    return replies.render_doctor_rows(db_result["data"], language_code, departments, facts=facts)
+
+
+def get_stats():
+    return dict(STATS)
@@ -1,14 +1,14 @@
 # app/audio.py
 import os
+import re
+import time
+import asyncio
+from collections import deque
 import edge_tts
-from faster_whisper import WhisperModel
-from pydub import AudioSegment
+from app.metrics import STAGE_SECONDS
+from app.admission import STAGES
 
-# 1. SETUP WHISPER (The Ears)
-print("⏳ Loading Whisper Model...")
-# CHANGE: Upgraded from "tiny" to "small"
-model = WhisperModel("small", device="cpu", compute_type="int8")
-print("✅ Whisper (Small) Loaded!")
+# NOTE: Speech-to-text (Whisper) lives in app/transcriber.py as a worker pool.
 
 # VOICE MAPPING (The Dictionary)
 VOICE_MAP = {
@@ -18,54 +18,254 @@ VOICE_MAP = {
     "ml": "ml-IN-SobhanaNeural"  # Malayalam
 }
 
-def transcribe_audio(file_path):
-    """
-    Returns tuple: (text, language_code)
-    """
-    try:
-        segments, info = model.transcribe(file_path, beam_size=1)
-        text = " ".join([segment.text for segment in segments])
-        
-        # Whisper automatically detects language (e.g., 'hi', 'kn')
-        detected_lang = info.language
-        print(f"🌍 Detected Language: {detected_lang}")
-        
-        return text.strip(), detected_lang
-    except Exception as e:
-        print(f"❌ Transcribe Error: {e}")
-        return "", "en"
+# MP3 (stdin) -> OGG/Opus voice note (stdout). Everything stays in memory.
+FFMPEG_OPUS_CMD = [
+    "ffmpeg", "-hide_banner", "-loglevel", "error",
+    "-f", "mp3", "-i", "pipe:0",
+    "-ac", "1", "-c:a", "libopus", "-b:a", "32k", "-application", "voip",
+    "-f", "ogg", "pipe:1",
+]
+
+# ✂️ STREAMED REPLIES: sentences synthesized at the same time (edge-tts requests in flight)
+TTS_PARALLEL_SENTENCES = int(os.getenv("TTS_PARALLEL_SENTENCES", "3"))
+# Shorter pieces are merged with the next one (fewer TTS calls, smoother prosody)
+MIN_SENTENCE_CHARS = 25
+SENTENCE_END = re.compile(r"[.!?।॥]+[\"')\]]*\s+")
+ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "st", "no", "vs", "etc"}
+
+# ⏱️ TTS TIMINGS (seconds) for the last N voice notes
+TTS_WINDOW = 200
+TTS_TIMINGS = {
+    "first_byte": deque(maxlen=TTS_WINDOW),   # Request start -> first MP3 chunk from edge-tts
+    "synthesis": deque(maxlen=TTS_WINDOW),    # Request start -> last MP3 chunk
+    "encode_tail": deque(maxlen=TTS_WINDOW),  # Last MP3 chunk -> OGG finished
+    "total": deque(maxlen=TTS_WINDOW),
+}
+
 
-# 2. SETUP TTS (The Mouth)
-async def generate_voice_note(text, language_code, output_ogg_path):
+class OpusStreamEncoder:
     """
-    Uses the correct voice based on language_code
+    One ffmpeg process per voice note, started BEFORE synthesis begins.
+    MP3 chunks are piped in as they arrive and Opus pages are read out
+    concurrently, so encoding overlaps with TTS instead of running after it.
     """
-    temp_mp3 = "data/temp_tts.mp3"
-    
+
+    def __init__(self):
+        self.process = None
+        self._reader = None
+        self._chunks = []
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *FFMPEG_OPUS_CMD,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._reader = asyncio.create_task(self._read_output())
+        return self
+
+    async def _read_output(self):
+        while True:
+            data = await self.process.stdout.read(64 * 1024)
+            if not data:
+                break
+            self._chunks.append(data)
+
+    async def feed(self, mp3_chunk):
+        self.process.stdin.write(mp3_chunk)
+        await self.process.stdin.drain()
+
+    async def finish(self):
+        """ Close the input and return the complete OGG/Opus bytes """
+        self.process.stdin.close()
+        await self._reader
+        errors = await self.process.stderr.read()
+        await self.process.wait()
+        if self.process.returncode != 0:
+            raise RuntimeError(errors.decode(errors="ignore").strip())
+        return b"".join(self._chunks)
+
+    async def abort(self):
+        if self.process and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+        if self._reader:
+            self._reader.cancel()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def get_tts_stats():
+    """ p50/p95 of time-to-first-byte, synthesis and encode tail (milliseconds) """
+    stats = {"voice_notes": len(TTS_TIMINGS["total"])}
+    for name, values in TTS_TIMINGS.items():
+        stats[f"{name}_p50_ms"] = round(_percentile(values, 50) * 1000, 1)
+        stats[f"{name}_p95_ms"] = round(_percentile(values, 95) * 1000, 1)
+    return stats
+
+
+def pick_voice(language_code):
     # Select Voice (Default to English if language not found)
-    selected_voice = VOICE_MAP.get(language_code, "en-IN-NeerjaNeural")
-    print(f"👄 Speaking in: {selected_voice}")
-    
+    return VOICE_MAP.get(language_code, "en-IN-NeerjaNeural")
+
+
+def clean_tts_text(text):
     # 🧹 FIX: CLEAN THE TEXT
     # Remove newlines (\n) and extra spaces to prevent TTS crash
-    clean_text = " ".join(text.split())
-    
+    return " ".join(text.split())
+
+
+# SETUP TTS (The Mouth)
+async def generate_voice_note(text, language_code):
+    """
+    Uses the correct voice based on language_code.
+    Returns the OGG/Opus voice note as bytes (or None on failure).
+    """
+    selected_voice = pick_voice(language_code)
+    print(f"👄 Speaking in: {selected_voice}")
+
+    clean_text = clean_tts_text(text)
+
     if not clean_text:
         print("❌ Error: TTS received empty text.")
         return None
 
-    # Use 'clean_text' here instead of 'text'
-    communicate = edge_tts.Communicate(clean_text, selected_voice)
-    await communicate.save(temp_mp3)
-    
-    # Convert to OGG
+    started = time.perf_counter()
+    first_chunk_at = None
+    encoder = OpusStreamEncoder()
     try:
-        audio = AudioSegment.from_mp3(temp_mp3)
-        audio.export(output_ogg_path, format="ogg", codec="libopus")
+        await encoder.start()
+        # Stream edge-tts audio straight into the encoder as it arrives
+        async with STAGES["tts"]:
+            communicate = edge_tts.Communicate(clean_text, selected_voice)
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    if first_chunk_at is None:
+                        first_chunk_at = time.perf_counter()
+                    await encoder.feed(chunk["data"])
+
+        last_chunk_at = time.perf_counter()
+        ogg_bytes = await encoder.finish()
     except Exception as e:
         print(f"❌ Audio Conversion Error: {e}")
-    
-    if os.path.exists(temp_mp3):
-        os.remove(temp_mp3)
-        
-    return output_ogg_path
\ No newline at end of file
+        await encoder.abort()
+        return None
+
+    finished = time.perf_counter()
+    TTS_TIMINGS["first_byte"].append((first_chunk_at or last_chunk_at) - started)
+    TTS_TIMINGS["synthesis"].append(last_chunk_at - started)
+    TTS_TIMINGS["encode_tail"].append(finished - last_chunk_at)
+    TTS_TIMINGS["total"].append(finished - started)
+    # Sub-stages of the "tts" span: edge-tts first byte, and the Opus encode left after the last chunk
+    STAGE_SECONDS.observe((first_chunk_at or last_chunk_at) - started, stage="tts_first_byte")
+    STAGE_SECONDS.observe(finished - last_chunk_at, stage="tts_encode_tail")
+    return ogg_bytes
+
+
+async def split_sentences(pieces):
+    """ Async text pieces (LLM tokens) -> complete sentences, as soon as each one ends """
+    buffer = ""
+    async for piece in pieces:
+        buffer += piece
+        start = 0
+        for match in SENTENCE_END.finditer(buffer):
+            words = buffer[start:match.start()].split()
+            last_word = words[-1].lower() if words else ""
+            # "Dr. Sharma", "A. P. J." - not the end of a sentence
+            if last_word in ABBREVIATIONS or len(last_word) == 1:
+                continue
+            if match.end() - start < MIN_SENTENCE_CHARS:
+                continue
+            yield buffer[start:match.end()].strip()
+            start = match.end()
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def generate_voice_note_streaming(sentences, language_code):
+    """
+    One voice note from an async stream of sentences (e.g. split_sentences over LLM tokens).
+    Each sentence goes to edge-tts as soon as it is complete (TTS_PARALLEL_SENTENCES at once),
+    and the MP3 audio is fed to ONE encoder in speaking order, so TTS overlaps with generation.
+    Always consumes `sentences` to the end. Returns OGG bytes, or None on failure.
+    """
+    selected_voice = pick_voice(language_code)
+    print(f"👄 Streaming speech in: {selected_voice}")
+
+    order = asyncio.Queue()     # One chunk queue per sentence, in speaking order (None = done)
+    limit = asyncio.Semaphore(TTS_PARALLEL_SENTENCES)
+    synth_tasks = []
+    failed = False
+
+    async def synthesize(text, out):
+        try:
+            # Per note (TTS_PARALLEL_SENTENCES) and process-wide (the "tts" stage limit)
+            async with limit, STAGES["tts"]:
+                communicate = edge_tts.Communicate(text, selected_voice)
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        out.put_nowait(chunk["data"])
+            out.put_nowait(None)
+        except Exception as e:
+            out.put_nowait(e)
+
+    async def produce():
+        try:
+            async for sentence in sentences:
+                text = clean_tts_text(sentence)
+                # After a failure keep draining the text (the caller still needs it), but stop synthesizing
+                if text and not failed:
+                    out = asyncio.Queue()
+                    synth_tasks.append(asyncio.create_task(synthesize(text, out)))
+                    order.put_nowait(out)
+        except Exception as e:
+            order.put_nowait(e)
+        order.put_nowait(None)
+
+    started = time.perf_counter()
+    first_chunk_at = None
+    spoken = 0
+    encoder = OpusStreamEncoder()
+    producer = asyncio.create_task(produce())
+    try:
+        await encoder.start()
+        while (out := await order.get()) is not None:
+            if isinstance(out, Exception):
+                raise out
+            while (data := await out.get()) is not None:
+                if isinstance(data, Exception):
+                    raise data
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                await encoder.feed(data)
+            spoken += 1
+
+        last_chunk_at = time.perf_counter()
+        if not spoken:
+            await encoder.abort()
+            return None
+        ogg_bytes = await encoder.finish()
+    except Exception as e:
+        print(f"❌ Streaming TTS Error: {e}")
+        failed = True
+        for task in synth_tasks:
+            task.cancel()
+        await encoder.abort()
+        await producer
+        return None
+
+    finished = time.perf_counter()
+    TTS_TIMINGS["first_byte"].append((first_chunk_at or last_chunk_at) - started)
+    TTS_TIMINGS["synthesis"].append(last_chunk_at - started)
+    TTS_TIMINGS["encode_tail"].append(finished - last_chunk_at)
+    TTS_TIMINGS["total"].append(finished - started)
+    STAGE_SECONDS.observe(finished - last_chunk_at, stage="tts_encode_tail")
+    print(f"👄 Streamed {spoken} sentence(s)")
+    return ogg_bytes
@@ -0,0 +1,216 @@
+# app/conversation_log.py
+# 📜 Every turn on disk for the admin "Live Logs" tab: sender, language, transcript,
+# tool call, reply and per-stage timings. Finished traces land in a RAM buffer and
+# a background task writes them in batches, so the reply path never touches SQLite.
+#
+# Reads are keyset-paginated on (created_at, id) and every filter has an index,
+# so a page costs the same with 1K or 10M rows (no OFFSET, no COUNT(*)).
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from app.metrics import TRACE_LISTENERS, Counter
+
+# Own DB file: the admin tab reads it while the bot writes (WAL)
+LOG_DB_PATH = os.getenv("LOG_DB_PATH", "data/conversation_log.db")
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_MS", "1000")) / 1000
+LOG_BATCH_SIZE = 500                                        # Flush early once this many turns are waiting
+LOG_MAX_PENDING = int(os.getenv("LOG_MAX_PENDING", "20000"))  # RAM cap if the disk stalls (oldest dropped)
+LOG_RETENTION = float(os.getenv("LOG_RETENTION_DAYS", "30")) * 86400
+PAGE_SIZE = 50
+
+LOGGED_TURNS = Counter("vani_conversation_log_turns_total", "Turns written to / dropped from the conversation log", ("result",))
+
+COLUMNS = ("created_at", "trace_id", "sender_id", "kind", "language", "transcript", "tool_call", "reply", "total_ms", "stages", "error")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,       -- Unix time the message finished
+    trace_id TEXT,
+    sender_id TEXT NOT NULL,
+    kind TEXT,                      -- text | audio | admin
+    language TEXT,
+    transcript TEXT,
+    tool_call TEXT,                 -- check_doctor argument, if the LLM used the tool
+    reply TEXT,
+    total_ms REAL,
+    stages TEXT,                    -- JSON: [{"stage": "stt", "ms": 812.4, "ok": true}, ...]
+    error TEXT                      -- Exception name or first failed stage, NULL when fine
+);
+CREATE INDEX IF NOT EXISTS idx_turns_time ON turns (created_at);
+CREATE INDEX IF NOT EXISTS idx_turns_sender ON turns (sender_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_turns_language ON turns (language, created_at);
+CREATE INDEX IF NOT EXISTS idx_turns_errors ON turns (created_at) WHERE error IS NOT NULL;
+"""
+
+
+def _row_from_trace(current):
+    fields = current.fields
+    failed = [stage for stage, _, ok in current.spans if not ok]
+    return (
+        time.time(),
+        current.id,
+        str(current.sender_id),
+        fields.get("kind", current.kind),
+        fields.get("language"),
+        fields.get("transcript"),
+        fields.get("tool_call"),
+        fields.get("reply"),
+        round(current.total * 1000, 1),
+        json.dumps([{"stage": stage, "ms": round(seconds * 1000, 1), "ok": ok} for stage, seconds, ok in current.spans]),
+        current.error or (failed[0] if failed else None),
+    )
+
+
+def connect(db_path=LOG_DB_PATH):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class ConversationLog:
+
+    def __init__(self, db_path=LOG_DB_PATH, flush_interval=LOG_FLUSH_INTERVAL, max_pending=LOG_MAX_PENDING):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = []               # Rows waiting for the next batch
+        self.stats = {"recorded": 0, "rows_written": 0, "flushes": 0, "dropped": 0, "flush_errors": 0}
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._flusher = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect(self.db_path)
+        return self._conn
+
+    def record(self, current):
+        """ Trace listener: O(1), no I/O - the flusher does the writing """
+        row = _row_from_trace(current)
+        with self._lock:
+            self.pending.append(row)
+            self.stats["recorded"] += 1
+            overflow = len(self.pending) - self.max_pending
+            if overflow > 0:
+                del self.pending[:overflow]
+                self.stats["dropped"] += overflow
+                LOGGED_TURNS.inc(overflow, result="dropped")
+            full = len(self.pending) >= LOG_BATCH_SIZE
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def flush(self):
+        """ Write pending rows in one transaction (runs in a thread) """
+        with self._lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return 0
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        try:
+            conn = self._db()
+            with conn:
+                conn.executemany(f"INSERT INTO turns ({', '.join(COLUMNS)}) VALUES ({placeholders})", rows)
+                if self.stats["flushes"] % 100 == 0:
+                    conn.execute("DELETE FROM turns WHERE created_at < ?", (time.time() - LOG_RETENTION,))
+        except sqlite3.Error as e:
+            # Keep the rows for the next attempt (the RAM cap still applies in record())
+            with self._lock:
+                self.pending = rows + self.pending
+            self.stats["flush_errors"] += 1
+            print(f"❌ Conversation log flush error: {e}")
+            return 0
+        self.stats["flushes"] += 1
+        self.stats["rows_written"] += len(rows)
+        LOGGED_TURNS.inc(len(rows), result="written")
+        return len(rows)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self.pending:
+                await asyncio.to_thread(self.flush)
+
+    def start(self):
+        if self._flusher is None:
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+            if self.record not in TRACE_LISTENERS:
+                TRACE_LISTENERS.append(self.record)
+
+    async def stop(self):
+        if self.record in TRACE_LISTENERS:
+            TRACE_LISTENERS.remove(self.record)
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await asyncio.to_thread(self.flush)
+
+    def get_stats(self):
+        return {**self.stats, "pending_rows": len(self.pending)}
+
+
+def query_turns(conn, sender_id=None, language=None, since=None, until=None, errors_only=False, before=None, limit=PAGE_SIZE):
+    """
+    One page of turns, newest first. `before` is the (created_at, id) of the last row
+    of the previous page. Returns (rows, next_cursor) - next_cursor is None on the last page.
+    Each filter maps onto one index: sender/language -> (column, created_at),
+    errors -> the partial index, otherwise created_at.
+    """
+    clauses, params = [], []
+    if sender_id:
+        clauses.append("sender_id = ?")
+        params.append(sender_id)
+    if language:
+        clauses.append("language = ?")
+        params.append(language)
+    if errors_only:
+        clauses.append("error IS NOT NULL")
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+    if before is not None:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(before)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor = conn.execute(
+        f"SELECT id, {', '.join(COLUMNS)} FROM turns {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+        params + [limit + 1],
+    )
+    names = [column[0] for column in cursor.description]
+    rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
+
+
+def list_languages(conn):
+    """ Distinct languages - a skip-scan over idx_turns_language, one seek per value """
+    languages = []
+    row = conn.execute("SELECT MIN(language) FROM turns WHERE language IS NOT NULL").fetchone()
+    while row and row[0] is not None:
+        languages.append(row[0])
+        row = conn.execute("SELECT MIN(language) FROM turns WHERE language > ?", (row[0],)).fetchone()
+    return languages
+
+
+CONVERSATION_LOG = ConversationLog()
@@ -1,88 +1,360 @@
 # app/database.py
+import os
+import re
+import time
 import sqlite3
-from thefuzz import process
+import threading
+from datetime import datetime
+from dataclasses import dataclass
+from types import MappingProxyType
+from app.matching import get_match_index
+from app.symptoms import get_symptom_index
+from app.schedule_hours import derived_columns, format_minutes, WEEKDAYS
 
 DB_PATH = "data/clinic.db"
 
+# Columns the admin console may write (`id` is AUTOINCREMENT and never written)
+SCHEDULE_COLUMNS = ("doctor_name", "department", "day", "schedule_time", "current_status")
+# Parsed from `day` / `schedule_time` on every write (see app/schedule_hours.py) - never edited by hand
+DERIVED_COLUMNS = {"day_mask": "INTEGER", "open_minute": "INTEGER", "close_minute": "INTEGER"}
+
+# get_doctor_info(): "show me all doctors / the schedule" -> the full schedule
+ALL_DOCTORS = re.compile(r"\b(all|schedules?|doctors|anyone)\b")
+# A fuzzy score this high means the query NAMES a doctor/department - it beats a symptom match
+NAMED_SCORE = 90
+
+# How often (seconds) we ask SQLite whether ANOTHER process (e.g. the Streamlit
+# admin) changed the schedule. Writes made in this process invalidate instantly.
+SCHEDULE_CHECK_INTERVAL = float(os.getenv("SCHEDULE_CHECK_INTERVAL", "1.0"))
+
+
+# --- SCHEDULE SNAPSHOT (In-Memory Cache) ---
+@dataclass(frozen=True)
+class ScheduleSnapshot:
+    """
+    Immutable copy of the `schedule` table + lookup dicts.
+    Rebuilt only when the data changes; every read is a plain dict hit.
+    """
+    version: tuple
+    rows: tuple              # All rows (each row is a read-only mapping)
+    doctor_names: tuple      # DISTINCT doctor_name
+    departments: tuple       # DISTINCT department
+    by_doctor: MappingProxyType       # "Dr. Sharma" -> (row, row, ...)
+    by_department: MappingProxyType   # "Cardiology" -> (row, ...)
+    by_day: MappingProxyType          # "Monday" -> (row, ...)
+    overview: str            # Pre-rendered text for the System Prompt
+
+
+_snapshot = None
+_local_version = 0          # Bumped by invalidate_schedule() for writes in THIS process
+_data_version = None        # Last seen PRAGMA data_version (changes on writes by OTHER connections)
+_last_check = 0.0
+_watch_conn = None
+_lock = threading.Lock()
+
+
+def _group_by(rows, column):
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[column], []).append(row)
+    return MappingProxyType({key: tuple(items) for key, items in groups.items()})
+
+
+def _build_snapshot(version):
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM schedule ORDER BY id").fetchall()
+    conn.close()
+
+    rows = tuple(MappingProxyType(dict(row)) for row in rows)
+    by_doctor = _group_by(rows, "doctor_name")
+    by_department = _group_by(rows, "department")
+
+    # Create a summary like: "- Cardiology: Dr. Sharma\n- General: Dr. Anjali"
+    overview = "\n".join(f"- {doc_rows[0]['department']}: {name}" for name, doc_rows in by_doctor.items())
+
+    return ScheduleSnapshot(
+        version=version,
+        rows=rows,
+        doctor_names=tuple(by_doctor.keys()),
+        departments=tuple(by_department.keys()),
+        by_doctor=by_doctor,
+        by_department=by_department,
+        by_day=_group_by(rows, "day"),
+        overview=overview,
+    )
+
+
+# --- SCHEMA: parsed hours + weekday bitmask ---
+def _refresh_derived(conn, ids=None):
+    """ Recompute the parsed columns (all rows missing them, or the given ids) """
+    if ids is None:
+        rows = conn.execute("SELECT id, day, schedule_time FROM schedule WHERE day_mask IS NULL").fetchall()
+    else:
+        ids = list(ids)
+        rows = [row for i in range(0, len(ids), 500) for row in conn.execute(
+            f"SELECT id, day, schedule_time FROM schedule WHERE id IN ({', '.join('?' for _ in ids[i:i + 500])})", ids[i:i + 500]
+        )]
+    conn.executemany(
+        "UPDATE schedule SET day_mask = :day_mask, open_minute = :open_minute, close_minute = :close_minute WHERE id = :id",
+        [{"id": row_id, **derived_columns(day, schedule_time)} for row_id, day, schedule_time in rows],
+    )
+    return len(rows)
+
+
+def migrate_schedule(conn):
+    """
+    Bring an existing `schedule` table up to date in place: add the parsed columns,
+    fill them for old rows and create the indexes. Safe to run any number of times.
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(schedule)")}
+    with conn:
+        for column, column_type in DERIVED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE schedule ADD COLUMN {column} {column_type}")
+        filled = _refresh_derived(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_schedule_doctor ON schedule (doctor_name)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_schedule_department ON schedule (department)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_schedule_hours ON schedule (open_minute, close_minute)")
+    return filled
+
+
+def _read_data_version():
+    global _watch_conn
+    if _watch_conn is None:
+        # One long-lived connection: PRAGMA data_version only changes for it
+        # when some OTHER connection commits to the database file.
+        _watch_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        _watch_conn.row_factory = sqlite3.Row
+        # Databases seeded before the parsed columns existed are upgraded on first use
+        if migrate_schedule(_watch_conn):
+            print("📋 Schedule migrated: parsed hours + weekday masks filled in")
+    return _watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def get_schedule_snapshot():
+    """ Return the current snapshot, rebuilding it only if the schedule changed """
+    global _snapshot, _data_version, _last_check
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version[0] == _local_version and now - _last_check < SCHEDULE_CHECK_INTERVAL:
+        return snapshot
+
+    with _lock:
+        _last_check = now
+        _data_version = _read_data_version()
+        version = (_local_version, _data_version)
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = _build_snapshot(version)
+            print(f"📋 Schedule snapshot rebuilt ({len(_snapshot.rows)} rows)")
+        return _snapshot
+
+
+def invalidate_schedule():
+    """ Call after writing to `schedule` so the next read rebuilds the snapshot """
+    global _local_version
+    with _lock:
+        _local_version += 1
+
+
+def get_schedule_version():
+    """ Version tuple of the current snapshot (changes whenever the schedule does) """
+    return get_schedule_snapshot().version
+
+
+def check_database():
+    """ Readiness probe: a fresh connection can read `schedule` (raises sqlite3.Error otherwise) """
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, timeout=1.0)
+    try:
+        conn.execute("SELECT 1 FROM schedule LIMIT 1").fetchall()
+    finally:
+        conn.close()
+
+
 def get_clinic_overview():
     """
     Returns a summary string of all departments and doctors.
     Used for the System Prompt so the LLM knows what we have.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT doctor_name, department FROM schedule GROUP BY doctor_name")
-    rows = cursor.fetchall()
-    conn.close()
-    
-    # Create a summary like: "- Cardiology (Dr. Sharma)\n- General (Dr. Anjali)"
-    overview = []
-    for name, dept in rows:
-        overview.append(f"- {dept}: {name}")
-    
-    return "\n".join(overview)
+    return get_schedule_snapshot().overview
+
+# --- AVAILABILITY (computed in SQL from the parsed columns) ---
+# "In now": today's shift covers this minute, or yesterday's overnight shift is still running
+IN_NOW_SQL = """
+SELECT doctor_name, department, close_minute
+FROM schedule
+WHERE UPPER(current_status) = 'AVAILABLE' {filters}
+  AND (((day_mask >> :weekday) & 1 AND open_minute <= :minute AND :minute < close_minute)
+    OR ((day_mask >> :yesterday) & 1 AND close_minute > 1440 AND :minute + 1440 < close_minute))
+ORDER BY doctor_name
+"""
+
+# Next shift START after now: today later on, else the first matching weekday within a week
+NEXT_OPENING_SQL = """
+WITH RECURSIVE offsets(k) AS (SELECT 0 UNION ALL SELECT k + 1 FROM offsets WHERE k < 7)
+SELECT doctor_name, department, open_minute, close_minute, k AS in_days
+FROM schedule JOIN offsets
+WHERE UPPER(current_status) = 'AVAILABLE' AND open_minute IS NOT NULL {filters}
+  AND (day_mask >> ((:weekday + k) % 7)) & 1
+  AND (k > 0 OR open_minute > :minute)
+ORDER BY k, open_minute, doctor_name
+LIMIT 1
+"""
+
+# Clinic opening hours: first shift start to last shift end (idx_schedule_hours)
+CLINIC_HOURS_SQL = "SELECT MIN(open_minute) AS opens, MAX(close_minute) AS closes FROM schedule WHERE open_minute IS NOT NULL"
+
+
+def _filters(doctor_name, department):
+    clauses, params = [], {}
+    if doctor_name:
+        clauses.append("AND doctor_name = :doctor_name")
+        params["doctor_name"] = doctor_name
+    if department:
+        clauses.append("AND department = :department")
+        params["department"] = department
+    return " ".join(clauses), params
+
+
+def _clock(now):
+    now = now or datetime.now()
+    weekday = now.weekday()
+    return now, {"weekday": weekday, "yesterday": (weekday - 1) % 7, "minute": now.hour * 60 + now.minute}
+
+
+def _query(sql, params):
+    get_schedule_snapshot()     # Makes sure the connection exists and the schema is migrated
+    with _lock:
+        return _watch_conn.execute(sql, params).fetchall()
+
+
+def who_is_in(now=None, doctor_name=None, department=None):
+    """ Doctors seeing patients right now: [{"doctor", "department", "until"}] """
+    now, clock = _clock(now)
+    filters, params = _filters(doctor_name, department)
+    rows = _query(IN_NOW_SQL.format(filters=filters), {**clock, **params})
+    return [{
+        "doctor": row["doctor_name"],
+        "department": row["department"],
+        "until": format_minutes(row["close_minute"]),
+    } for row in rows]
+
+
+def clinic_hours():
+    """ "08:00 AM - 08:00 PM" (earliest shift start to latest shift end), or None """
+    row = _query(CLINIC_HOURS_SQL, {})[0]
+    if row["opens"] is None:
+        return None
+    return f"{format_minutes(row['opens'])} - {format_minutes(row['closes'])}"
+
+
+def _day_label(now, in_days):
+    if in_days == 0:
+        return "today"
+    if in_days == 1:
+        return "tomorrow"
+    return WEEKDAYS[(now.weekday() + in_days) % 7]
+
+
+def next_opening(doctor_name=None, department=None, now=None):
+    """ When the doctor (or anyone in the department) next starts a shift, or None """
+    now, clock = _clock(now)
+    filters, params = _filters(doctor_name, department)
+    rows = _query(NEXT_OPENING_SQL.format(filters=filters), {**clock, **params})
+    if not rows:
+        return None
+    row = rows[0]
+    return {
+        "doctor": row["doctor_name"],
+        "day": _day_label(now, row["in_days"]),
+        "opens": format_minutes(row["open_minute"]),
+        "closes": format_minutes(row["close_minute"]),
+        "in_days": row["in_days"],
+    }
+
+
+def availability_facts(doctor_names, now=None):
+    """
+    What the LLM used to work out itself from 'Current Time' and the timings:
+    is each doctor in right now, until when, and when is their next shift.
+    """
+    now = now or datetime.now()
+    in_now = {row["doctor"]: row["until"] for row in who_is_in(now)}
+    facts = []
+    for name in doctor_names:
+        upcoming = next_opening(doctor_name=name, now=now)
+        facts.append({
+            "doctor": name,
+            "in_now": name in in_now,
+            "in_until": in_now.get(name),
+            "next_opening": f"{upcoming['day']} {upcoming['opens']}" if upcoming else None,
+            # The same, split for the local renderers (app/replies.py translates the day)
+            "next_day": upcoming["day"] if upcoming else None,
+            "next_opens": upcoming["opens"] if upcoming else None,
+        })
+    return {"now": now.strftime("%A %I:%M %p"), "doctors": facts}
+
 
 def get_doctor_info(query_str):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row # Allows accessing columns by name
-    cursor = conn.cursor()
-    
-    # 1. Fetch Lists for Fuzzy Matching
-    cursor.execute("SELECT DISTINCT doctor_name FROM schedule")
-    doctor_names = [row['doctor_name'] for row in cursor.fetchall()]
-    
-    cursor.execute("SELECT DISTINCT department FROM schedule")
-    departments = [row['department'] for row in cursor.fetchall()]
-    
-    # 2. Logic: "All Doctors" request
-    q = query_str.lower()
-    if "all" in q or "schedule" in q or "doctors" in q or "anyone" in q:
+    snapshot = get_schedule_snapshot()
+
+    # 1. Fuzzy Match Index (built once per schedule version)
+    index = get_match_index(snapshot)
+
+    # 2. Symptom / specialty words in any language ("I feel feverish", "सीने में दर्द")
+    symptom = get_symptom_index(snapshot).match(query_str)
+
+    # 3. Logic: "All Doctors" request (whole words - raw phrases say "really", "small", "allergy")
+    if symptom is None and ALL_DOCTORS.search(query_str.lower()):
         print("🔍 Searching for ALL doctors")
-        cursor.execute("SELECT * FROM schedule")
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return {"type": "full_schedule", "data": results}
+        results = [{column: row[column] for column in ("id", *SCHEDULE_COLUMNS)} for row in snapshot.rows]
+        return {"type": "full_schedule", "data": results, "facts": availability_facts(snapshot.doctor_names)}
+
+    # 4. Fuzzy Search Logic (doctors + departments scored in ONE pass)
+    best = index.best_per_kind(query_str)
+    best_doc, doc_score = (best["doctor"].value, best["doctor"].score) if best["doctor"] else (None, 0)
+    best_dept, dept_score = (best["department"].value, best["department"].score) if best["department"] else (None, 0)
 
-    # 3. Fuzzy Search Logic
-    best_doc, doc_score = process.extractOne(query_str, doctor_names) if doctor_names else (None, 0)
-    best_dept, dept_score = process.extractOne(query_str, departments) if departments else (None, 0)
-    
     threshold = 60  # Minimum score to consider a match
-    
+    named = max(doc_score, dept_score) >= NAMED_SCORE
+
+    # Case S: Symptom Match (unless the query names a doctor/department outright)
+    if symptom is not None and not named:
+        if symptom.department is None:
+            print(f"🔍 Symptom '{symptom.term}' needs {symptom.specialty} - not at this clinic")
+            return {
+                "error": "not_found",
+                "valid_departments": list(snapshot.departments),
+                "specialty": symptom.specialty,
+            }
+        print(f"🔍 Searching by Symptom: '{symptom.term}' -> {symptom.department} ({symptom.method}, {symptom.score:.2f})")
+        rows = snapshot.by_department[symptom.department]
+
     # Case A: Department Match
-    if dept_score > threshold and dept_score > doc_score:
+    elif dept_score > threshold and dept_score > doc_score:
         print(f"🔍 Searching by Department: {best_dept} (Score: {dept_score})")
-        cursor.execute("SELECT * FROM schedule WHERE department = ?", (best_dept,))
-        
+        rows = snapshot.by_department[best_dept]
+
     # Case B: Doctor Name Match
     elif doc_score > threshold:
         print(f"🔍 Searching by Name: {best_doc} (Score: {doc_score})")
-        cursor.execute("SELECT * FROM schedule WHERE doctor_name = ?", (best_doc,))
-        
+        rows = snapshot.by_doctor[best_doc]
+
     # Case C: No match found
     else:
-        conn.row_factory = None
-        cursor.execute("SELECT DISTINCT department FROM schedule")
-        valid_depts = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return {
-            "error": "not_found", 
-            "valid_departments": valid_depts
+            "error": "not_found",
+            "valid_departments": list(snapshot.departments)
         }
 
-    # Fetch results
-    rows = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-
    # --- UPDATED LOGIC: COMBINE TIME & STATUS ---
     final_data = []
-    
+
     for row in rows:
         # Get raw values
         time_slot = row.get("schedule_time", "Unknown")
         status = row.get("current_status", "Available")
-        
+
         # Logic to decide what the LLM sees
         if status.upper() != "AVAILABLE":
             # If on leave, override the message to be very clear
@@ -92,7 +364,7 @@ def get_doctor_info(query_str):
             # If available, just show the time
             availability_msg = time_slot
             is_active = True
-            
+
         final_data.append({
             "doctor": row["doctor_name"],
             "day": row["day"],
@@ -101,36 +373,125 @@ def get_doctor_info(query_str):
             "is_active": is_active      # Boolean flag for ease
         })
 
-    return {"type": "specific_result", "data": final_data}
+    doctor_names = list(dict.fromkeys(row["doctor_name"] for row in rows))
+    result = {"type": "specific_result", "data": final_data, "facts": availability_facts(doctor_names)}
+    if symptom is not None and not named:
+        result["symptom"] = {"term": symptom.term, "specialty": symptom.specialty, "department": symptom.department}
+    return result
 
 def update_doctor_schedule(doctor_name, new_status, day="ALL"):
+    """ One status change - see update_doctor_schedules() """
+    return update_doctor_schedules([{"name": doctor_name, "day": day, "status": new_status}])
+
+
+def _resolve_operations(operations):
+    """
+    Fuzzy-match every name and day in TWO batched passes (one per entity kind).
+    Returns (plan, errors): plan = [(doctor, day or None for all days, status)].
+    """
+    index = get_match_index(get_schedule_snapshot())
+    names = [str(op.get("name") or "") for op in operations]
+    days = [str(op.get("day") or "ALL") for op in operations]
+    doctors = index.resolve_many(names, "doctor", threshold=80)
+    specific = [i for i, day in enumerate(days) if day.upper() != "ALL"]
+    # We use fuzzy matching for days too, to handle "Mon" vs "Monday"
+    day_matches = dict(zip(specific, index.resolve_many([days[i] for i in specific], "day")))
+
+    plan, errors = [], []
+    for i, op in enumerate(operations):
+        status = str(op.get("status") or "").strip()
+        if doctors[i] is None:
+            errors.append(f"Could not find doctor '{names[i]}'.")
+        elif not status:
+            errors.append(f"No status given for {doctors[i].value}.")
+        else:
+            plan.append((doctors[i].value, day_matches[i].value if i in day_matches else None, status))
+    return plan, errors
+
+
+def format_schedule_diff(changes, unchanged, empty):
+    """ Diff-style confirmation: "- Dr. Sharma (Monday): Available -> ON LEAVE" """
+    lines = [f"Updated {len(changes)} shift{'s' if len(changes) != 1 else ''}:" if changes else "Nothing changed."]
+    lines += [f"- {doctor} ({day}): {old} -> {new}" for doctor, day, old, new in changes]
+    lines += [f"= {doctor} ({day}): already {status}" for doctor, day, status in unchanged]
+    lines += [f"? {doctor} ({day}): no shift on that day" for doctor, day in empty]
+    return "\n".join(lines)
+
+
+def update_doctor_schedules(operations):
+    """
+    Bulk admin update: [{"name", "day" ("ALL" = every day), "status"}, ...].
+    All names/days are resolved in one batch, then every change is applied in ONE
+    transaction - if any name can't be resolved nothing is written.
+    Later operations win when they touch the same shift.
+    """
+    plan, errors = _resolve_operations(operations)
+    if errors or not plan:
+        return {"status": "error", "message": " ".join(errors) or "No schedule changes found.", "changes": []}
+
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # 1. Fuzzy Match Doctor Name
-    cursor.execute("SELECT DISTINCT doctor_name FROM schedule")
-    all_doctors = [row[0] for row in cursor.fetchall()]
-    best_match, score = process.extractOne(doctor_name, all_doctors)
-    
-    if score < 80:
+    before, after, order, empty = {}, {}, [], []
+    try:
+        # IMMEDIATE: take the write lock before reading, so the diff is exactly what we change
+        conn.execute("BEGIN IMMEDIATE")
+        for doctor, day, status in plan:
+            if day is None:
+                rows = conn.execute("SELECT id, day, current_status FROM schedule WHERE doctor_name = ? ORDER BY id", (doctor,)).fetchall()
+            else:
+                rows = conn.execute("SELECT id, day, current_status FROM schedule WHERE doctor_name = ? AND day = ? ORDER BY id", (doctor, day)).fetchall()
+            if not rows:
+                empty.append((doctor, day or "All Days"))
+            for row_id, row_day, current in rows:
+                if row_id not in before:
+                    before[row_id] = (doctor, row_day, current)
+                    order.append(row_id)
+                after[row_id] = status
+        conn.executemany("UPDATE schedule SET current_status = ? WHERE id = ?", [(status, row_id) for row_id, status in after.items()])
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
         conn.close()
-        return {"status": "error", "message": f"Could not find doctor '{doctor_name}'."}
-    
-    # 2. Update Logic
-    if day.upper() == "ALL":
-        # Update ALL days for this doctor
-        cursor.execute("UPDATE schedule SET current_status = ? WHERE doctor_name = ?", (new_status, best_match))
-        msg = f"Updated {best_match} (All Days) to: {new_status}"
-    else:
-        # Update ONLY the specific day
-        # We use fuzzy matching for days too, to handle "Mon" vs "Monday"
-        valid_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday", "Daily"]
-        best_day, day_score = process.extractOne(day, valid_days)
-        
-        cursor.execute("UPDATE schedule SET current_status = ? WHERE doctor_name = ? AND day = ?", (new_status, best_match, best_day))
-        msg = f"Updated {best_match} ({best_day}) to: {new_status}"
-
-    conn.commit()
-    conn.close()
-    
-    return {"status": "success", "message": msg}
\ No newline at end of file
+    invalidate_schedule()
+
+    changes = [(*before[i][:2], before[i][2], after[i]) for i in order if before[i][2] != after[i]]
+    unchanged = [before[i] for i in order if before[i][2] == after[i]]
+    return {
+        "status": "success",
+        "message": format_schedule_diff(changes, unchanged, empty),
+        "changes": [{"doctor": doctor, "day": day, "old": old, "new": new} for doctor, day, old, new in changes],
+    }
+
+
+def apply_schedule_changes(inserts=(), updates=(), deletes=()):
+    """
+    Row-level schedule edit in ONE transaction (used by the admin console).
+      inserts: [{column: value}]   updates: [(id, {column: value})]   deletes: [id]
+    Unknown columns are ignored; None values in inserts fall back to the column DEFAULT.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    touched = []            # Rows whose day / schedule_time changed -> re-parse
+    try:
+        with conn:
+            if deletes:
+                conn.executemany("DELETE FROM schedule WHERE id = ?", [(int(row_id),) for row_id in deletes])
+            for row_id, values in updates:
+                columns = [c for c in SCHEDULE_COLUMNS if c in values]
+                if columns:
+                    assignments = ", ".join(f"{c} = ?" for c in columns)
+                    conn.execute(f"UPDATE schedule SET {assignments} WHERE id = ?", [values[c] for c in columns] + [int(row_id)])
+                    if "day" in values or "schedule_time" in values:
+                        touched.append(int(row_id))
+            for values in inserts:
+                columns = [c for c in SCHEDULE_COLUMNS if values.get(c) is not None]
+                if columns:
+                    placeholders = ", ".join("?" for _ in columns)
+                    cursor = conn.execute(f"INSERT INTO schedule ({', '.join(columns)}) VALUES ({placeholders})", [values[c] for c in columns])
+                    touched.append(cursor.lastrowid)
+            if touched:
+                _refresh_derived(conn, touched)
+    finally:
+        conn.close()
+    invalidate_schedule()
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
@@ -0,0 +1,131 @@
+# app/dedup.py
+# 🔁 Seen-set of WhatsApp message IDs. Meta redelivers a webhook when we answer slowly
+# (or during a restart); a redelivered ID is dropped here instead of re-running STT + LLM + TTS.
+#   - RAM: bounded, time-expiring OrderedDict (oldest first)
+#   - SQLite (optional): survives restarts and is shared by every uvicorn worker;
+#     the webhook checks RAM inline and claims the ID on disk in a worker thread
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+
+SEEN_DB_PATH = os.getenv("SEEN_DB_PATH", "data/seen_messages.db")
+SEEN_PERSIST = os.getenv("SEEN_PERSIST", "1") == "1"
+SEEN_MAX_ENTRIES = int(os.getenv("SEEN_MAX_ENTRIES", "10000"))
+# Meta keeps retrying for up to a day or so
+SEEN_TTL = float(os.getenv("SEEN_TTL_HOURS", "48")) * 3600
+PRUNE_EVERY = 500   # Inserts between on-disk cleanups
+
+
+class SeenMessages:
+
+    def __init__(self, db_path=SEEN_DB_PATH, persist=SEEN_PERSIST, max_entries=SEEN_MAX_ENTRIES, ttl=SEEN_TTL):
+        self.db_path = db_path
+        self.persist = persist
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.ids = OrderedDict()        # message_id -> first seen (epoch seconds)
+        self.stats = {"new": 0, "duplicates": 0, "db_duplicates": 0, "evictions": 0, "db_errors": 0}
+        self._inserts = 0
+        self._conn = None
+        self._lock = threading.Lock()       # RAM set + stats
+        self._db_lock = threading.Lock()    # The shared SQLite connection (used from worker threads)
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("CREATE TABLE IF NOT EXISTS seen_messages (message_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_at ON seen_messages (seen_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _evict(self):
+        """ Drop the oldest IDs until we are back within max_entries (run AFTER inserting) """
+        while len(self.ids) > self.max_entries:
+            self.ids.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _check_ram(self, message_id, now):
+        """ True = new to this process (and now reserved in RAM), False = redelivery """
+        with self._lock:
+            # Expired entries sit at the front; drop them so an old ID counts as new again
+            while self.ids:
+                oldest, seen_at = next(iter(self.ids.items()))
+                if now - seen_at < self.ttl:
+                    break
+                del self.ids[oldest]
+                self.stats["evictions"] += 1
+            if message_id in self.ids:
+                self.stats["duplicates"] += 1
+                return False
+            self.ids[message_id] = now
+            self._evict()
+            return True
+
+    def _claim_on_disk(self, message_id, now):
+        """ INSERT OR IGNORE: True if no process has seen this ID yet """
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO seen_messages (message_id, seen_at) VALUES (?, ?)", (message_id, now),
+                )
+                if cursor.rowcount == 0:
+                    # Seen before - but maybe so long ago that it counts as new again
+                    row = conn.execute("SELECT seen_at FROM seen_messages WHERE message_id = ?", (message_id,)).fetchone()
+                    if row and now - row[0] < self.ttl:
+                        return False
+                    conn.execute("UPDATE seen_messages SET seen_at = ? WHERE message_id = ?", (now, message_id))
+                self._inserts += 1
+                if self._inserts % PRUNE_EVERY == 0:
+                    conn.execute("DELETE FROM seen_messages WHERE seen_at < ?", (now - self.ttl,))
+        return True
+
+    def _check_disk(self, message_id, now):
+        """ Second opinion from the other workers / before the restart. Runs in a thread from the webhook. """
+        if self.persist:
+            try:
+                if not self._claim_on_disk(message_id, now):
+                    with self._lock:
+                        self.stats["db_duplicates"] += 1
+                    return False
+            except sqlite3.Error as e:
+                # Never lose a message because the seen-set is unhappy
+                with self._lock:
+                    self.stats["db_errors"] += 1
+                print(f"❌ Seen-set DB error: {e}")
+        with self._lock:
+            self.stats["new"] += 1
+        return True
+
+    def check_and_add(self, message_id):
+        """ True the first time an ID shows up (process it), False for a redelivery (drop it) """
+        now = time.time()
+        if not self._check_ram(message_id, now):
+            return False
+        return self._check_disk(message_id, now)
+
+    async def check_and_add_async(self, message_id):
+        """
+        check_and_add() for the event loop: the RAM check stays inline (a dict lookup), the SQLite
+        INSERT + commit runs in a worker thread so a slow disk never stalls the webhook
+        """
+        now = time.time()
+        if not self._check_ram(message_id, now):
+            return False
+        if not self.persist:
+            return self._check_disk(message_id, now)
+        return await asyncio.to_thread(self._check_disk, message_id, now)
+
+    def get_stats(self):
+        return {**self.stats, "entries": len(self.ids), "persist": self.persist}
+
+
+SEEN_MESSAGES = SeenMessages()
@@ -0,0 +1,227 @@
+# app/jobs.py
+# 📬 Per-sender mailbox scheduler.
+#   - Messages from the SAME sender run one at a time, in arrival order
+#     (two quick voice notes can't overwrite each other's history).
+#   - DIFFERENT senders run in parallel, up to WORKER_COUNT at once.
+#   - The admin gets a priority lane plus one worker reserved for it.
+#   - The queue is bounded (app/admission.py): past the limit a message is refused and
+#     its sender gets one templated "busy" reply from a separate notice lane.
+import asyncio
+import os
+import time
+from collections import deque
+from app.admission import MAX_QUEUE_DEPTH, MAX_MAILBOX_DEPTH, QUEUE_WAIT, record_shed
+
+# ⚙️ WORKER POOL SETTINGS
+# How many senders we process at the same time (each one = STT + LLM + TTS)
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "4"))
+
+# Keep the last N job timings to compute percentiles for /stats
+LATENCY_WINDOW = 500
+# How many of the busiest mailboxes /stats lists
+TOP_MAILBOXES = 20
+
+MAILBOXES = {}          # key -> deque[(enqueued_at, job)]
+ACTIVE = set()          # keys with a job running right now
+READY = deque()         # keys with pending jobs, waiting for a worker
+PRIORITY_READY = deque()
+PRIORITY_KEYS = set()
+WORKERS = []
+_wakeup = None          # Set whenever a key becomes READY
+
+SHED_NOTICES = deque()  # Refused jobs waiting for their "busy" reply
+NOTICE_KEYS = set()     # Senders with a notice pending (one notice each)
+_notice_wakeup = None
+
+STATS = {
+    "enqueued": 0,
+    "completed": 0,
+    "failed": 0,
+    "in_flight": 0,
+    "priority_jobs": 0,
+    "shed": 0,
+    "notices_sent": 0,
+    "notices_dropped": 0,
+}
+WAIT_TIMES = deque(maxlen=LATENCY_WINDOW)   # Time spent sitting in a mailbox
+RUN_TIMES = deque(maxlen=LATENCY_WINDOW)    # Time spent inside the pipeline
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _mark_ready(key):
+    if key in PRIORITY_KEYS:
+        PRIORITY_READY.append(key)
+    else:
+        READY.append(key)
+    _wakeup.set()
+
+
+async def _next_key(priority_only):
+    # Single event loop: popping + marking ACTIVE happens without an await in between
+    while True:
+        if PRIORITY_READY:
+            key = PRIORITY_READY.popleft()
+        elif READY and not priority_only:
+            key = READY.popleft()
+        else:
+            _wakeup.clear()
+            await _wakeup.wait()
+            continue
+        ACTIVE.add(key)
+        return key
+
+
+async def _worker(worker_id, handler, priority_only=False):
+    while True:
+        key = await _next_key(priority_only)
+        enqueued_at, job = MAILBOXES[key].popleft()
+        started_at = time.perf_counter()
+        WAIT_TIMES.append(started_at - enqueued_at)
+        # The pipeline reads this to pick its rung of the degradation ladder
+        QUEUE_WAIT.set(started_at - enqueued_at)
+        STATS["in_flight"] += 1
+        try:
+            await handler(job)
+            STATS["completed"] += 1
+        except Exception as e:
+            # One bad message must never kill the worker
+            STATS["failed"] += 1
+            print(f"❌ Worker {worker_id} ERROR: {e}")
+        finally:
+            STATS["in_flight"] -= 1
+            RUN_TIMES.append(time.perf_counter() - started_at)
+            ACTIVE.discard(key)
+            if MAILBOXES[key]:
+                # Same sender sent more while we were busy - back in line (fair to others)
+                _mark_ready(key)
+            else:
+                del MAILBOXES[key]
+                PRIORITY_KEYS.discard(key)
+
+
+async def _notifier(shed_handler):
+    """ Answers refused messages - cheap (no STT/LLM/TTS), so one task keeps up """
+    while True:
+        if not SHED_NOTICES:
+            _notice_wakeup.clear()
+            await _notice_wakeup.wait()
+            continue
+        key, job = SHED_NOTICES.popleft()
+        try:
+            await shed_handler(job)
+            STATS["notices_sent"] += 1
+        except Exception as e:
+            print(f"❌ Busy notice ERROR: {e}")
+        finally:
+            NOTICE_KEYS.discard(key)
+
+
+def start_workers(handler, count=WORKER_COUNT, shed_handler=None):
+    """
+    Spawn `count` general workers + 1 worker reserved for the priority lane
+    (+ the notice lane when `shed_handler` answers refused messages)
+    """
+    global _wakeup, _notice_wakeup
+    _wakeup = asyncio.Event()
+    _notice_wakeup = asyncio.Event()
+    for i in range(count):
+        WORKERS.append(asyncio.create_task(_worker(i, handler)))
+    WORKERS.append(asyncio.create_task(_worker("admin", handler, priority_only=True)))
+    if shed_handler is not None:
+        WORKERS.append(asyncio.create_task(_notifier(shed_handler)))
+    print(f"👷 Started {count} pipeline workers (+1 priority)")
+
+
+async def stop_workers():
+    """ Cancel all workers (pending jobs are dropped) """
+    for task in WORKERS:
+        task.cancel()
+    await asyncio.gather(*WORKERS, return_exceptions=True)
+    WORKERS.clear()
+    SHED_NOTICES.clear()
+    NOTICE_KEYS.clear()
+
+
+def _queue_depth():
+    return sum(len(box) for box in MAILBOXES.values())
+
+
+def _shed(job, key, reason):
+    STATS["shed"] += 1
+    record_shed(reason)
+    if key in NOTICE_KEYS:
+        return
+    if len(SHED_NOTICES) >= MAX_QUEUE_DEPTH:
+        # Even the notice lane is backed up - drop silently rather than grow
+        STATS["notices_dropped"] += 1
+        return
+    NOTICE_KEYS.add(key)
+    SHED_NOTICES.append((key, job))
+    if _notice_wakeup is not None:
+        _notice_wakeup.set()
+
+
+def enqueue(job, key, priority=False):
+    """
+    Put a job in the mailbox of `key` (the sender) without waiting.
+    Returns the depth of that mailbox, or None if the queue is full
+    (the job goes to the notice lane instead). Priority jobs are never refused.
+    """
+    if not priority:
+        box = MAILBOXES.get(key)
+        if box is not None and len(box) >= MAX_MAILBOX_DEPTH:
+            _shed(job, key, "mailbox_full")
+            return None
+        if _queue_depth() >= MAX_QUEUE_DEPTH:
+            _shed(job, key, "queue_full")
+            return None
+    box = MAILBOXES.setdefault(key, deque())
+    box.append((time.perf_counter(), job))
+    STATS["enqueued"] += 1
+    if priority:
+        STATS["priority_jobs"] += 1
+        PRIORITY_KEYS.add(key)
+    # Only one READY entry per key, and never while its previous job is running
+    if len(box) == 1 and key not in ACTIVE:
+        _mark_ready(key)
+    return len(box)
+
+
+def _mask(key):
+    key = str(key)
+    return "*" * max(len(key) - 4, 0) + key[-4:]
+
+
+def get_stats():
+    """ Mailbox depths + job latency summary (seconds) """
+    now = time.perf_counter()
+    busiest = sorted(MAILBOXES.items(), key=lambda item: len(item[1]), reverse=True)[:TOP_MAILBOXES]
+    return {
+        **STATS,
+        "workers": len(WORKERS),
+        "queue_depth": _queue_depth(),
+        "pending_notices": len(SHED_NOTICES),
+        "active_senders": len(ACTIVE),
+        "ready_senders": len(READY) + len(PRIORITY_READY),
+        "wait_p50": round(_percentile(WAIT_TIMES, 50), 3),
+        "wait_p95": round(_percentile(WAIT_TIMES, 95), 3),
+        "run_p50": round(_percentile(RUN_TIMES, 50), 3),
+        "run_p95": round(_percentile(RUN_TIMES, 95), 3),
+        "run_max": round(max(RUN_TIMES, default=0.0), 3),
+        "mailboxes": [
+            {
+                "sender": _mask(key),
+                "depth": len(box),
+                "running": key in ACTIVE,
+                "oldest_wait": round(now - box[0][0], 3) if box else 0.0,
+            }
+            for key, box in busiest
+        ],
+    }
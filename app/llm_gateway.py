@@ -0,0 +1,234 @@
+# app/llm_gateway.py
+# 🚪 One shared async gateway to Groq for the patient bot AND the admin bot.
+#   - Concurrency cap (LLM_MAX_CONCURRENCY requests in flight)
+#   - Token buckets per model: requests/min and tokens/min (Groq's two limits)
+#   - 429 -> everyone pauses for Retry-After, then retries with backoff
+#   - Latency budget: if the big model is slow, hedge with (or fall back to) a fast one
+import os
+import json
+import time
+import random
+import asyncio
+from groq import AsyncGroq, APIConnectionError, APITimeoutError, APIStatusError, RateLimitError
+from dotenv import load_dotenv
+from app.metrics import Counter
+
+load_dotenv()
+
+MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "llama-3.1-8b-instant")
+
+# ⚙️ LIMITS (Groq free tier for the 70B model: 30 requests/min, 12K tokens/min)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "12000"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+LLM_MAX_RETRIES = 3
+BACKOFF_BASE = 0.5          # 0.5s, 1s, 2s (+ jitter)
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# ⏱️ LATENCY BUDGET: after this long, "hedge" races the fallback model against the
+# pending request; "fallback" cancels it and asks the fallback model; "off" just waits.
+LLM_LATENCY_BUDGET = float(os.getenv("LLM_LATENCY_BUDGET_MS", "3000")) / 1000
+LLM_BUDGET_MODE = os.getenv("LLM_BUDGET_MODE", "hedge")
+
+COMPLETION_ESTIMATE = 300   # Tokens reserved for the answer until `usage` tells us the truth
+
+LLM_REQUESTS = Counter("vani_llm_requests_total", "Groq requests by model and outcome", ("model", "outcome"))
+
+
+class TokenBucket:
+    """ Continuous-refill bucket. `reserve` may go into debt: the caller sleeps it off (FIFO-ish fairness). """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """ Take `amount` now; returns how long to wait before using it """
+        self._refill()
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def can_take(self, amount):
+        self._refill()
+        return self.level >= amount
+
+    def adjust(self, delta):
+        """ Positive = refund (used fewer tokens than reserved), negative = extra debit """
+        self._refill()
+        self.level = min(self.capacity, self.level + delta)
+
+
+def estimate_tokens(messages, tools=None):
+    # ~4 characters per token is close enough for English + Indic prompts
+    size = len(json.dumps(messages, ensure_ascii=False))
+    if tools:
+        size += len(json.dumps(tools))
+    return size // 4 + COMPLETION_ESTIMATE
+
+
+class LLMGateway:
+
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, rpm=GROQ_RPM, tpm=GROQ_TPM, budget=LLM_LATENCY_BUDGET, budget_mode=LLM_BUDGET_MODE):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.budget = budget
+        self.budget_mode = budget_mode
+        self.buckets = {}               # model -> (requests bucket, tokens bucket)
+        self.paused_until = 0.0         # Set by a 429: nobody sends before this
+        self.stats = {
+            "requests": 0, "retries": 0, "rate_limited": 0, "limiter_waits": 0, "limiter_wait_seconds": 0.0,
+            "budget_exceeded": 0, "hedges": 0, "hedge_wins": 0, "fallbacks": 0, "failures": 0, "tokens_used": 0,
+        }
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = None
+
+    def client(self):
+        """ Shared AsyncGroq client (created lazily; retries are handled here, not by the SDK) """
+        if self._client is None:
+            self._client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0, timeout=LLM_TIMEOUT)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def _buckets(self, model):
+        if model not in self.buckets:
+            self.buckets[model] = (TokenBucket(self.rpm), TokenBucket(self.tpm))
+        return self.buckets[model]
+
+    async def _wait_for_capacity(self, model, estimate):
+        requests, tokens = self._buckets(model)
+        wait = max(requests.reserve(1), tokens.reserve(estimate), self.paused_until - time.monotonic())
+        if wait > 0:
+            self.stats["limiter_waits"] += 1
+            self.stats["limiter_wait_seconds"] += wait
+            await asyncio.sleep(wait)
+
+    def _retry_delay(self, attempt, error):
+        # Groq sends Retry-After on 429s - respect it
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            try:
+                return float(retry_after)
+            except (TypeError, ValueError):
+                pass
+        return BACKOFF_BASE * (2 ** attempt) + random.uniform(0, 0.25)
+
+    async def _call(self, model, messages, **kwargs):
+        """ One logical request: limiter -> concurrency cap -> Groq, with retries """
+        estimate = estimate_tokens(messages, kwargs.get("tools"))
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            await self._wait_for_capacity(model, estimate)
+            try:
+                async with self._semaphore:
+                    self.stats["requests"] += 1
+                    response = await self.client().chat.completions.create(model=model, messages=messages, **kwargs)
+            except RateLimitError as e:
+                self.stats["rate_limited"] += 1
+                LLM_REQUESTS.inc(model=model, outcome="rate_limited")
+                delay = self._retry_delay(attempt, e)
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                error = e
+            except (APIConnectionError, APITimeoutError) as e:
+                LLM_REQUESTS.inc(model=model, outcome="network_error")
+                delay, error = self._retry_delay(attempt, None), e
+            except APIStatusError as e:
+                LLM_REQUESTS.inc(model=model, outcome=f"http_{e.status_code}")
+                if e.status_code not in RETRY_STATUSES:
+                    raise
+                delay, error = self._retry_delay(attempt, e), e
+            else:
+                LLM_REQUESTS.inc(model=model, outcome="ok")
+                usage = getattr(response, "usage", None)
+                if usage is not None and usage.total_tokens:
+                    self.stats["tokens_used"] += usage.total_tokens
+                    self._buckets(model)[1].adjust(estimate - usage.total_tokens)
+                return response
+
+            if attempt == LLM_MAX_RETRIES:
+                break
+            self.stats["retries"] += 1
+            print(f"⚠️ Groq {type(error).__name__} ({model}) - retry {attempt + 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        self.stats["failures"] += 1
+        raise error
+
+    async def complete(self, messages, model=MODEL, **kwargs):
+        """
+        chat.completions.create() with limits, retries and the latency budget.
+        Extra kwargs (tools, tool_choice, temperature...) go straight to Groq.
+        """
+        primary = asyncio.create_task(self._call(model, messages, **kwargs))
+        if self.budget_mode == "off" or model == FALLBACK_MODEL:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=self.budget)
+        if done:
+            return primary.result()
+        self.stats["budget_exceeded"] += 1
+
+        if self.budget_mode == "fallback":
+            primary.cancel()
+            self.stats["fallbacks"] += 1
+            print(f"⏱️ {model} over budget - falling back to {FALLBACK_MODEL}")
+            return await self._call(FALLBACK_MODEL, messages, **kwargs)
+
+        # Hedge only if the fast model has room right now - never queue behind the limiter for it
+        requests, tokens = self._buckets(FALLBACK_MODEL)
+        if not (requests.can_take(1) and tokens.can_take(estimate_tokens(messages, kwargs.get("tools")))):
+            return await primary
+        self.stats["hedges"] += 1
+        print(f"⏱️ {model} over budget - hedging with {FALLBACK_MODEL}")
+        hedge = asyncio.create_task(self._call(FALLBACK_MODEL, messages, **kwargs))
+        return await self._first_success(primary, hedge)
+
+    async def stream(self, messages, model=MODEL, **kwargs):
+        """
+        Streamed chat completion: yields chunks as Groq sends them.
+        Limits and retries apply until the stream opens; there is no hedging
+        (the caller is already consuming tokens).
+        """
+        response = await self._call(model, messages, stream=True, **kwargs)
+        async for chunk in response:
+            yield chunk
+
+    async def _first_success(self, primary, hedge):
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            "limiter_wait_seconds": round(self.stats["limiter_wait_seconds"], 2),
+            "budget_ms": round(self.budget * 1000),
+            "budget_mode": self.budget_mode,
+        }
+
+
+LLM = LLMGateway()
@@ -1,136 +1,156 @@
-# app/main.py (Updated with Memory)
-from app.audio import transcribe_audio, generate_voice_note
-from app.whatsapp_client import get_media_url, download_media_file, upload_media, send_whatsapp_audio, send_whatsapp_message
-from fastapi import FastAPI, Request, Query
+# app/main.py (Webhook = Fast ACK, Pipeline = Background Workers)
+import time
+BOOT = time.perf_counter()      # Before the heavy imports: startup time includes them
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Query, Header
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 import os
 from dotenv import load_dotenv
-from app.whatsapp_client import send_whatsapp_message
-from app.ai_engine import chat_with_llama
-from app.admin_ai import process_admin_command  # <--- NEW IMPORT
+from app.jobs import start_workers, stop_workers, enqueue, get_stats
+from app.pipeline import handle_message, handle_shed
+from app.whatsapp_client import close_client
+from app.transcriber import TRANSCRIBER
+from app.audio import get_tts_stats
+from app.voice_cache import VOICE_CACHE
+from app.router import get_stats as get_router_stats
+from app.ai_engine import get_stats as get_llm_stats
+from app.memory import MEMORY
+from app.conversation_log import CONVERSATION_LOG
+from app.dedup import SEEN_MESSAGES
+from app.admission import get_stats as get_admission_stats
+from app.symptoms import get_stats as get_symptom_stats
+from app.metrics import render_metrics
+from app.llm_gateway import LLM
+from app.database import invalidate_schedule, get_schedule_version
+from app.startup import STARTUP, warm_up, readiness
 
 load_dotenv()
-app = FastAPI()
+STARTUP.set_boot(BOOT)
+STARTUP.mark("imported")
 
-VERIFY_TOKEN = os.getenv("VERIFY_TOKEN") or "vani_secret_123"
 
-# 🧠 MEMORY STORAGE
-# Structure: { "91999...": [ {"role": "user", "content": "..."}, ... ] }
-CHAT_HISTORY = {} 
+@asynccontextmanager
+async def lifespan(app):
+    # 👷 Spin up the background workers that run the slow STT -> LLM -> TTS chain
+    # (+ the notice lane that answers messages refused by the bounded queue)
+    start_workers(handle_message, shed_handler=handle_shed)
+    # 👂 Whisper workers load their models in background threads
+    TRANSCRIBER.start()
+    # 🧠 Write-behind flusher for conversation memory
+    MEMORY.start()
+    # 📜 Batched writer for the admin Live Logs (every finished message)
+    CONVERSATION_LOG.start()
+    # 🔥 Warm caches + wait for Whisper in the background - we serve (text) immediately
+    warming = asyncio.create_task(warm_up())
+    STARTUP.mark("serving")
+    yield
+    warming.cancel()
+    await stop_workers()
+    await TRANSCRIBER.stop()
+    await MEMORY.stop()
+    await CONVERSATION_LOG.stop()
+    await close_client()
+    await LLM.close()
+
+app = FastAPI(lifespan=lifespan)
+
+VERIFY_TOKEN = os.getenv("VERIFY_TOKEN") or "vani_secret_123"
+ADMIN_PHONE = os.getenv("ADMIN_PHONE")
 
 @app.get("/webhook")
 async def verify_webhook(mode: str = Query(alias="hub.mode"), token: str = Query(alias="hub.verify_token"), challenge: str = Query(alias="hub.challenge")):
     if mode == "subscribe" and token == VERIFY_TOKEN: return int(challenge)
     return {"error": "Invalid token"}, 403
 
+def _iter_messages(data, counts):
+    """ Every message in every entry/change of a payload (status callbacks are skipped) """
+    for entry in data.get("entry") or []:
+        for change in entry.get("changes") or []:
+            value = change.get("value") or {}
+            # Delivery/read receipts: nothing to answer
+            counts["statuses"] += len(value.get("statuses") or [])
+            for message in value.get("messages") or []:
+                yield message
+
 @app.post("/webhook")
 async def receive_message(request: Request):
-    data = await request.json()
+    """
+    Validate the payload, queue every new message and return 200 right away.
+    Meta redelivers if we are slow, so NO heavy work happens here and
+    redelivered message IDs are dropped by the seen-set.
+    """
     try:
-        entry = data["entry"][0]
-        changes = entry["changes"][0]
-        value = changes["value"]
-        
-        if "messages" in value:
-            message_data = value["messages"][0]
-            sender_id = message_data["from"]
-            
-            ADMIN_NUMBER = os.getenv("ADMIN_PHONE") # Add your number to .env!
-
-            # 👑 GOD MODE CHECK
-            if sender_id == ADMIN_NUMBER:
-                print(f"👑 ADMIN COMMAND from {sender_id}")
-                
-                # Extract text from either Text or Audio message
-                command_text = ""
-                if message_data["type"] == "text":
-                    command_text = message_data["text"]["body"]
-                elif message_data["type"] == "audio":
-                    audio_id = message_data["audio"]["id"]
-                    media_url = get_media_url(audio_id)
-                    ogg_path = f"data/{sender_id}_admin.ogg"
-                    download_media_file(media_url, ogg_path)
-                    command_text, _ = transcribe_audio(ogg_path) # Ignore lang for admin
-                
-                # Process Command
-                if command_text:
-                    print(f"🔧 Command: {command_text}")
-                    response_text = process_admin_command(command_text)
-                    # Send Text Reply back to Admin (Faster/Easier)
-                    send_whatsapp_message(sender_id, f"✅ {response_text}")
-                
-                return {"status": "processed_as_admin"}
-
-            if message_data["type"] == "text":
-                user_text = message_data["text"]["body"]
-                print(f"🗣️ User ({sender_id}) said: {user_text}")
-
-                # 1. GET HISTORY
-                # Fetch previous messages for this user (default to empty list)
-                user_history = CHAT_HISTORY.get(sender_id, [])
-
-                
-                # Default to English for text, or you can try to detect it if you want.
-                # For now, "en" is safe because most text inputs on WhatsApp are English/Hinglish.
-                detected_lang = "en" 
-
-                # 2. CALL BRAIN (Pass language!)
-                ai_response = chat_with_llama(user_text, detected_lang, user_history)
-                
-                print(f"🤖 Vani says: {ai_response}")
-
-                # 3. UPDATE HISTORY (Save this turn)
-                # Append User Message
-                user_history.append({"role": "user", "content": user_text})
-                # Append AI Reply
-                user_history.append({"role": "assistant", "content": ai_response})
-                
-                # Keep only last 10 messages to save RAM
-                CHAT_HISTORY[sender_id] = user_history[-10:]
-
-                # 4. SEND REPLY
-                send_whatsapp_message(sender_id, ai_response)
-                
-            elif message_data["type"] == "audio":
-                audio_id = message_data["audio"]["id"]
-                
-                # 1. Download
-                media_url = get_media_url(audio_id)
-                ogg_path = f"data/{sender_id}_input.ogg"
-                download_media_file(media_url, ogg_path)
-                
-                # 2. Transcribe (Ears) - NOW RETURNS LANGUAGE
-                print("👂 Transcribing...")
-                user_text, detected_lang = transcribe_audio(ogg_path) # <--- Get Lang
-                print(f"🗣️ Transcribed ({detected_lang}): {user_text}")
-                
-                # 3. Brain (LLM) - PASS LANGUAGE
-                user_history = CHAT_HISTORY.get(sender_id, [])
-                ai_response = chat_with_llama(user_text, detected_lang, user_history) # <--- Pass Lang
-                print(f"🤖 AI Reply: {ai_response}")
-                
-                # Update Memory
-                user_history.append({"role": "user", "content": user_text})
-                user_history.append({"role": "assistant", "content": ai_response})
-                CHAT_HISTORY[sender_id] = user_history[-10:]
-                
-                # 4. Speak (Mouth) - PASS LANGUAGE
-                print(f"👄 Generating Voice Note ({detected_lang})...")
-                output_ogg = f"data/{sender_id}_reply.ogg"
-                
-                # Edge-TTS will now pick the matching Kannada/Malayalam voice
-                await generate_voice_note(ai_response, detected_lang, output_ogg) 
-                
-                # 5. Delivery
-                media_id = upload_media(output_ogg)
-                send_whatsapp_audio(sender_id, media_id)
-                
-                # Cleanup
-                if os.path.exists(ogg_path): os.remove(ogg_path)
-                if os.path.exists(output_ogg): os.remove(output_ogg)
-
+        data = await request.json()
+        counts = {"queued": 0, "duplicates": 0, "ignored": 0, "statuses": 0, "shed": 0}
+        messages = list(_iter_messages(data, counts))
     except Exception as e:
-        print(f"❌ ERROR: {e}")
-        pass
+        print(f"⚠️ Ignoring malformed webhook: {e}")
+        return {"status": "ignored"}
+
+    for message_data in messages:
+        if "from" not in message_data or message_data.get("type") not in ("text", "audio"):
+            counts["ignored"] += 1
+            continue
+        message_id = message_data.get("id")
+        if message_id and not await SEEN_MESSAGES.check_and_add_async(message_id):
+            counts["duplicates"] += 1
+            continue
+
+        sender = message_data["from"]
+        # One mailbox per sender: their messages stay in order, other senders run in parallel
+        depth = enqueue(message_data, key=sender, priority=sender == ADMIN_PHONE)
+        if depth is None:
+            # Queue full: still a 200 for Meta (a retry would only add load); the sender gets the busy text
+            counts["shed"] += 1
+            print(f"🚧 Shed {message_data['type']} from {sender} (queue full)")
+            continue
+        counts["queued"] += 1
+        print(f"📥 Queued {message_data['type']} from {sender} (mailbox depth: {depth})")
+
+    status = "queued" if counts["queued"] else "shed" if counts["shed"] else "ignored"
+    return {"status": status, **counts}
+
+@app.post("/internal/schedule-changed")
+async def schedule_changed(x_verify_token: str = Header(default="")):
+    """ The admin console saved the schedule: drop our snapshot now instead of on the next data_version check """
+    if x_verify_token != VERIFY_TOKEN:
+        return JSONResponse({"error": "Invalid token"}, status_code=403)
+    invalidate_schedule()
+    return {"status": "ok", "version": list(get_schedule_version())}
+
+@app.get("/healthz")
+async def healthz():
+    """ Liveness: the event loop answers. Never depends on models or the DB. """
+    return {"status": "ok", "uptime_s": STARTUP.uptime()}
+
+@app.get("/readyz")
+async def readyz():
+    """ Readiness: Whisper models loaded and the schedule DB reachable (503 until then) """
+    ready, details = await readiness()
+    return JSONResponse(details, status_code=200 if ready else 503)
+
+@app.get("/stats")
+async def pipeline_stats():
+    """ Mailbox depths + job latency for the scheduler, load shedding, Whisper workers, TTS, voice cache, router, symptom index, LLM, memory, the conversation log and the webhook seen-set """
+    return {
+        **get_stats(),
+        "admission": get_admission_stats(),
+        "stt": TRANSCRIBER.get_stats(),
+        "tts": get_tts_stats(),
+        "voice_cache": VOICE_CACHE.get_stats(),
+        "router": get_router_stats(),
+        "symptoms": get_symptom_stats(),
+        "llm": get_llm_stats(),
+        "llm_gateway": LLM.get_stats(),
+        "memory": MEMORY.get_stats(),
+        "seen_messages": SEEN_MESSAGES.get_stats(),
+        "conversation_log": CONVERSATION_LOG.get_stats(),
+        "startup": STARTUP.get_stats(),
+    }
 
-    return {"status": "received"}
\ No newline at end of file
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """ Prometheus scrape target: per-stage latency histograms, message/tool/cache/error counters """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
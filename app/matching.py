@@ -0,0 +1,166 @@
+# app/matching.py
+# Precomputed fuzzy-match index for doctors, departments and days.
+# Built ONCE per schedule version, then every lookup is a single RapidFuzz pass.
+import re
+import numpy as np
+from rapidfuzz import fuzz, process
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday", "Daily"]
+
+# Words that carry no identity ("Dr. Sharma ji" == "Sharma")
+HONORIFICS = {"dr", "doctor", "ji", "sir", "madam", "maam", "mam", "sahab", "saab", "saheb", "mr", "mrs", "ms"}
+
+# 🗣️ ALIAS TABLE - spoken / transcribed variants -> the word we store
+# (Whisper often mishears names; the phonetic key below catches most of the rest)
+ALIASES = {
+    "swarma": "sharma",
+    "sarma": "sharma",
+    "anjili": "anjali",
+    "anjly": "anjali",
+    "gp": "general",
+    "physician": "general",
+    "mon": "monday", "tue": "tuesday", "tues": "tuesday", "wed": "wednesday",
+    "thu": "thursday", "thur": "thursday", "thurs": "thursday", "fri": "friday",
+    "sat": "saturday", "sun": "sunday", "everyday": "daily",
+}
+
+# Scores when only the phonetic key agrees (e.g. "Swarma" vs "Sharma"). Strictly below
+# database.NAMED_SCORE / router.LOOKUP_THRESHOLD (90): a phonetic guess alone never counts
+# as the patient NAMING a doctor - it can still win a lookup, but the LLM gets to confirm.
+PHONETIC_SCORE = 85.0
+# Keys shorter than this collide with ordinary words ("khan", "knee", "kaun" -> "kn")
+MIN_PHONETIC_KEY = 3
+# ...and the heard word must still look like the name, not just share its consonants
+PHONETIC_MIN_RATIO = 60
+
+ENTITY_KINDS = ("doctor", "department", "day")
+
+
+def normalize(text):
+    """ Lowercase, strip punctuation + honorifics, apply aliases and '-ologist' -> '-ology' """
+    tokens = re.findall(r"\w+", str(text).lower())
+    words = []
+    for token in tokens:
+        if token in HONORIFICS:
+            continue
+        token = ALIASES.get(token, token)
+        if token.endswith("ologist"):
+            token = token[:-3] + "y"   # cardiologist -> cardiology
+        words.append(token)
+    return " ".join(words)
+
+
+def phonetic_key(word):
+    """
+    Tiny Indic-friendly phonetic key: first letter + consonant skeleton.
+    "sharma", "sarma", "swarma" -> "srm"   |   "anjali", "anjili" -> "anjl"
+    """
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if not word:
+        return ""
+    for src, dst in (("ph", "f"), ("z", "j"), ("q", "k"), ("c", "k"), ("v", "b")):
+        word = word.replace(src, dst)
+    skeleton = [ch for ch in word[1:] if ch not in "aeiouhwy"]
+    key = word[0]
+    for ch in skeleton:
+        if ch != key[-1]:
+            key += ch
+    return key
+
+
+class Match:
+    __slots__ = ("kind", "value", "score")
+
+    def __init__(self, kind, value, score):
+        self.kind = kind        # "doctor" | "department" | "day"
+        self.value = value      # Canonical value as stored in the DB ("Dr. Sharma")
+        self.score = score      # 0-100
+
+    def __repr__(self):
+        return f"Match({self.kind!r}, {self.value!r}, {self.score:.0f})"
+
+
+class MatchIndex:
+    """ All choices preprocessed once; scoring is a single cdist over every entity type """
+
+    def __init__(self, version, doctor_names, departments):
+        self.version = version
+        self.kinds = []
+        self.values = []
+        self.choices = []           # Preprocessed strings fed to RapidFuzz
+        self.phonetic = {}          # phonetic key -> [(choice index, name word), ...]
+
+        for kind, values in (("doctor", doctor_names), ("department", departments), ("day", DAYS)):
+            for value in values:
+                self.kinds.append(kind)
+                self.values.append(value)
+                self.choices.append(normalize(value))
+
+        for i, choice in enumerate(self.choices):
+            if self.kinds[i] == "doctor":
+                for word in choice.split():
+                    key = phonetic_key(word)
+                    if len(word) >= 4 and len(key) >= MIN_PHONETIC_KEY:
+                        self.phonetic.setdefault(key, []).append((i, word))
+
+        self.kinds = np.array(self.kinds)
+        self._masks = {kind: self.kinds == kind for kind in ENTITY_KINDS}
+
+    def score_matrix(self, queries):
+        """ (len(queries) x len(choices)) score matrix - ONE RapidFuzz pass for everything """
+        processed = [normalize(q) for q in queries]
+        scores = process.cdist(processed, self.choices, scorer=fuzz.WRatio, dtype=np.float32, workers=-1 if len(processed) > 8 else 1)
+
+        # Phonetic boost: "Swarma" scores like "Sharma"
+        for row, query in enumerate(processed):
+            for word in query.split():
+                if len(word) < 4:
+                    continue
+                for col, name in self.phonetic.get(phonetic_key(word), ()):
+                    if fuzz.ratio(word, name) >= PHONETIC_MIN_RATIO:
+                        scores[row, col] = max(scores[row, col], PHONETIC_SCORE)
+        return scores
+
+    def _best(self, row_scores, kind):
+        mask = self._masks[kind]
+        if not mask.any():
+            return None
+        masked = np.where(mask, row_scores, -1.0)
+        col = int(masked.argmax())
+        return Match(kind, self.values[col], float(masked[col]))
+
+    def best_per_kind(self, query):
+        """ {"doctor": Match, "department": Match, "day": Match} for one query """
+        row = self.score_matrix([query])[0]
+        return {kind: self._best(row, kind) for kind in ENTITY_KINDS}
+
+    def resolve(self, query, kind, threshold=0):
+        """ Best match of one kind, or None if below threshold """
+        match = self._best(self.score_matrix([query])[0], kind)
+        if match is None or match.score < threshold:
+            return None
+        return match
+
+    def resolve_many(self, queries, kind, threshold=0):
+        """ Batch version of resolve() - e.g. admin bulk updates with many names """
+        if not queries:
+            return []
+        scores = self.score_matrix(queries)
+        results = []
+        for row in scores:
+            match = self._best(row, kind)
+            results.append(match if match is not None and match.score >= threshold else None)
+        return results
+
+
+_index = None
+
+
+def get_match_index(snapshot):
+    """ Return the index for this schedule snapshot (rebuilt only when the version changes) """
+    global _index
+    index = _index
+    if index is None or index.version != snapshot.version:
+        index = MatchIndex(snapshot.version, snapshot.doctor_names, snapshot.departments)
+        _index = index
+    return index
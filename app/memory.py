@@ -0,0 +1,201 @@
+# app/memory.py
+# 🧠 Conversation memory: LRU + TTL cache in RAM, write-behind to SQLite (WAL).
+# Any worker process can rebuild a sender's history with ONE indexed read.
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from app.metrics import CACHE_LOOKUPS
+
+# Own DB file: chat writes must not bump the schedule DB's PRAGMA data_version
+MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH", "data/memory.db")
+MAX_MESSAGES = 10                                               # Last 10 messages (5 turns) go to the LLM
+MEMORY_TTL = float(os.getenv("MEMORY_TTL_MINUTES", "30")) * 60  # Idle senders drop out of RAM
+MEMORY_MAX_BYTES = int(os.getenv("MEMORY_MAX_KB", "8192")) * 1024
+MEMORY_FLUSH_INTERVAL = float(os.getenv("MEMORY_FLUSH_MS", "500")) / 1000
+# How long rows are kept on disk
+MEMORY_RETENTION = float(os.getenv("MEMORY_RETENTION_DAYS", "7")) * 86400
+# With several uvicorn workers another process may have answered this sender, and
+# nothing tells us how many workers there are (--workers sets no env var). So every
+# read goes to SQLite (one indexed query) unless single-worker mode is switched on.
+SINGLE_WORKER = os.getenv("MEMORY_SINGLE_WORKER", "0") == "1"
+
+ENTRY_OVERHEAD = 64   # Rough per-message bookkeeping cost in bytes
+
+
+def _size(messages):
+    return sum(len(m["content"].encode("utf-8")) + ENTRY_OVERHEAD for m in messages)
+
+
+class ConversationStore:
+
+    def __init__(self, db_path=MEMORY_DB_PATH, ttl=MEMORY_TTL, max_bytes=MEMORY_MAX_BYTES, flush_interval=MEMORY_FLUSH_INTERVAL, trust_cache=SINGLE_WORKER):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.trust_cache = trust_cache
+        self.cache = OrderedDict()      # sender_id -> (messages, size, last_access)
+        self.total_bytes = 0
+        self.pending = []               # Rows waiting for the write-behind flush
+        self.flushing = []              # Rows being written right now (lock NOT held meanwhile)
+        self.stats = {"cache_hits": 0, "db_reads": 0, "evictions": 0, "rows_written": 0, "flushes": 0}
+        self._conn = None               # Reads (under _lock)
+        self._write_conn = None         # flush() only - a slow commit never holds _lock
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+
+    # --- SQLITE ---
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_turns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_turns_sender ON conversation_turns (sender_id, id)")
+        conn.commit()
+        return conn
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def _load(self, sender_id):
+        """ ONE indexed read: the sender's last MAX_MESSAGES rows """
+        rows = self._db().execute(
+            "SELECT role, content, created_at FROM conversation_turns WHERE sender_id = ? ORDER BY id DESC LIMIT ?",
+            (sender_id, MAX_MESSAGES),
+        ).fetchall()
+        on_disk = set(rows)
+        messages = [{"role": role, "content": content} for role, content, _ in reversed(rows)]
+        # Include our own turns that are not flushed yet (or being flushed - skip them once committed)
+        for row in self.flushing + self.pending:
+            if row[0] == sender_id and row[1:] not in on_disk:
+                messages.append({"role": row[1], "content": row[2]})
+        return messages[-MAX_MESSAGES:]
+
+    # --- RAM CACHE ---
+    def _put(self, sender_id, messages, now):
+        old = self.cache.pop(sender_id, None)
+        if old:
+            self.total_bytes -= old[1]
+        size = _size(messages)
+        self.cache[sender_id] = (messages, size, now)
+        self.total_bytes += size
+        self._evict(now)
+
+    def _evict(self, now):
+        # Oldest-access first: expired entries, then whatever exceeds the byte cap
+        while self.cache:
+            sender_id, (messages, size, last_access) = next(iter(self.cache.items()))
+            if now - last_access < self.ttl and self.total_bytes <= self.max_bytes:
+                break
+            del self.cache[sender_id]
+            self.total_bytes -= size
+            self.stats["evictions"] += 1
+
+    # --- PUBLIC API ---
+    def get_history(self, sender_id):
+        """ Last MAX_MESSAGES messages for this sender (a copy, safe to modify) """
+        now = time.monotonic()
+        with self._lock:
+            entry = self.cache.get(sender_id)
+            if entry and self.trust_cache and now - entry[2] < self.ttl:
+                self.cache.move_to_end(sender_id)
+                self.cache[sender_id] = (entry[0], entry[1], now)
+                self.stats["cache_hits"] += 1
+                CACHE_LOOKUPS.inc(cache="memory", result="hit")
+                return list(entry[0])
+
+            messages = self._load(sender_id)
+            self.stats["db_reads"] += 1
+            CACHE_LOOKUPS.inc(cache="memory", result="miss")
+            self._put(sender_id, messages, now)
+            return list(messages)
+
+    def append_turn(self, sender_id, user_text, reply):
+        """ Save one user/assistant exchange (RAM now, SQLite on the next flush) """
+        now = time.monotonic()
+        created_at = time.time()
+        with self._lock:
+            entry = self.cache.get(sender_id)
+            messages = list(entry[0]) if entry else self._load(sender_id)
+            messages.append({"role": "user", "content": user_text})
+            messages.append({"role": "assistant", "content": reply})
+            self._put(sender_id, messages[-MAX_MESSAGES:], now)
+            self.pending.append((sender_id, "user", user_text, created_at))
+            self.pending.append((sender_id, "assistant", reply, created_at))
+
+    def flush(self):
+        """
+        Write pending rows in one transaction (runs in a thread). The rows are swapped
+        out under the lock and written after releasing it: a commit waiting on
+        busy_timeout must not block get_history() / append_turn() on the event loop.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self.pending = self.pending, []
+                self.flushing = rows
+            if not rows:
+                return 0
+            try:
+                if self._write_conn is None:
+                    self._write_conn = self._connect()
+                conn = self._write_conn
+                with conn:
+                    conn.executemany("INSERT INTO conversation_turns (sender_id, role, content, created_at) VALUES (?, ?, ?, ?)", rows)
+                    if self.stats["flushes"] % 100 == 0:
+                        conn.execute("DELETE FROM conversation_turns WHERE created_at < ?", (time.time() - MEMORY_RETENTION,))
+            except sqlite3.Error as e:
+                # Keep the rows for the next attempt
+                with self._lock:
+                    self.pending = rows + self.pending
+                    self.flushing = []
+                print(f"❌ Memory flush error: {e}")
+                return 0
+            with self._lock:
+                self.flushing = []
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(rows)
+            return len(rows)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.pending:
+                await asyncio.to_thread(self.flush)
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await asyncio.to_thread(self.flush)
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            "senders_cached": len(self.cache),
+            "cache_bytes": self.total_bytes,
+            "pending_rows": len(self.pending) + len(self.flushing),
+        }
+
+
+MEMORY = ConversationStore()
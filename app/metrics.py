@@ -0,0 +1,263 @@
+# app/metrics.py
+# 📈 Observability: per-stage spans, Prometheus-style metrics (GET /metrics) and an
+# optional sampling profiler that dumps where a SLOW message spent its time.
+#
+#   with trace("audio", sender_id):      # one per WhatsApp message
+#       with span("stt"): ...            # one per pipeline stage
+#
+# Spans feed the `vani_stage_seconds` histogram; a span that raises bumps
+# `vani_stage_errors_total`. At the end of a trace one JSON line is printed and
+# every function in TRACE_LISTENERS gets the finished Trace (e.g. the conversation log).
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import Counter as _Tally
+from contextlib import contextmanager
+
+# Latency buckets in seconds (SQLite reads ... slow Whisper/LLM calls)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Sampling profiler: off unless PROFILE_SLOW_MS is set
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000
+PROFILE_TOP = 8         # Stacks printed per slow message
+PROFILE_DEPTH = 12      # Frames kept per stack
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY = []
+TRACE_LISTENERS = []    # fn(trace) called when a message finishes - must be quick, never raise
+
+
+def _labels_text(labelnames, values, extra=()):
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels_text(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, help_text, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}        # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            entry = self.values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, entry in sorted(self.values.items()):
+                for bound, count in zip(self.buckets + ("+Inf",), entry[:len(self.buckets)] + [entry[-1]]):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, [le])} {count}")
+                lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {round(entry[-2], 6)}")
+                lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {entry[-1]}")
+        return lines
+
+
+# --- THE METRICS ---
+MESSAGES = Counter("vani_messages_total", "WhatsApp messages processed", ("type",))
+MESSAGE_SECONDS = Histogram("vani_message_seconds", "End-to-end processing time per message", ("type",))
+STAGE_SECONDS = Histogram("vani_stage_seconds", "Time spent in each pipeline stage", ("stage",))
+STAGE_ERRORS = Counter("vani_stage_errors_total", "Failures per pipeline stage", ("stage",))
+TOOL_CALLS = Counter("vani_tool_calls_total", "Tool calls made by the LLM", ("tool",))
+CACHE_LOOKUPS = Counter("vani_cache_lookups_total", "Cache lookups (router fast-path, voice cache, memory)", ("cache", "result"))
+
+
+def render_metrics():
+    """ Prometheus text exposition format """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- TRACES & SPANS ---
+class Trace:
+
+    def __init__(self, kind, sender_id):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.sender_id = sender_id
+        self.started = time.perf_counter()
+        self.spans = []         # (stage, seconds, ok)
+        self.fields = {}        # What the message was about (language, transcript, reply...) - see annotate()
+        self.total = None       # Seconds, set when the trace ends
+        self.error = None       # Exception name if the message failed
+        self.samples = _Tally() if PROFILER.enabled else None
+
+
+_current = contextvars.ContextVar("vani_trace", default=None)
+
+
+@contextmanager
+def trace(kind, sender_id=""):
+    """ Wrap one message. asyncio.to_thread copies the context, so spans in threads land here too. """
+    current = Trace(kind, sender_id)
+    token = _current.set(current)
+    PROFILER.register(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        PROFILER.unregister(current)
+        total = current.total = time.perf_counter() - current.started
+        MESSAGES.inc(type=kind)
+        MESSAGE_SECONDS.observe(total, type=kind)
+        print(json.dumps({
+            "trace": current.id,
+            "type": kind,
+            "sender": str(sender_id)[-4:],
+            "total_ms": round(total * 1000, 1),
+            "spans": [{"stage": stage, "ms": round(seconds * 1000, 1), "ok": ok} for stage, seconds, ok in current.spans],
+            "error": current.error,
+        }, ensure_ascii=False))
+        if current.samples is not None and total * 1000 >= PROFILE_SLOW_MS:
+            PROFILER.report(current, total)
+        for listener in TRACE_LISTENERS:
+            listener(current)
+
+
+@contextmanager
+def span(stage):
+    """ Time one pipeline stage (works around sync code and `await`s alike) """
+    started = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        current = _current.get()
+        if current is not None:
+            current.spans.append((stage, seconds, ok))
+
+
+def annotate(**fields):
+    """ Attach facts about the current message (language, transcript, tool call, reply...) """
+    current = _current.get()
+    if current is not None:
+        current.fields.update(fields)
+
+
+def record_error(stage):
+    """ For stages that report failure with a return value instead of an exception """
+    STAGE_ERRORS.inc(stage=stage)
+    current = _current.get()
+    if current is not None:
+        current.spans.append((f"{stage}_failed", 0.0, False))
+
+
+# --- SAMPLING PROFILER ---
+class SlowRequestProfiler:
+    """
+    Every PROFILE_INTERVAL, snapshot the stacks of all threads running app code and
+    tally them into every message in flight. When a message ends slower than
+    PROFILE_SLOW_MS its hottest stacks are printed. With several messages in flight
+    the samples are shared between them - good enough to spot the slow stage.
+    """
+
+    def __init__(self, slow_ms=PROFILE_SLOW_MS, interval=PROFILE_INTERVAL):
+        self.enabled = slow_ms > 0
+        self.interval = interval
+        self.active = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, current):
+        if current.samples is None:
+            return
+        with self._lock:
+            self.active.add(current)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="vani-profiler", daemon=True)
+                self._thread.start()
+
+    def unregister(self, current):
+        with self._lock:
+            self.active.discard(current)
+
+    def _stacks(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            frames = []
+            in_app = False
+            while frame is not None and len(frames) < PROFILE_DEPTH:
+                code = frame.f_code
+                if code.co_filename.startswith(APP_DIR):
+                    in_app = True
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                elif not frames:
+                    # Keep the leaf library frame: shows WHAT the app code is waiting on
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            # Idle threads (event loop in select(), empty executors) have no app frames
+            if in_app:
+                yield ";".join(reversed(frames))
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self.active)
+            if not active:
+                continue
+            stacks = list(self._stacks())
+            for current in active:
+                current.samples.update(stacks)
+
+    def report(self, current, total):
+        samples = sum(current.samples.values())
+        print(f"🐢 Slow message {current.id} ({current.kind}): {round(total * 1000)} ms, {samples} samples")
+        for stack, count in current.samples.most_common(PROFILE_TOP):
+            print(f"   {count:5d}  {stack}")
+
+
+PROFILER = SlowRequestProfiler()
@@ -0,0 +1,335 @@
+# app/pipeline.py
+# The full message pipeline (Download -> Ears -> Brain -> Mouth -> Delivery).
+# Runs on the background workers from app/jobs.py, never inside the webhook request.
+# Under overload it steps down the ladder in app/admission.py: voice -> text -> busy template.
+import os
+import time
+from app.audio import generate_voice_note, generate_voice_note_streaming, split_sentences, pick_voice, clean_tts_text
+from app.voice_cache import VOICE_CACHE, cache_key
+from app.transcriber import transcribe, TRANSCRIBER, LANGUAGE_HINTS
+from app.whatsapp_client import get_media_url, download_media, upload_media, send_whatsapp_audio, send_whatsapp_message
+from app.ai_engine import chat_with_llama, stream_chat_with_llama
+from app.admin_ai import process_admin_command
+from app.router import route, detect_text_language, record_llm_latency
+from app.memory import MEMORY
+from app.database import clinic_hours
+from app.admission import STAGES, reply_level, record_degraded
+from app import replies
+from app.metrics import trace, span, annotate, record_error, CACHE_LOOKUPS
+
+# Voice replies from the LLM: synthesize sentence by sentence while it is still generating
+STREAM_VOICE_REPLIES = os.getenv("STREAM_VOICE_REPLIES", "1") == "1"
+
+
+def route_locally(user_text, language_code):
+    """ Fast-path router: the reply text, or None when the LLM is needed """
+    with span("router"):
+        intent, reply = route(user_text, language_code)
+    CACHE_LOOKUPS.inc(cache="router", result="hit" if reply else "miss")
+    if reply:
+        print(f"🚦 Router answered ({intent}) - skipped LLM")
+    return reply
+
+
+async def think(user_text, language_code, history):
+    """ Brain: try the local fast-path router first, fall back to the LLM """
+    reply = route_locally(user_text, language_code)
+    if reply:
+        return reply
+    return await ask_llm(user_text, language_code, history)
+
+
+async def ask_llm(user_text, language_code, history):
+    """ The LLM turn alone - for callers that already tried the router """
+    started = time.perf_counter()
+    with span("llm"):
+        async with STAGES["llm"]:
+            reply = await chat_with_llama(user_text, language_code, history)
+    record_llm_latency(time.perf_counter() - started)
+    return reply
+
+
+async def handle_message(message_data):
+    """ Process ONE WhatsApp message (text or audio) end to end, as one trace """
+    with trace(message_data["type"], message_data["from"]):
+        await _handle_message(message_data)
+
+
+async def _handle_message(message_data):
+    sender_id = message_data["from"]
+
+    ADMIN_NUMBER = os.getenv("ADMIN_PHONE") # Add your number to .env!
+
+    # 👑 GOD MODE CHECK
+    if sender_id == ADMIN_NUMBER:
+        await handle_admin_message(message_data)
+        return
+
+    # Waited too long in the queue: the templated busy reply, nothing expensive
+    level, reason = reply_level()
+    if level == "busy":
+        record_degraded("busy", reason)
+        annotate(degraded="busy")
+        await send_busy_reply(message_data)
+        return
+
+    if message_data["type"] == "text":
+        user_text = message_data["text"]["body"]
+        print(f"🗣️ User ({sender_id}) said: {user_text}")
+
+        # 1. GET HISTORY
+        # Fetch previous messages for this user (RAM cache, else one SQLite read)
+        with span("memory"):
+            user_history = MEMORY.get_history(sender_id)
+
+        # Typed text has no Whisper language tag: detect Hindi/Kannada/Malayalam by script.
+        # Latin script defaults to "en" (most WhatsApp text is English/Hinglish).
+        detected_lang = detect_text_language(user_text)
+        annotate(language=detected_lang, transcript=user_text)
+        if detected_lang != "en":
+            # Indic script: warm-start their next voice note with it (Whisper still re-detects after)
+            LANGUAGE_HINTS.warm_start(sender_id, detected_lang)
+
+        # 2. CALL BRAIN (Pass language!)
+        ai_response = await think(user_text, detected_lang, user_history)
+
+        print(f"🤖 Vani says: {ai_response}")
+        annotate(reply=ai_response)
+
+        # 3. UPDATE HISTORY (Save this turn - keeps the last 10 messages)
+        MEMORY.append_turn(sender_id, user_text, ai_response)
+
+        # 4. SEND REPLY
+        with span("send"):
+            await send_whatsapp_message(sender_id, ai_response)
+
+    elif message_data["type"] == "audio":
+        audio_id = message_data["audio"]["id"]
+
+        if TRANSCRIBER.is_loading():
+            # Whisper is still loading (cold start): answer now instead of parking a worker
+            # behind the model load - text messages keep flowing meanwhile
+            reply = replies.stt_warming_up(LANGUAGE_HINTS.get(sender_id))
+            annotate(reply=reply)
+            with span("send"):
+                await send_whatsapp_message(sender_id, reply)
+            return
+
+        # 1. Download (into memory - no temp files)
+        with span("download"):
+            media_url = await get_media_url(audio_id)
+            audio_bytes = await download_media(media_url)
+        if audio_bytes is None:
+            # Nothing to transcribe: say so instead of answering a message they never made
+            record_error("download")
+            reply = replies.voice_note_failed(LANGUAGE_HINTS.get(sender_id))
+            annotate(reply=reply)
+            with span("send"):
+                await send_whatsapp_message(sender_id, reply)
+            return
+
+        # 2. Transcribe (Ears) - RETURNS LANGUAGE
+        print("👂 Transcribing...")
+        with span("stt"):
+            async with STAGES["stt"]:
+                user_text, detected_lang = await transcribe(audio_bytes, sender_id)
+        print(f"🗣️ Transcribed ({detected_lang}): {user_text}")
+        annotate(language=detected_lang, transcript=user_text)
+        if not user_text.strip():
+            # Silence / noise only (or STT failed): nothing to route - ask them to try again
+            # in the language we last heard from them (the "en" default is only a guess)
+            reply = replies.couldnt_hear(LANGUAGE_HINTS.get(sender_id))
+            annotate(reply=reply)
+            with span("send"):
+                await send_whatsapp_message(sender_id, reply)
+            return
+
+        # 3. Brain (LLM) - PASS LANGUAGE
+        with span("memory"):
+            user_history = MEMORY.get_history(sender_id)
+        ai_response = route_locally(user_text, detected_lang)
+
+        # Middle rung: a text reply skips TTS + upload (queued too long, or edge-tts is saturated)
+        if level == "voice" and STAGES["tts"].saturated():
+            level, reason = "text", "tts_saturated"
+        if level == "text":
+            record_degraded("text", reason)
+            annotate(degraded="text")
+
+        if ai_response is None and STREAM_VOICE_REPLIES and level == "voice":
+            # 3+4+5. LLM -> TTS -> Delivery, pipelined sentence by sentence
+            ai_response, voice_sent = await stream_voice_reply(sender_id, user_text, detected_lang, user_history)
+            print(f"🤖 AI Reply: {ai_response}")
+        else:
+            if ai_response is None:
+                ai_response = await ask_llm(user_text, detected_lang, user_history)
+            print(f"🤖 AI Reply: {ai_response}")
+
+            # 4. Speak (Mouth) + 5. Delivery - PASS LANGUAGE
+            # Edge-TTS picks the matching Kannada/Malayalam voice; repeated replies come from the voice cache
+            voice_sent = False
+            if level == "voice":
+                print(f"👄 Voice Note ({detected_lang})...")
+                voice_sent = await deliver_voice_reply(sender_id, ai_response, detected_lang)
+
+        # Update Memory
+        annotate(reply=ai_response)
+        MEMORY.append_turn(sender_id, user_text, ai_response)
+
+        if not voice_sent:
+            # Degraded, or TTS/upload failed - the answer still reaches the patient as text
+            with span("send"):
+                await send_whatsapp_message(sender_id, ai_response)
+
+
+async def send_busy_reply(message_data):
+    """ Bottom rung: templated text with the clinic hours, in the sender's language """
+    sender_id = message_data["from"]
+    if message_data["type"] == "text":
+        language = detect_text_language(message_data["text"]["body"])
+    else:
+        language = LANGUAGE_HINTS.get(sender_id)
+    reply = replies.busy(language, clinic_hours())
+    annotate(language=language, reply=reply)
+    with span("send"):
+        await send_whatsapp_message(sender_id, reply)
+
+
+async def handle_shed(message_data):
+    """ Refused by the bounded queue (the notice lane in app/jobs.py): busy reply only """
+    with trace(message_data["type"], message_data["from"]):
+        annotate(degraded="shed")
+        await send_busy_reply(message_data)
+
+
+async def deliver_voice_reply(sender_id, text, language_code):
+    """
+    Send `text` as a voice note, reusing earlier work whenever possible:
+      1. Same text + voice already uploaded -> resend the WhatsApp media ID
+      2. Same OGG on disk -> upload it (skip synthesis)
+      3. Otherwise synthesize, cache the OGG, upload, cache the media ID
+    Returns True if a voice note was sent.
+    """
+    key = cache_key(clean_tts_text(text), pick_voice(language_code))
+
+    media_id = VOICE_CACHE.get_media_id(key)
+    if media_id:
+        print("🗃️ Voice cache hit (media ID)")
+        CACHE_LOOKUPS.inc(cache="voice", result="media_id")
+        with span("send"):
+            sent = await send_whatsapp_audio(sender_id, media_id)
+        if sent:
+            return True
+        VOICE_CACHE.forget_media_id(key)
+
+    ogg_bytes = VOICE_CACHE.get_ogg(key)
+    if ogg_bytes:
+        print("🗃️ Voice cache hit (OGG on disk)")
+        CACHE_LOOKUPS.inc(cache="voice", result="disk")
+    else:
+        CACHE_LOOKUPS.inc(cache="voice", result="miss")
+        with span("tts"):
+            ogg_bytes = await generate_voice_note(text, language_code)
+        if not ogg_bytes:
+            record_error("tts")
+            return False
+        VOICE_CACHE.put_ogg(key, ogg_bytes)
+
+    return await upload_and_send(sender_id, key, ogg_bytes)
+
+
+async def upload_and_send(sender_id, key, ogg_bytes):
+    """ Upload straight from the in-memory buffer, remember the media ID, send it """
+    with span("upload"):
+        media_id = await upload_media(ogg_bytes)
+    if not media_id:
+        record_error("upload")
+        return False
+    VOICE_CACHE.put_media_id(key, media_id)
+    with span("send"):
+        return await send_whatsapp_audio(sender_id, media_id)
+
+
+async def stream_voice_reply(sender_id, user_text, language_code, history):
+    """
+    LLM and TTS pipelined: each sentence is synthesized as soon as the LLM finishes it,
+    so most of the TTS time hides behind generation. The finished note is cached like any other.
+    Returns (reply_text, voice_sent).
+    """
+    pieces = []
+    errors = []
+
+    async def tokens():
+        try:
+            # The LLM slot covers the token stream only - synthesis and encoding
+            # take "tts" slots per sentence and go on after this slot is released
+            async with STAGES["llm"]:
+                async for piece in stream_chat_with_llama(user_text, language_code, history):
+                    pieces.append(piece)
+                    yield piece
+        except Exception as e:
+            errors.append(e)
+
+    started = time.perf_counter()
+    with span("llm_tts_stream"):
+        ogg_bytes = await generate_voice_note_streaming(split_sentences(tokens()), language_code)
+    if errors:
+        # Same as the non-streamed path: an LLM failure fails the job
+        raise errors[0]
+    record_llm_latency(time.perf_counter() - started)
+
+    reply = "".join(pieces).strip()
+    if not ogg_bytes:
+        record_error("tts")
+        return reply, False
+    key = cache_key(clean_tts_text(reply), pick_voice(language_code))
+    VOICE_CACHE.put_ogg(key, ogg_bytes)
+    return reply, await upload_and_send(sender_id, key, ogg_bytes)
+
+
+async def send_admin_error(sender_id, error_text):
+    """ Admin replies are plain text: ✅ for a processed command, ❌ when we couldn't get one """
+    annotate(reply=error_text)
+    with span("send"):
+        await send_whatsapp_message(sender_id, f"❌ {error_text}")
+
+
+async def handle_admin_message(message_data):
+    sender_id = message_data["from"]
+    print(f"👑 ADMIN COMMAND from {sender_id}")
+    annotate(kind="admin")
+
+    # Extract text from either Text or Audio message
+    command_text = ""
+    if message_data["type"] == "text":
+        command_text = message_data["text"]["body"]
+    elif message_data["type"] == "audio":
+        audio_id = message_data["audio"]["id"]
+        if TRANSCRIBER.is_loading():
+            # Same cold-start guard as the patient path - never park a worker behind the model load
+            await send_admin_error(sender_id, "Voice recognition is still starting up. Please type the command or resend the voice note in a minute.")
+            return
+        with span("download"):
+            media_url = await get_media_url(audio_id)
+            audio_bytes = await download_media(media_url)
+        if audio_bytes is None:
+            record_error("download")
+            await send_admin_error(sender_id, "Couldn't download the voice note. Please resend it or type the command.")
+            return
+        with span("stt"):
+            async with STAGES["stt"]:
+                command_text, _ = await transcribe(audio_bytes) # Ignore lang for admin
+        if not command_text:
+            await send_admin_error(sender_id, "Couldn't hear a command in that voice note. Please resend it or type the command.")
+            return
+
+    # Process Command
+    if command_text:
+        print(f"🔧 Command: {command_text}")
+        annotate(transcript=command_text)
+        with span("admin_command"):
+            response_text = await process_admin_command(command_text)
+        annotate(reply=response_text)
+        # Send Text Reply back to Admin (Faster/Easier)
+        with span("send"):
+            await send_whatsapp_message(sender_id, f"✅ {response_text}")
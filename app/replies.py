@@ -0,0 +1,267 @@
+# app/replies.py
+# 💬 Ready-made replies in every language Vani speaks (en / hi / kn / ml).
+# Used when we can answer WITHOUT the LLM (router fast-path, tool results).
+
+GREETING = {
+    "en": "Hello! I'm Vani from City Health Clinic. Which doctor or department would you like to know about?",
+    "hi": "नमस्ते! मैं सिटी हेल्थ क्लिनिक से वाणी हूँ। आप किस डॉक्टर या विभाग के बारे में जानना चाहते हैं?",
+    "kn": "ನಮಸ್ಕಾರ! ನಾನು ಸಿಟಿ ಹೆಲ್ತ್ ಕ್ಲಿನಿಕ್‌ನಿಂದ ವಾಣಿ. ನಿಮಗೆ ಯಾವ ವೈದ್ಯರು ಅಥವಾ ವಿಭಾಗದ ಬಗ್ಗೆ ತಿಳಿಯಬೇಕು?",
+    "ml": "നമസ്കാരം! ഞാൻ സിറ്റി ഹെൽത്ത് ക്ലിനിക്കിലെ വാണിയാണ്. ഏത് ഡോക്ടറെക്കുറിച്ചോ വിഭാഗത്തെക്കുറിച്ചോ ആണ് അറിയേണ്ടത്?",
+}
+
+CLOSING = {
+    "en": "You're welcome! Take care, and message us anytime.",
+    "hi": "आपका स्वागत है! अपना ध्यान रखिए, कभी भी मैसेज कीजिए।",
+    "kn": "ಸ್ವಾಗತ! ಆರೋಗ್ಯ ನೋಡಿಕೊಳ್ಳಿ, ಯಾವಾಗ ಬೇಕಾದರೂ ಸಂದೇಶ ಕಳುಹಿಸಿ.",
+    "ml": "സന്തോഷം! ശ്രദ്ധിക്കുക, എപ്പോൾ വേണമെങ്കിലും സന്ദേശം അയയ്ക്കാം.",
+}
+
+DAY_NAMES = {
+    "en": {"Monday": "Monday", "Tuesday": "Tuesday", "Wednesday": "Wednesday", "Thursday": "Thursday",
+           "Friday": "Friday", "Saturday": "Saturday", "Sunday": "Sunday", "Daily": "every day",
+           "today": "today", "tomorrow": "tomorrow"},
+    "hi": {"Monday": "सोमवार", "Tuesday": "मंगलवार", "Wednesday": "बुधवार", "Thursday": "गुरुवार",
+           "Friday": "शुक्रवार", "Saturday": "शनिवार", "Sunday": "रविवार", "Daily": "रोज़",
+           "today": "आज", "tomorrow": "कल"},
+    "kn": {"Monday": "ಸೋಮವಾರ", "Tuesday": "ಮಂಗಳವಾರ", "Wednesday": "ಬುಧವಾರ", "Thursday": "ಗುರುವಾರ",
+           "Friday": "ಶುಕ್ರವಾರ", "Saturday": "ಶನಿವಾರ", "Sunday": "ಭಾನುವಾರ", "Daily": "ಪ್ರತಿದಿನ",
+           "today": "ಇಂದು", "tomorrow": "ನಾಳೆ"},
+    "ml": {"Monday": "തിങ്കളാഴ്ച", "Tuesday": "ചൊവ്വാഴ്ച", "Wednesday": "ബുധനാഴ്ച", "Thursday": "വ്യാഴാഴ്ച",
+           "Friday": "വെള്ളിയാഴ്ച", "Saturday": "ശനിയാഴ്ച", "Sunday": "ഞായറാഴ്ച", "Daily": "എല്ലാ ദിവസവും",
+           "today": "ഇന്ന്", "tomorrow": "നാളെ"},
+}
+
+AND_WORD = {"en": " and ", "hi": " और ", "kn": " ಮತ್ತು ", "ml": ", "}
+
+# Placeholders: {doctor}, {department}, {slots}, {days}, {status}, {time}, {until}, {day}
+DOCTOR_AVAILABLE = {
+    "en": "{doctor} ({department}) is available {slots}.",
+    "hi": "{doctor} ({department}) {slots} उपलब्ध हैं।",
+    "kn": "{doctor} ({department}) {slots} ಲಭ್ಯವಿರುತ್ತಾರೆ.",
+    "ml": "{doctor} ({department}) {slots} ലഭ്യമാണ്.",
+}
+
+DOCTOR_UNAVAILABLE = {
+    "en": "{doctor} is currently {status} on {days}.",
+    "hi": "{doctor} {days} को अभी {status} पर हैं।",
+    "kn": "{doctor} {days} ರಂದು ಸದ್ಯ {status} ಆಗಿದ್ದಾರೆ.",
+    "ml": "{doctor} {days} ഇപ്പോൾ {status} ആണ്.",
+}
+
+# "In now?" / "today?" - from database.availability_facts(), never from the weekday alone
+DOCTOR_IN_NOW = {
+    "en": "Yes, {doctor} is in right now, until {until}.",
+    "hi": "हाँ, {doctor} अभी {until} तक उपलब्ध हैं।",
+    "kn": "ಹೌದು, {doctor} ಈಗ {until} ರವರೆಗೆ ಲಭ್ಯವಿದ್ದಾರೆ.",
+    "ml": "അതെ, {doctor} ഇപ്പോൾ {until} വരെ ലഭ്യമാണ്.",
+}
+
+DOCTOR_NEXT_OPENING = {
+    "en": "{doctor} is not in right now. The next opening is {day}, {time}.",
+    "hi": "{doctor} अभी उपलब्ध नहीं हैं। वे अगली बार {day} {time} से उपलब्ध होंगे।",
+    "kn": "{doctor} ಈಗ ಲಭ್ಯವಿಲ್ಲ. ಅವರು ಮುಂದೆ {day} {time} ರಿಂದ ಲಭ್ಯವಿರುತ್ತಾರೆ.",
+    "ml": "{doctor} ഇപ്പോൾ ലഭ്യമല്ല. അടുത്തതായി {day} {time} മുതൽ ലഭ്യമാകും.",
+}
+
+DOCTOR_NOT_IN_NOW = {
+    "en": "{doctor} is not in right now.",
+    "hi": "{doctor} अभी उपलब्ध नहीं हैं।",
+    "kn": "{doctor} ಈಗ ಲಭ್ಯವಿಲ್ಲ.",
+    "ml": "{doctor} ഇപ്പോൾ ലഭ്യമല്ല.",
+}
+
+NOT_FOUND = {
+    "en": "Sorry, we don't have that specialist at our clinic. Our departments are {departments}.",
+    "hi": "माफ़ कीजिए, हमारे क्लिनिक में यह विशेषज्ञ नहीं हैं। हमारे विभाग हैं {departments}।",
+    "kn": "ಕ್ಷಮಿಸಿ, ನಮ್ಮ ಕ್ಲಿನಿಕ್‌ನಲ್ಲಿ ಆ ತಜ್ಞರು ಇಲ್ಲ. ನಮ್ಮ ವಿಭಾಗಗಳು {departments}.",
+    "ml": "ക്ഷമിക്കണം, ഞങ്ങളുടെ ക്ലിനിക്കിൽ ആ സ്പെഷ്യലിസ്റ്റ് ഇല്ല. ഞങ്ങളുടെ വിഭാഗങ്ങൾ {departments}.",
+}
+
+# A symptom we recognised, but its specialty is not at this clinic ("knee fracture" -> Orthopedics)
+NOT_FOUND_SPECIALTY = {
+    "en": "Sorry, that needs {specialty}, and we don't have that department at our clinic. Our departments are {departments}.",
+    "hi": "माफ़ कीजिए, इसके लिए {specialty} विभाग चाहिए, जो हमारे क्लिनिक में नहीं है। हमारे विभाग हैं {departments}।",
+    "kn": "ಕ್ಷಮಿಸಿ, ಇದಕ್ಕೆ {specialty} ವಿಭಾಗ ಬೇಕು, ಅದು ನಮ್ಮ ಕ್ಲಿನಿಕ್‌ನಲ್ಲಿ ಇಲ್ಲ. ನಮ್ಮ ವಿಭಾಗಗಳು {departments}.",
+    "ml": "ക്ഷമിക്കണം, ഇതിന് {specialty} വിഭാഗം വേണം, അത് ഞങ്ങളുടെ ക്ലിനിക്കിൽ ഇല്ല. ഞങ്ങളുടെ വിഭാഗങ്ങൾ {departments}.",
+}
+
+FULL_SCHEDULE_INTRO = {
+    "en": "Here is our doctors' schedule.",
+    "hi": "हमारे डॉक्टरों का समय इस प्रकार है।",
+    "kn": "ನಮ್ಮ ವೈದ್ಯರ ವೇಳಾಪಟ್ಟಿ ಹೀಗಿದೆ.",
+    "ml": "ഞങ്ങളുടെ ഡോക്ടർമാരുടെ സമയക്രമം ഇതാണ്.",
+}
+
+WALK_IN = {
+    "en": "This is a walk-in clinic, so you can come in directly.",
+    "hi": "यह वॉक-इन क्लिनिक है, आप सीधे आ सकते हैं।",
+    "kn": "ಇದು ವಾಕ್-ಇನ್ ಕ್ಲಿನಿಕ್, ನೀವು ನೇರವಾಗಿ ಬರಬಹುದು.",
+    "ml": "ഇതൊരു വാക്ക്-ഇൻ ക്ലിനിക്കാണ്, നിങ്ങൾക്ക് നേരിട്ട് വരാം.",
+}
+
+# Symptom -> department (app/symptoms.py), before that department's schedule
+SYMPTOM_DEPARTMENT = {
+    "en": "For that, please see our {department} department.",
+    "hi": "इसके लिए आप हमारे {department} विभाग में दिखा सकते हैं।",
+    "kn": "ಇದಕ್ಕಾಗಿ ನಮ್ಮ {department} ವಿಭಾಗದಲ್ಲಿ ತೋರಿಸಿ.",
+    "ml": "ഇതിനായി ഞങ്ങളുടെ {department} വിഭാഗത്തിൽ കാണിക്കാം.",
+}
+
+STT_WARMING_UP = {
+    "en": "Sorry, I'm just starting up and can't listen to voice notes yet. Please type your question, or send the voice note again in a minute.",
+    "hi": "माफ़ कीजिए, मैं अभी शुरू हो रही हूँ और वॉइस नोट अभी नहीं सुन सकती। कृपया अपना सवाल लिखकर भेजें, या एक मिनट बाद वॉइस नोट फिर से भेजें।",
+    "kn": "ಕ್ಷಮಿಸಿ, ನಾನು ಈಗಷ್ಟೇ ಆರಂಭವಾಗುತ್ತಿದ್ದೇನೆ, ಧ್ವನಿ ಸಂದೇಶಗಳನ್ನು ಇನ್ನೂ ಕೇಳಲಾಗುವುದಿಲ್ಲ. ದಯವಿಟ್ಟು ನಿಮ್ಮ ಪ್ರಶ್ನೆಯನ್ನು ಟೈಪ್ ಮಾಡಿ, ಅಥವಾ ಒಂದು ನಿಮಿಷದ ನಂತರ ಮತ್ತೆ ಕಳುಹಿಸಿ.",
+    "ml": "ക്ഷമിക്കണം, ഞാൻ ഇപ്പോൾ ആരംഭിക്കുകയാണ്, വോയ്‌സ് നോട്ടുകൾ ഇതുവരെ കേൾക്കാൻ കഴിയില്ല. ദയവായി നിങ്ങളുടെ ചോദ്യം ടൈപ്പ് ചെയ്യുക, അല്ലെങ്കിൽ ഒരു മിനിറ്റിന് ശേഷം വീണ്ടും അയയ്ക്കുക.",
+}
+
+VOICE_NOTE_FAILED = {
+    "en": "Sorry, I couldn't get your voice note. Please send it again, or type your question.",
+    "hi": "माफ़ कीजिए, आपका वॉइस नोट नहीं मिल पाया। कृपया उसे फिर से भेजें, या अपना सवाल लिखकर भेजें।",
+    "kn": "ಕ್ಷಮಿಸಿ, ನಿಮ್ಮ ಧ್ವನಿ ಸಂದೇಶ ಸಿಗಲಿಲ್ಲ. ದಯವಿಟ್ಟು ಅದನ್ನು ಮತ್ತೆ ಕಳುಹಿಸಿ, ಅಥವಾ ನಿಮ್ಮ ಪ್ರಶ್ನೆಯನ್ನು ಟೈಪ್ ಮಾಡಿ.",
+    "ml": "ക്ഷമിക്കണം, നിങ്ങളുടെ വോയ്‌സ് നോട്ട് ലഭിച്ചില്ല. ദയവായി അത് വീണ്ടും അയയ്ക്കുക, അല്ലെങ്കിൽ നിങ്ങളുടെ ചോദ്യം ടൈപ്പ് ചെയ്യുക.",
+}
+
+# Voice note with no speech in it (VAD trimmed everything, or Whisper heard nothing)
+COULDNT_HEAR = {
+    "en": "Sorry, I couldn't hear anything in your voice note. Please try again, or type your question.",
+    "hi": "माफ़ कीजिए, आपके वॉइस नोट में कुछ सुनाई नहीं दिया। कृपया फिर से कोशिश करें, या अपना सवाल लिखकर भेजें।",
+    "kn": "ಕ್ಷಮಿಸಿ, ನಿಮ್ಮ ಧ್ವನಿ ಸಂದೇಶದಲ್ಲಿ ಏನೂ ಕೇಳಿಸಲಿಲ್ಲ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ, ಅಥವಾ ನಿಮ್ಮ ಪ್ರಶ್ನೆಯನ್ನು ಟೈಪ್ ಮಾಡಿ.",
+    "ml": "ക്ഷമിക്കണം, നിങ്ങളുടെ വോയ്‌സ് നോട്ടിൽ ഒന്നും കേൾക്കാനായില്ല. ദയവായി വീണ്ടും ശ്രമിക്കുക, അല്ലെങ്കിൽ നിങ്ങളുടെ ചോദ്യം ടൈപ്പ് ചെയ്യുക.",
+}
+
+# Overload (app/admission.py): no STT / LLM / TTS, just this. {hours} = "08:00 AM - 08:00 PM"
+BUSY = {
+    "en": "Sorry, we're getting a lot of messages right now. Clinic hours are {hours}, and it's a walk-in clinic. Please message again in a few minutes.",
+    "hi": "माफ़ कीजिए, अभी बहुत सारे मैसेज आ रहे हैं। क्लिनिक का समय {hours} है, आप सीधे आ सकते हैं। कृपया कुछ मिनट बाद फिर से मैसेज करें।",
+    "kn": "ಕ್ಷಮಿಸಿ, ಈಗ ತುಂಬಾ ಸಂದೇಶಗಳು ಬರುತ್ತಿವೆ. ಕ್ಲಿನಿಕ್ ಸಮಯ {hours}, ನೀವು ನೇರವಾಗಿ ಬರಬಹುದು. ದಯವಿಟ್ಟು ಕೆಲವು ನಿಮಿಷಗಳ ನಂತರ ಮತ್ತೆ ಸಂದೇಶ ಕಳುಹಿಸಿ.",
+    "ml": "ക്ഷമിക്കണം, ഇപ്പോൾ ധാരാളം സന്ദേശങ്ങൾ വരുന്നുണ്ട്. ക്ലിനിക് സമയം {hours} ആണ്, നിങ്ങൾക്ക് നേരിട്ട് വരാം. കുറച്ച് മിനിറ്റുകൾക്ക് ശേഷം വീണ്ടും സന്ദേശം അയയ്ക്കുക.",
+}
+
+BUSY_NO_HOURS = {
+    "en": "Sorry, we're getting a lot of messages right now. Please message again in a few minutes.",
+    "hi": "माफ़ कीजिए, अभी बहुत सारे मैसेज आ रहे हैं। कृपया कुछ मिनट बाद फिर से मैसेज करें।",
+    "kn": "ಕ್ಷಮಿಸಿ, ಈಗ ತುಂಬಾ ಸಂದೇಶಗಳು ಬರುತ್ತಿವೆ. ದಯವಿಟ್ಟು ಕೆಲವು ನಿಮಿಷಗಳ ನಂತರ ಮತ್ತೆ ಸಂದೇಶ ಕಳುಹಿಸಿ.",
+    "ml": "ക്ഷമിക്കണം, ഇപ്പോൾ ധാരാളം സന്ദേശങ്ങൾ വരുന്നുണ്ട്. കുറച്ച് മിനിറ്റുകൾക്ക് ശേഷം വീണ്ടും സന്ദേശം അയയ്ക്കുക.",
+}
+
+
+def _lang(language_code):
+    return language_code if language_code in GREETING else "en"
+
+
+def greeting(language_code):
+    return GREETING[_lang(language_code)]
+
+
+def closing(language_code):
+    return CLOSING[_lang(language_code)]
+
+
+def symptom_department(department, language_code):
+    return SYMPTOM_DEPARTMENT[_lang(language_code)].format(department=department)
+
+
+def stt_warming_up(language_code):
+    return STT_WARMING_UP[_lang(language_code)]
+
+
+def voice_note_failed(language_code):
+    return VOICE_NOTE_FAILED[_lang(language_code)]
+
+
+def couldnt_hear(language_code):
+    return COULDNT_HEAR[_lang(language_code)]
+
+
+def busy(language_code, hours=None):
+    lang = _lang(language_code)
+    return BUSY[lang].format(hours=hours) if hours else BUSY_NO_HOURS[lang]
+
+
+def join_words(words, language_code):
+    lang = _lang(language_code)
+    words = list(words)
+    if len(words) <= 1:
+        return "".join(words)
+    return ", ".join(words[:-1]) + AND_WORD[lang] + words[-1]
+
+
+def _day_list(days, lang):
+    return join_words([DAY_NAMES[lang].get(day, day) for day in days], lang)
+
+
+def render_doctor_rows(rows, language_code, departments_by_doctor=None, facts=None):
+    """
+    Turn get_doctor_info()["data"] rows into one spoken paragraph.
+    Days sharing the same timing are grouped: "Monday and Wednesday, 10:00 AM - 02:00 PM".
+    With `facts` (get_doctor_info()["facts"]) the answer is whether each doctor is in
+    right now - until when, or when they are next in.
+    """
+    lang = _lang(language_code)
+    departments_by_doctor = departments_by_doctor or {}
+    facts_by_doctor = {fact["doctor"]: fact for fact in facts["doctors"]} if facts else {}
+
+    # Keep the doctor order from the DB
+    doctors = {}
+    for row in rows:
+        doctors.setdefault(row["doctor"], []).append(row)
+
+    sentences = []
+    any_active = False
+    for doctor, doctor_rows in doctors.items():
+        fact = facts_by_doctor.get(doctor)
+        if fact is not None:
+            if fact["in_now"]:
+                any_active = True
+                sentences.append(DOCTOR_IN_NOW[lang].format(doctor=doctor, until=fact["in_until"]))
+                continue
+            if fact["next_day"]:
+                day = DAY_NAMES[lang].get(fact["next_day"], fact["next_day"])
+                sentences.append(DOCTOR_NEXT_OPENING[lang].format(doctor=doctor, day=day, time=fact["next_opens"]))
+                continue
+            # No shift coming up (on leave): the weekly rows below say why
+            sentences.append(DOCTOR_NOT_IN_NOW[lang].format(doctor=doctor))
+
+        # Active days grouped by timing
+        slots = {}
+        inactive = {}
+        for row in doctor_rows:
+            if row["is_active"]:
+                slots.setdefault(row["availability"], []).append(row["day"])
+            else:
+                inactive.setdefault(row["status"], []).append(row["day"])
+
+        if slots:
+            any_active = True
+            slot_text = join_words([f"{_day_list(days, lang)}, {time}" for time, days in slots.items()], lang)
+            sentences.append(DOCTOR_AVAILABLE[lang].format(
+                doctor=doctor, department=departments_by_doctor.get(doctor, ""), slots=slot_text,
+            ).replace(" ()", ""))
+        for status, days in inactive.items():
+            sentences.append(DOCTOR_UNAVAILABLE[lang].format(doctor=doctor, status=status, days=_day_list(days, lang)))
+
+    if any_active:
+        sentences.append(WALK_IN[lang])
+    return " ".join(sentences)
+
+
+def render_not_found(valid_departments, language_code, specialty=None):
+    lang = _lang(language_code)
+    departments = join_words(valid_departments, lang)
+    if specialty:
+        return NOT_FOUND_SPECIALTY[lang].format(specialty=specialty, departments=departments)
+    return NOT_FOUND[lang].format(departments=departments)
+
+
+def render_full_schedule(schedule_rows, language_code):
+    """ Raw `schedule` rows (get_doctor_info "full_schedule") -> spoken summary of every doctor """
+    lang = _lang(language_code)
+    rows = [{
+        "doctor": row["doctor_name"],
+        "day": row["day"],
+        "status": row["current_status"],
+        "availability": row["schedule_time"],
+        "is_active": str(row["current_status"]).upper() == "AVAILABLE",
+    } for row in schedule_rows]
+    departments = {row["doctor_name"]: row["department"] for row in schedule_rows}
+    return FULL_SCHEDULE_INTRO[lang] + " " + render_doctor_rows(rows, lang, departments)
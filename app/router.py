@@ -0,0 +1,185 @@
+# app/router.py
+# 🚦 Fast-path intent router. Runs BEFORE the LLM and answers the easy messages locally:
+#   - greetings ("hi", "namaste")            -> template reply
+#   - closings ("thanks", "bye", "okay")     -> template reply (Rule 8 of the prompt)
+#   - direct lookups ("when is Dr. Sharma in?") -> get_doctor_info() + template reply
+#   - symptoms ("I feel feverish", "ಎದೆ ನೋವು") -> local symptom index (app/symptoms.py) + template reply
+# Anything it is not confident about goes to the LLM as before.
+import re
+import time
+from app.database import get_schedule_snapshot, get_doctor_info
+from app.matching import get_match_index, normalize
+from app.symptoms import get_symptom_index
+from app import replies
+
+# Minimum fuzzy score before we trust a doctor/department match without the LLM
+# (a phonetic-only guess scores matching.PHONETIC_SCORE, below this: the LLM confirms it)
+LOOKUP_THRESHOLD = 90
+# Longer messages usually carry extra conditions ("tomorrow evening after 6?")
+MAX_LOOKUP_WORDS = 8
+# Symptom descriptions run longer ("my son has had a cough since yesterday")
+MAX_SYMPTOM_WORDS = 12
+# Exact/stem lexicon hits are 1.0/0.9; a fuzzy n-gram hit must be this close to skip the LLM
+SYMPTOM_THRESHOLD = 0.75
+
+# Questions with a specific time/condition still need the LLM to phrase the answer
+# ("tomorrow evening?", "after 6 pm?"). Everything else is rendered locally.
+NEEDS_PHRASING = re.compile(
+    r"\d|tomorrow|morning|afternoon|evening|night|after|before|o'clock|\bnext\b|\bkal\b|shaam|subah|raat"
+    r"|कल|शाम|सुबह|रात|ನಾಳೆ|ಸಂಜೆ|ಬೆಳಿಗ್ಗೆ|ರಾತ್ರಿ|നാളെ|വൈകുന്നേരം|രാവിലെ|രാത്രി",
+    re.IGNORECASE,
+)
+
+GREETING_WORDS = {
+    "hi", "hii", "hello", "hey", "hlo", "namaste", "namaskar", "namaskara", "namaskaram",
+    "good morning", "good afternoon", "good evening",
+    "नमस्ते", "नमस्कार", "हेलो", "हैलो",
+    "ನಮಸ್ಕಾರ", "ಹಲೋ",
+    "നമസ്കാരം", "ഹലോ",
+}
+
+CLOSING_WORDS = {
+    "thanks", "thank you", "thank you so much", "thanks a lot", "thx", "ok", "okay", "ok thanks",
+    "okay thanks", "bye", "goodbye", "bye bye", "no", "no thanks", "that's all", "thats all", "nothing else",
+    "dhanyavad", "dhanyawad", "shukriya", "theek hai", "thik hai",
+    "धन्यवाद", "शुक्रिया", "ठीक है", "बाय", "नहीं", "नहीं धन्यवाद",
+    "ಧನ್ಯವಾದ", "ಧನ್ಯವಾದಗಳು", "ಸರಿ", "ಬೈ", "ಬೇಡ",
+    "നന്ദി", "ശരി", "ബൈ", "വേണ്ട",
+}
+
+# The message must actually ASK about availability for the lookup fast-path
+# (content words only: "in", "there", "hai" turn up in almost any sentence)
+LOOKUP_HINTS = {
+    "available", "availability", "timing", "timings", "time", "when", "free", "schedule",
+    "kab", "milenge", "baithte",
+    "उपलब्ध", "कब", "मिलेंगे", "समय",
+    "ಲಭ್ಯ", "ಯಾವಾಗ", "ಸಮಯ", "ಇದ್ದಾರಾ",
+    "ലഭ്യമാണോ", "എപ്പോൾ", "സമയം", "ഉണ്ടോ",
+}
+
+# "Is he in TODAY / NOW?" - answer from the computed availability facts (in now, next opening)
+TODAY_WORDS = {"today", "now", "aaj", "abhi", "आज", "अभी", "ಇಂದು", "ಈಗ", "ഇന്ന്", "ഇപ്പോൾ"}
+
+# Script ranges -> language (text messages have no Whisper language tag)
+SCRIPTS = (
+    ("hi", re.compile(r"[ऀ-ॿ]")),   # Devanagari
+    ("kn", re.compile(r"[ಀ-೿]")),   # Kannada
+    ("ml", re.compile(r"[ഀ-ൿ]")),   # Malayalam
+)
+
+STATS = {"messages": 0, "greeting": 0, "closing": 0, "lookup": 0, "symptom": 0, "llm": 0, "router_seconds": 0.0}
+_llm_seconds = {"total": 0.0, "calls": 0}
+
+
+def detect_text_language(text, default="en"):
+    """ Guess the language of a typed message from its script """
+    for lang, pattern in SCRIPTS:
+        if pattern.search(text):
+            return lang
+    return default
+
+
+def _clean(text):
+    text = text.lower().strip()
+    text = re.sub(r"[!?.,।🙏😊👍]+", " ", text)
+    return " ".join(text.split())
+
+
+def asks_about_today(text):
+    return any(word in TODAY_WORDS for word in _clean(text).split())
+
+
+def _try_lookup(text, language_code):
+    words = text.split()
+    if not words or len(words) > MAX_LOOKUP_WORDS or NEEDS_PHRASING.search(text):
+        return None
+    asks_today = any(word in TODAY_WORDS for word in words)
+    if not asks_today and not any(word in LOOKUP_HINTS for word in words) and len(normalize(text).split()) > 1:
+        return None
+
+    snapshot = get_schedule_snapshot()
+    best = get_match_index(snapshot).best_per_kind(text)
+    doctor, department = best["doctor"], best["department"]
+    top = max((m for m in (doctor, department) if m is not None), key=lambda m: m.score, default=None)
+    if top is None or top.score < LOOKUP_THRESHOLD:
+        return None
+    # Two different entities scoring the same = ambiguous, let the LLM ask
+    if doctor and department and doctor.score == department.score and snapshot.by_doctor[doctor.value][0]["department"] != department.value:
+        return None
+
+    result = get_doctor_info(top.value)
+    if result.get("type") != "specific_result":
+        return None
+    departments = {name: rows[0]["department"] for name, rows in snapshot.by_doctor.items()}
+    facts = result["facts"] if asks_today else None
+    return replies.render_doctor_rows(result["data"], language_code, departments, facts=facts)
+
+
+def _try_symptom(text, language_code):
+    words = text.split()
+    if not words or len(words) > MAX_SYMPTOM_WORDS or NEEDS_PHRASING.search(text):
+        return None
+    snapshot = get_schedule_snapshot()
+    symptom = get_symptom_index(snapshot).match(text)
+    # Only a whole-term hit skips the LLM - stem and n-gram guesses get confirmed by the tool call
+    if symptom is None or symptom.method != "exact" or symptom.score < SYMPTOM_THRESHOLD:
+        return None
+
+    # Raw phrase straight in: same lookup the LLM's tool call would make
+    result = get_doctor_info(text)
+    if result.get("error") == "not_found":
+        return replies.render_not_found(result["valid_departments"], language_code, result.get("specialty"))
+    if "symptom" not in result:
+        # The message also named a doctor/department - _try_lookup passed on it, so does this
+        return None
+    departments = {name: rows[0]["department"] for name, rows in snapshot.by_doctor.items()}
+    facts = result["facts"] if any(word in TODAY_WORDS for word in words) else None
+    intro = replies.symptom_department(result["symptom"]["department"], language_code)
+    return intro + " " + replies.render_doctor_rows(result["data"], language_code, departments, facts=facts)
+
+
+def route(user_text, language_code):
+    """
+    Returns (intent, reply_text) when the message can be answered locally,
+    or (None, None) when it should go to the LLM.
+    """
+    started = time.perf_counter()
+    STATS["messages"] += 1
+    intent, reply = None, None
+
+    text = _clean(user_text)
+    if text in GREETING_WORDS:
+        intent, reply = "greeting", replies.greeting(language_code)
+    elif text in CLOSING_WORDS:
+        intent, reply = "closing", replies.closing(language_code)
+    else:
+        reply = _try_lookup(text, language_code)
+        if reply:
+            intent = "lookup"
+        else:
+            reply = _try_symptom(text, language_code)
+            if reply:
+                intent = "symptom"
+
+    STATS[intent or "llm"] += 1
+    STATS["router_seconds"] += time.perf_counter() - started
+    return intent, reply
+
+
+def record_llm_latency(seconds):
+    """ Called by the pipeline after each LLM turn - used to estimate time saved """
+    _llm_seconds["total"] += seconds
+    _llm_seconds["calls"] += 1
+
+
+def get_stats():
+    routed = STATS["greeting"] + STATS["closing"] + STATS["lookup"] + STATS["symptom"]
+    avg_llm = _llm_seconds["total"] / _llm_seconds["calls"] if _llm_seconds["calls"] else 0.0
+    avg_router = STATS["router_seconds"] / STATS["messages"] if STATS["messages"] else 0.0
+    return {
+        **{k: v for k, v in STATS.items() if k != "router_seconds"},
+        "hit_rate": round(routed / STATS["messages"], 3) if STATS["messages"] else 0.0,
+        "avg_router_ms": round(avg_router * 1000, 3),
+        "avg_llm_ms": round(avg_llm * 1000, 1),
+        "est_saved_seconds": round(routed * max(avg_llm - avg_router, 0.0), 1),
+    }
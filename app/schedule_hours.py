@@ -0,0 +1,100 @@
+# app/schedule_hours.py
+# 🕘 Free-text schedule -> numbers SQLite can compare.
+#   "10:00 AM - 02:00 PM" -> (600, 840)         minutes after midnight
+#   "Monday" -> 0b0000001, "Daily" -> 0b1111111  weekday bitmask (bit 0 = Monday, like datetime.weekday())
+# A close time at or before the open time means the shift runs past midnight: close_minute > 1440.
+import re
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+ALL_DAYS = 0b1111111
+MINUTES_PER_DAY = 24 * 60
+
+DAY_ALIASES = {
+    "daily": ALL_DAYS, "everyday": ALL_DAYS, "every day": ALL_DAYS, "all days": ALL_DAYS,
+    "weekdays": 0b0011111, "weekends": 0b1100000, "weekend": 0b1100000,
+}
+
+_TIME = r"(\d{1,2})(?:[:.](\d{2}))?\s*([ap]\.?m\.?)?"
+TIME_RANGE = re.compile(_TIME + r"\s*(?:-|–|to)\s*" + _TIME, re.IGNORECASE)
+
+
+def _minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        meridiem = meridiem[0].lower()
+        hour = hour % 12 + (12 if meridiem == "p" else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError("bad time")
+    return hour * 60 + minute
+
+
+def parse_hours(text):
+    """ "10:00 AM - 02:00 PM" -> (600, 840); None if the text has no time range """
+    found = TIME_RANGE.search(text or "")
+    if not found:
+        return None
+    open_h, open_m, open_ampm, close_h, close_m, close_ampm = found.groups()
+    try:
+        # "10 - 2 PM": the open time borrows the close time's AM/PM (unless that puts it after closing)
+        if close_ampm and not open_ampm:
+            open_ampm = close_ampm
+            if _minutes(open_h, open_m, open_ampm) > _minutes(close_h, close_m, close_ampm):
+                open_ampm = "am"
+        opens, closes = _minutes(open_h, open_m, open_ampm), _minutes(close_h, close_m, close_ampm)
+        # "9 - 5": bare 12-hour clock times mean a day shift, not 9 AM to 5 AM the next morning
+        # ("22:00 - 06:00" opens past noon on a 24-hour clock, so it stays overnight)
+        if not open_ampm and not close_ampm and closes <= opens and int(open_h) <= 12 and int(close_h) < 12:
+            closes += 12 * 60
+    except ValueError:
+        # "10:75 - 2 PM": leave the row unparsed rather than fail the migration
+        return None
+    if closes <= opens:
+        closes += MINUTES_PER_DAY
+    return opens, closes
+
+
+def _weekday(word):
+    word = word.strip().lower()[:3]
+    for i, name in enumerate(WEEKDAYS):
+        if name.lower().startswith(word) and len(word) == 3:
+            return i
+    return None
+
+
+def parse_days(text):
+    """ "Monday" / "Daily" / "Mon-Fri" / "Mon, Wed" -> weekday bitmask (0 if nothing matched) """
+    text = (text or "").strip().lower()
+    if text in DAY_ALIASES:
+        return DAY_ALIASES[text]
+    mask = 0
+    for part in re.split(r"\s*(?:,|&|\band\b)\s*", text):
+        ends = re.split(r"\s*(?:-|–|\bto\b)\s*", part)
+        if len(ends) == 2:
+            first, last = _weekday(ends[0]), _weekday(ends[1])
+            if first is not None and last is not None:
+                for step in range((last - first) % 7 + 1):
+                    mask |= 1 << ((first + step) % 7)
+                continue
+        day = _weekday(part)
+        if day is not None:
+            mask |= 1 << day
+        elif part in DAY_ALIASES:
+            mask |= DAY_ALIASES[part]
+    return mask
+
+
+def format_minutes(minutes):
+    """ 840 -> "02:00 PM" (the clinic's own format) """
+    minutes %= MINUTES_PER_DAY
+    hour, minute = divmod(minutes, 60)
+    return f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def derived_columns(day, schedule_time):
+    """ The parsed columns stored next to `day` / `schedule_time` """
+    hours = parse_hours(schedule_time)
+    return {
+        "day_mask": parse_days(day),
+        "open_minute": hours[0] if hours else None,
+        "close_minute": hours[1] if hours else None,
+    }
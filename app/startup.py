@@ -0,0 +1,90 @@
+# app/startup.py
+# 🚦 Startup timing, background warm-up and the /healthz + /readyz answers.
+# The server accepts traffic as soon as the lifespan starts: text replies work right away,
+# Whisper models load on their worker threads, and /readyz turns green once they are in RAM.
+import time
+import asyncio
+import sqlite3
+from app.database import get_schedule_snapshot, check_database
+from app.matching import get_match_index
+from app.symptoms import get_symptom_index
+from app.transcriber import TRANSCRIBER
+
+
+class StartupTracker:
+    """ Seconds since the process began importing app.main, per milestone and warm-up step """
+
+    def __init__(self):
+        self.boot = time.perf_counter()
+        self.phases = {}        # "imported" / "serving" / "ready" -> seconds since boot
+        self.steps = {}         # warm-up step -> seconds it took
+        self.errors = {}
+        self.warm = False
+
+    def set_boot(self, boot):
+        self.boot = boot
+
+    def mark(self, phase):
+        self.phases[phase] = round(time.perf_counter() - self.boot, 3)
+        print(f"🚦 Startup: {phase} after {self.phases[phase]:.2f}s")
+
+    async def step(self, name, func):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(func)
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {e}"
+            print(f"⚠️ Warm-up step {name} failed: {e}")
+        self.steps[name] = round(time.perf_counter() - started, 3)
+
+    def uptime(self):
+        return round(time.perf_counter() - self.boot, 1)
+
+    def get_stats(self):
+        return {"phases": self.phases, "warm_up_steps": self.steps, "warm_up_errors": self.errors}
+
+
+STARTUP = StartupTracker()
+
+
+def _warm_schedule():
+    # Snapshot + fuzzy index + first RapidFuzz call (builds the matcher's caches) + symptom vectors
+    snapshot = get_schedule_snapshot()
+    get_match_index(snapshot).resolve("warm up", "doctor")
+    get_symptom_index(snapshot).match("warm up")
+
+
+async def warm_up():
+    """ Everything the first patient would otherwise wait for, off the request path """
+    await STARTUP.step("schedule", _warm_schedule)
+    await STARTUP.step("vad", TRANSCRIBER.warm_vad)
+    started = time.perf_counter()
+    models_ok = await TRANSCRIBER.wait_ready()
+    STARTUP.steps["stt_models"] = round(time.perf_counter() - started, 3)
+    if not models_ok:
+        STARTUP.errors["stt_models"] = "; ".join(TRANSCRIBER.load_errors[-3:]) or "not loaded"
+    STARTUP.warm = True
+    STARTUP.mark("ready" if models_ok else "warm_up_done")
+
+
+def _database_ok():
+    try:
+        check_database()
+        return True, None
+    except sqlite3.Error as e:
+        return False, str(e)
+
+
+async def readiness():
+    """ (ready, details): STT models in RAM and the schedule DB readable """
+    database_ok, database_error = await asyncio.to_thread(_database_ok)
+    stt_ok = TRANSCRIBER.is_ready()
+    details = {
+        "ready": database_ok and stt_ok,
+        "checks": {"database": database_ok, "stt_models": stt_ok, "warm_up_done": STARTUP.warm},
+        "uptime_s": STARTUP.uptime(),
+        **STARTUP.get_stats(),
+    }
+    if database_error:
+        details["database_error"] = database_error
+    return details["ready"], details
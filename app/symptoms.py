@@ -0,0 +1,378 @@
+# app/symptoms.py
+# 🩺 Local symptom -> department index (English / Hinglish, Hindi, Kannada, Malayalam).
+# "I feel feverish", "सीने में दर्द", "ಚರ್ಮದ ತುರಿಕೆ", "ഹൃദ്രോഗ വിദഗ്ധൻ" -> a department in
+# the `schedule` table, without asking the LLM to translate first. Three passes, best wins:
+#   1. exact   - a 1-3 word window of the message IS a lexicon term (longest term wins)
+#   2. stem    - a word STARTS with a term ("feverish", "ಜ್ವರವಿದೆ", "പനിയുണ്ട്" - suffixes glue on)
+#   3. n-gram  - cosine of character 2/3-gram vectors (NumPy) catches misspellings and
+#                Whisper variants ("fevar", "khujlee", "chest pane")
+import re
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from app.matching import get_match_index
+
+# 📚 CURATED LEXICON: specialty -> terms per language (romanized Hindi sits with "hi").
+# `fallback`: who sees these patients when the clinic has no such department
+# (a GP handles a sore throat; nobody here fixes a tooth).
+SPECIALTIES = {
+    "General": {
+        "fallback": None,
+        "terms": {
+            "en": ["general", "general physician", "physician", "family doctor", "gp", "fever", "feverish", "cold",
+                   "cough", "flu", "viral", "body ache", "body pain", "weakness", "feeling tired", "very tired", "tiredness",
+                   "fatigue", "headache", "unwell", "not feeling well", "feeling sick", "fell sick", "checkup", "diabetes", "sugar", "vomiting", "infection"],
+            "hi": ["bukhar", "bukhaar", "khansi", "khaansi", "zukam", "jukam", "sardi", "kamzori", "thakan",
+                   "badan dard", "sar dard", "sir dard", "tabiyat kharab", "ulti",
+                   "बुखार", "खांसी", "जुकाम", "सर्दी", "कमजोरी", "थकान", "बदन दर्द", "शरीर में दर्द",
+                   "सिरदर्द", "सिर दर्द", "तबीयत खराब", "उल्टी", "शुगर", "मधुमेह", "वायरल"],
+            "kn": ["jwara", "kemmu", "ಜ್ವರ", "ಕೆಮ್ಮು", "ನೆಗಡಿ", "ಶೀತ", "ಸುಸ್ತು", "ಮೈ ಕೈ ನೋವು", "ತಲೆನೋವು",
+                   "ತಲೆ ನೋವು", "ವಾಂತಿ", "ಸಕ್ಕರೆ ಕಾಯಿಲೆ", "ಆರೋಗ್ಯ ಸರಿಯಿಲ್ಲ"],
+            "ml": ["പനി", "ചുമ", "ജലദോഷം", "ക്ഷീണം", "ശരീരവേദന", "തലവേദന", "ഛർദ്ദി", "പ്രമേഹം", "ഷുഗർ",
+                   "സുഖമില്ല"],
+        },
+    },
+    "Cardiology": {
+        "fallback": "General",
+        "terms": {
+            "en": ["cardiology", "cardiologist", "heart", "heart doctor", "heart problem", "chest pain",
+                   "palpitations", "heartbeat", "breathless", "shortness of breath", "blood pressure", "bp",
+                   "high bp", "heart attack"],
+            "hi": ["dil", "dil ki dhadkan", "seene mein dard", "chhati mein dard", "saans phoolna",
+                   "दिल", "दिल का दर्द", "दिल की धड़कन", "धड़कन", "सीने में दर्द", "छाती में दर्द",
+                   "सांस फूलना", "ब्लड प्रेशर", "हृदय रोग", "हार्ट"],
+            "kn": ["ede novu", "ಎದೆ ನೋವು", "ಎದೆನೋವು", "ಹೃದಯ", "ಹೃದಯ ಬಡಿತ", "ಹೃದ್ರೋಗ", "ಉಸಿರಾಟದ ತೊಂದರೆ",
+                   "ರಕ್ತದೊತ್ತಡ", "ಬಿಪಿ"],
+            "ml": ["നെഞ്ചുവേദന", "നെഞ്ചു വേദന", "ഹൃദയം", "ഹൃദ്രോഗം", "ഹൃദ്രോഗ വിദഗ്ധൻ", "നെഞ്ചിടിപ്പ്",
+                   "ശ്വാസം മുട്ടൽ", "രക്തസമ്മർദ്ദം", "ബിപി"],
+        },
+    },
+    "Dermatology": {
+        "fallback": "General",
+        "terms": {
+            "en": ["dermatology", "dermatologist", "skin", "skin doctor", "rash", "itching", "itchy", "acne",
+                   "pimples", "eczema", "skin allergy", "hair fall", "dandruff", "fungal infection", "psoriasis"],
+            "hi": ["khujli", "daane", "muhase", "baal jhadna", "twacha",
+                   "त्वचा", "खुजली", "दाने", "मुंहासे", "चकत्ते", "बाल झड़ना", "रूसी", "एलर्जी", "चर्म रोग"],
+            "kn": ["ಚರ್ಮ", "ಚರ್ಮ ರೋಗ", "ತುರಿಕೆ", "ಮೊಡವೆ", "ಕಜ್ಜಿ", "ದದ್ದು", "ಕೂದಲು ಉದುರುವಿಕೆ", "ಹೊಟ್ಟು"],
+            "ml": ["ചർമ്മം", "ചർമ്മരോഗം", "ചൊറിച്ചിൽ", "മുഖക്കുരു", "തിണർപ്പ്", "മുടി കൊഴിച്ചിൽ", "താരൻ"],
+        },
+    },
+    "Neurology": {
+        "fallback": "General",
+        "terms": {
+            "en": ["neurology", "neurologist", "nerve", "brain", "migraine", "severe headache", "seizure", "fits",
+                   "epilepsy", "numbness", "paralysis", "stroke", "dizziness", "dizzy", "vertigo", "tremor",
+                   "memory loss"],
+            "hi": ["chakkar", "mirgi", "lakwa", "sunn",
+                   "माइग्रेन", "चक्कर", "चक्कर आना", "मिर्गी", "दौरा", "सुन्न", "लकवा", "कंपन", "नस", "दिमाग",
+                   "तेज सिरदर्द"],
+            "kn": ["ಮೈಗ್ರೇನ್", "ತಲೆ ಸುತ್ತು", "ತಲೆಸುತ್ತು", "ಮೂರ್ಛೆ", "ಅಪಸ್ಮಾರ", "ಪಾರ್ಶ್ವವಾಯು", "ಮರಗಟ್ಟುವಿಕೆ",
+                   "ನರ", "ನರ ರೋಗ"],
+            "ml": ["മൈഗ്രേൻ", "തലകറക്കം", "അപസ്മാരം", "ചുഴലി", "മരവിപ്പ്", "പക്ഷാഘാതം", "ഞരമ്പ്"],
+        },
+    },
+    "Orthopedics": {
+        "fallback": "General",
+        "terms": {
+            "en": ["orthopedics", "orthopaedics", "orthopedic", "bone", "fracture", "joint pain", "back pain",
+                   "knee pain", "neck pain", "sprain"],
+            "hi": ["haddi", "kamar dard", "ghutne ka dard", "हड्डी", "जोड़ों का दर्द", "कमर दर्द",
+                   "घुटने का दर्द", "मोच"],
+            "kn": ["ಮೂಳೆ", "ಕೀಲು ನೋವು", "ಬೆನ್ನು ನೋವು", "ಮಂಡಿ ನೋವು", "ಉಳುಕು"],
+            "ml": ["എല്ല്", "സന്ധിവേദന", "നടുവേദന", "മുട്ടുവേദന", "ഉളുക്ക്"],
+        },
+    },
+    "ENT": {
+        "fallback": "General",
+        "terms": {
+            "en": ["ent", "ear", "ear pain", "throat", "sore throat", "nose", "sinus", "hearing"],
+            "hi": ["kaan dard", "gala kharab", "कान", "कान दर्द", "गला", "गले में खराश", "नाक"],
+            "kn": ["ಕಿವಿ", "ಕಿವಿ ನೋವು", "ಗಂಟಲು", "ಗಂಟಲು ನೋವು", "ಮೂಗು"],
+            "ml": ["ചെവി", "ചെവി വേദന", "തൊണ്ട", "തൊണ്ടവേദന", "മൂക്ക്"],
+        },
+    },
+    "Pediatrics": {
+        "fallback": "General",
+        "terms": {
+            "en": ["pediatrics", "paediatrics", "pediatrician", "child", "children", "baby", "kid", "infant"],
+            "hi": ["bachcha", "bacche", "बच्चा", "बच्चे", "शिशु"],
+            "kn": ["ಮಗು", "ಮಕ್ಕಳು", "ಮಕ್ಕಳ ವೈದ್ಯ"],
+            "ml": ["കുട്ടി", "കുഞ്ഞ്", "കുട്ടികളുടെ ഡോക്ടർ"],
+        },
+    },
+    "Gastroenterology": {
+        "fallback": "General",
+        "terms": {
+            "en": ["gastroenterology", "stomach", "stomach pain", "acidity", "heartburn", "gas", "diarrhea",
+                   "loose motion", "constipation", "indigestion"],
+            "hi": ["pet dard", "pet kharab", "पेट", "पेट दर्द", "एसिडिटी", "गैस", "दस्त", "कब्ज"],
+            "kn": ["ಹೊಟ್ಟೆ ನೋವು", "ಅಜೀರ್ಣ", "ಭೇದಿ", "ಮಲಬದ್ಧತೆ"],
+            "ml": ["വയറുവേദന", "വയറിളക്കം", "ഗ്യാസ്", "ദഹനക്കേട്", "മലബന്ധം"],
+        },
+    },
+    "Gynecology": {
+        "fallback": None,
+        "terms": {
+            "en": ["gynecology", "gynaecology", "gynecologist", "pregnancy", "pregnant", "periods", "menstrual"],
+            "hi": ["गर्भावस्था", "प्रेगनेंसी", "पीरियड्स", "मासिक धर्म", "स्त्री रोग"],
+            "kn": ["ಗರ್ಭಿಣಿ", "ಮುಟ್ಟು", "ಸ್ತ್ರೀರೋಗ"],
+            "ml": ["ഗർഭം", "ഗർഭിണി", "ആർത്തവം"],
+        },
+    },
+    "Ophthalmology": {
+        "fallback": None,
+        "terms": {
+            "en": ["ophthalmology", "ophthalmologist", "eye", "eyes", "eye doctor", "vision", "blurry vision"],
+            "hi": ["aankh", "आंख", "आंखों", "नज़र", "नजर"],
+            "kn": ["ಕಣ್ಣು", "ದೃಷ್ಟಿ"],
+            "ml": ["കണ്ണ്", "കാഴ്ച"],
+        },
+    },
+    "Dentistry": {
+        "fallback": None,
+        "terms": {
+            "en": ["dentist", "dental", "tooth", "teeth", "toothache", "gums"],
+            "hi": ["daant", "दांत", "दांत दर्द", "मसूड़े"],
+            "kn": ["ಹಲ್ಲು", "ಹಲ್ಲು ನೋವು", "ಒಸಡು"],
+            "ml": ["പല്ല്", "പല്ലുവേദന", "മോണ"],
+        },
+    },
+}
+
+MAX_TERM_WORDS = 3          # Longest lexicon phrase, in words
+MIN_STEM_CHARS = 4          # Shorter Latin terms only match exactly ("ear" is not "early")
+# A Latin stem hit needs a real inflection after it: "rashes", "coughing" - but "rash" is not "Rashmi"
+LATIN_SUFFIXES = {"s", "es", "ed", "ing", "y", "ish", "ness"}
+MIN_INDIC_STEM_CHARS = 3    # Code points: "പനി" + "യുണ്ട്"
+STEM_SCORE = 0.9
+MIN_VECTOR_CHARS = 4        # Windows shorter than this are too noisy for n-grams
+MAX_VECTOR_WORDS = 2        # Longer windows only match exactly
+MIN_SIMILARITY = 0.55       # Cosine below this is not a match ("fevr" ~ 0.60, "thank" ~ "thakan" 0.50)
+MAX_LENGTH_GAP = 0.25       # A typo keeps the length: "rashmi" is not "rash", "tired" is not "tiredness"
+NGRAM_SIZES = (2, 3)
+WINDOW_CACHE_SIZE = 8192
+# A specialty name has to match a `schedule.department` this well to be "the same department"
+DEPARTMENT_MATCH_THRESHOLD = 85
+
+# Clinic vocabulary that LOOKS like lexicon terms ("consultation" ~ "constipation") - never n-gram matched
+NOT_SYMPTOMS = {
+    "doctor", "doctors", "dr", "consultation", "appointment", "available", "availability", "timing", "timings",
+    "clinic", "hospital", "today", "tomorrow", "please", "thank", "thanks", "wait", "waiting",
+    "डॉक्टर", "ಡಾಕ್ಟರ್", "ವೈದ್ಯರು", "ഡോക്ടർ",
+}
+# "<word> of" is an idiom, not a complaint: "tired of waiting", "sick of calling"
+IDIOM_HEADS = {"tired", "sick", "fed"}
+
+_TOKEN = re.compile(r"[\w\u0900-\u0d7f]+")     # Word chars + Devanagari ... Malayalam (incl. vowel signs)
+# Spelling variants that mean the same word: ZWNJ / ZWJ, nukta (ड़ -> ड), chandrabindu -> anusvara
+_FOLD = str.maketrans({"\u200c": None, "\u200d": None, "\u093c": None, "\u0901": "\u0902"})
+# Kannada / Malayalam glue suffixes onto the word ("ಜ್ವರವಿದೆ" = fever-is); Hindi uses separate words
+_AGGLUTINATIVE = re.compile(r"[\u0c80-\u0d7f]")
+
+STATS = {"lookups": 0, "exact": 0, "stem": 0, "ngram": 0, "misses": 0, "seconds": 0.0}
+
+
+def tokenize(text):
+    """ NFC + casefold, drop zero-width joiners / nukta, split into words (any script) """
+    text = unicodedata.normalize("NFC", str(text)).casefold().translate(_FOLD)
+    return _TOKEN.findall(text)
+
+
+def char_ngrams(text):
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1))
+
+
+class SymptomMatch:
+    __slots__ = ("specialty", "department", "term", "score", "method")
+
+    def __init__(self, specialty, department, term, score, method):
+        self.specialty = specialty      # Lexicon specialty ("Orthopedics")
+        self.department = department    # The clinic's department for it ("General" via fallback), or None
+        self.term = term                # Lexicon term that matched
+        self.score = score              # 0-1
+        self.method = method            # "exact" | "stem" | "ngram"
+
+    def __repr__(self):
+        return f"SymptomMatch({self.specialty!r} -> {self.department!r}, {self.term!r}, {self.score:.2f}, {self.method})"
+
+
+class SymptomVectors:
+    """
+    Every lexicon term once: an exact-lookup dict, a stem list and an L2-normalized
+    (n-gram vocabulary x terms) matrix. Independent of the schedule - built once per process.
+    """
+
+    def __init__(self, specialties=SPECIALTIES):
+        self.terms = []             # Normalized term text
+        self.specialties = []       # Parallel: specialty of each term
+        self.exact = {}             # term text -> index
+        for specialty, entry in specialties.items():
+            for terms in entry["terms"].values():
+                for term in terms:
+                    text = " ".join(tokenize(term))
+                    if text and text not in self.exact:
+                        self.exact[text] = len(self.terms)
+                        self.terms.append(text)
+                        self.specialties.append(specialty)
+        self.stems = {text: i for i, text in enumerate(self.terms) if " " not in text}
+        # A window is only compared with terms of the same length ("back" is not "back pain")
+        self.term_words = np.array([text.count(" ") + 1 for text in self.terms])
+        # Short terms are too noisy to fuzzy-match either way ("ear" is not "early")
+        self.fuzzy_terms = np.array([len(text) >= MIN_VECTOR_CHARS for text in self.terms])
+        self.term_chars = np.array([len(text) for text in self.terms])
+        self.max_gap = np.maximum(1, (self.term_chars * MAX_LENGTH_GAP).astype(int))
+
+        self.vocab = {}
+        columns = [char_ngrams(text) for text in self.terms]
+        for grams in columns:
+            for gram in grams:
+                self.vocab.setdefault(gram, len(self.vocab))
+        matrix = np.zeros((len(self.vocab), len(self.terms)), dtype=np.float32)
+        for col, grams in enumerate(columns):
+            for gram, count in grams.items():
+                matrix[self.vocab[gram], col] = count
+        matrix /= np.linalg.norm(matrix, axis=0, keepdims=True)
+        self.matrix = matrix
+
+    def windows(self, words, longest=MAX_TERM_WORDS):
+        """ Every run of 1..`longest` consecutive words """
+        for size in range(1, longest + 1):
+            for start in range(len(words) - size + 1):
+                yield " ".join(words[start:start + size])
+
+    @lru_cache(maxsize=WINDOW_CACHE_SIZE)
+    def _window_vector(self, window):
+        """ (vocabulary rows, L2-normalized weights) of a window's known n-grams - common words repeat a lot """
+        grams = char_ngrams(window)
+        norm = sum(count * count for count in grams.values()) ** 0.5
+        known = [(self.vocab[gram], count / norm) for gram, count in grams.items() if gram in self.vocab]
+        return tuple(row for row, _ in known), tuple(weight for _, weight in known)
+
+    def _longest_stem(self, words):
+        """
+        Term that is the longest proper prefix of any word (Latin + Kannada/Malayalam only).
+        Latin words must end in an inflection (LATIN_SUFFIXES); Kannada/Malayalam glue on
+        whole words ("ಜ್ವರ" + "ವಿದೆ"), so any remainder goes there.
+        """
+        best, best_len = None, 0
+        for word in words:
+            latin = word.isascii()
+            if latin:
+                shortest = MIN_STEM_CHARS
+            elif _AGGLUTINATIVE.match(word):
+                shortest = MIN_INDIC_STEM_CHARS
+            else:
+                continue
+            for k in range(len(word) - 1, max(shortest, best_len + 1) - 1, -1):
+                if latin and word[k:] not in LATIN_SUFFIXES:
+                    continue
+                i = self.stems.get(word[:k])
+                if i is not None:
+                    best, best_len = i, k
+                    break
+        return best
+
+    def best(self, words):
+        """ (term index, score, method) of the best match for the tokenized message, or None """
+        words = [word for word, after in zip(words, words[1:] + [""]) if not (word in IDIOM_HEADS and after == "of")]
+        windows = list(self.windows(words))
+        found = [self.exact[w] for w in windows if w in self.exact]
+        if found:
+            return max(found, key=lambda i: len(self.terms[i])), 1.0, "exact"
+
+        stem = self._longest_stem(words)
+        if stem is not None:
+            return stem, STEM_SCORE, "stem"
+
+        # Sparse query x dense term matrix: gather the rows of the window's known n-grams,
+        # weight them, and sum per window (np.add.reduceat) -> cosine against every term
+        rows, weights, starts, sizes, lengths = [], [], [], [], []
+        for window in self.windows(words, MAX_VECTOR_WORDS):
+            if len(window) < MIN_VECTOR_CHARS or any(word in NOT_SYMPTOMS for word in window.split()):
+                continue
+            window_rows, window_weights = self._window_vector(window)
+            if window_rows:
+                starts.append(len(rows))
+                sizes.append(window.count(" ") + 1)
+                lengths.append(len(window))
+                rows.extend(window_rows)
+                weights.extend(window_weights)
+        if not rows:
+            return None
+        gathered = self.matrix[rows] * np.asarray(weights, dtype=np.float32)[:, None]
+        scores = np.add.reduceat(gathered, starts, axis=0)
+        scores *= (np.asarray(sizes)[:, None] == self.term_words) & self.fuzzy_terms
+        scores *= np.abs(np.asarray(lengths)[:, None] - self.term_chars) <= self.max_gap
+        window, col = np.unravel_index(int(scores.argmax()), scores.shape)
+        score = float(scores[window, col])
+        if score < MIN_SIMILARITY:
+            return None
+        return int(col), score, "ngram"
+
+
+_vectors = None
+
+
+def get_symptom_vectors():
+    global _vectors
+    if _vectors is None:
+        _vectors = SymptomVectors()
+    return _vectors
+
+
+class SymptomIndex:
+    """ The lexicon mapped onto THIS schedule's departments (rebuilt when the schedule changes) """
+
+    def __init__(self, snapshot):
+        self.version = snapshot.version
+        self.vectors = get_symptom_vectors()
+        match_index = get_match_index(snapshot)
+        present = {}
+        for specialty in SPECIALTIES:
+            match = match_index.resolve(specialty, "department", threshold=DEPARTMENT_MATCH_THRESHOLD)
+            if match is not None:
+                present[specialty] = match.value
+        # Specialty -> the clinic department that sees these patients (None = we don't have one)
+        self.departments = {}
+        for specialty, entry in SPECIALTIES.items():
+            self.departments[specialty] = present.get(specialty) or present.get(entry["fallback"])
+
+    def match(self, text):
+        """ Best SymptomMatch for raw user text (any of the four languages), or None """
+        started = time.perf_counter()
+        STATS["lookups"] += 1
+        found = self.vectors.best(tokenize(text))
+        STATS["seconds"] += time.perf_counter() - started
+        if found is None:
+            STATS["misses"] += 1
+            return None
+        i, score, method = found
+        STATS[method] += 1
+        specialty = self.vectors.specialties[i]
+        return SymptomMatch(specialty, self.departments[specialty], self.vectors.terms[i], score, method)
+
+
+_index = None
+
+
+def get_symptom_index(snapshot):
+    """ Return the index for this schedule snapshot (rebuilt only when the version changes) """
+    global _index
+    index = _index
+    if index is None or index.version != snapshot.version:
+        index = SymptomIndex(snapshot)
+        _index = index
+    return index
+
+
+def get_stats():
+    lookups = STATS["lookups"]
+    return {
+        **{k: v for k, v in STATS.items() if k != "seconds"},
+        "avg_lookup_us": round(STATS["seconds"] / lookups * 1e6, 1) if lookups else 0.0,
+        "terms": len(_vectors.terms) if _vectors else 0,
+    }
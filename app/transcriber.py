@@ -0,0 +1,434 @@
+# app/transcriber.py
+# 👂 Transcription Service (The Ears)
+# A pool of Whisper workers behind an async `transcribe()` API.
+#   1. Decode + trim leading/trailing silence (Silero VAD) -> real speech duration
+#   2. Pick a model tier by duration: "yes"/"thanks" go to a small fast model, real questions to `small`
+#   3. Short clips of the same tier that arrive together are decoded in ONE batched pass
+# A sender's last confidently detected language is passed back in as a hint, so Whisper skips detection
+# for their next few clips - then it detects again, and the new detection replaces the hint.
+import io
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.metrics import record_error, Counter
+# faster_whisper (CTranslate2, PyAV, onnxruntime) is imported where it is used:
+# it is the slowest import in the app and nothing needs it before the first voice note.
+
+SAMPLE_RATE = 16000
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "small")
+
+# ⚙️ WORKER SETTINGS
+# Threads are enough here: CTranslate2 releases the GIL while it computes.
+STT_WORKERS = int(os.getenv("STT_WORKERS", "2"))
+# CPU threads per model. Default splits the cores evenly so workers don't fight.
+STT_CPU_THREADS = int(os.getenv("STT_CPU_THREADS", "0")) or max(1, (os.cpu_count() or 2) // STT_WORKERS)
+STT_BATCH_SIZE = int(os.getenv("STT_BATCH_SIZE", "8"))
+# How long a free worker waits for more short clips before starting a batch
+STT_BATCH_WINDOW = float(os.getenv("STT_BATCH_WINDOW_MS", "20")) / 1000
+
+# 🪜 MODEL TIERS: "model:max_seconds,...,model" - speech up to max_seconds uses that model,
+# the last one takes everything longer. STT_TIERS=small turns tiering off.
+STT_TIERS = os.getenv("STT_TIERS") or f"base:4,{WHISPER_MODEL}"
+
+# ✂️ SILENCE TRIMMING (only the edges: pauses inside the sentence are kept)
+STT_VAD = os.getenv("STT_VAD", "1") == "1"
+VAD_OPTIONS = {"threshold": 0.5, "min_silence_duration_ms": 500, "speech_pad_ms": 300}
+
+# 🌍 LANGUAGE HINTS: reuse a sender's language when Whisper was at least this sure last time
+STT_LANGUAGE_HINTS = os.getenv("STT_LANGUAGE_HINTS", "1") == "1"
+HINT_MIN_PROBABILITY = 0.7
+# A hinted run learns nothing about the language, so a hint is only good for a few clips:
+# this many after a sure detection, one after a borderline one (or a typed Indic message)
+HINT_REUSES = int(os.getenv("STT_HINT_REUSES", "3"))
+HINT_SURE_PROBABILITY = 0.9
+HINT_TTL = float(os.getenv("MEMORY_TTL_MINUTES", "30")) * 60    # Same lifetime as a conversation
+HINT_MAX_SENDERS = 10000
+
+# Clips up to Whisper's 30s window can share a batch
+SHORT_CLIP_SECONDS = 30
+
+STT_CPU_SECONDS = Counter("vani_stt_cpu_seconds_total", "Process CPU time spent in Whisper, per model tier", ("tier",))
+STT_AUDIO_SECONDS = Counter("vani_stt_audio_seconds_total", "Speech transcribed (after trimming), per model tier", ("tier",))
+
+
+def parse_tiers(spec):
+    """ "tiny:2,base:5,small" -> [("tiny", 2.0), ("base", 5.0), ("small", inf)] """
+    tiers = []
+    for part in spec.split(","):
+        name, _, limit = part.strip().partition(":")
+        if name:
+            tiers.append((name, float(limit) if limit else float("inf")))
+    if not tiers:
+        raise ValueError("STT_TIERS needs at least one model")
+    tiers[-1] = (tiers[-1][0], float("inf"))
+    return tiers
+
+
+def trim_silence(audio):
+    """ Cut leading/trailing non-speech. Returns an empty array when there is no speech at all. """
+    from faster_whisper.vad import get_speech_timestamps, VadOptions
+    timestamps = get_speech_timestamps(audio, VadOptions(**VAD_OPTIONS), sampling_rate=SAMPLE_RATE)
+    if not timestamps:
+        return audio[:0]
+    return audio[timestamps[0]["start"]:timestamps[-1]["end"]]
+
+
+class LanguageHints:
+    """ sender -> last confidently detected language (LRU, expires with the conversation) """
+
+    def __init__(self, ttl=HINT_TTL, max_senders=HINT_MAX_SENDERS, reuses=HINT_REUSES):
+        self.ttl = ttl
+        self.max_senders = max_senders
+        self.reuses = reuses
+        self.languages = OrderedDict()      # sender_id -> [language, confirmed_at, hinted clips left]
+        self._lock = threading.Lock()
+
+    def _entry(self, sender_id):
+        entry = self.languages.get(sender_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry
+
+    def get(self, sender_id):
+        """ Best guess of the sender's language (for replies) - does not use up the hint """
+        with self._lock:
+            entry = self._entry(sender_id)
+            return entry[0] if entry else None
+
+    def take(self, sender_id):
+        """ Language to hint Whisper with, or None when it is time to detect again """
+        with self._lock:
+            entry = self._entry(sender_id)
+            if entry is None or entry[2] <= 0:
+                return None
+            entry[2] -= 1
+            return entry[0]
+
+    def _set(self, sender_id, language, uses):
+        self.languages.pop(sender_id, None)
+        self.languages[sender_id] = [language, time.monotonic(), uses]
+        while len(self.languages) > self.max_senders:
+            self.languages.popitem(last=False)
+
+    def confirm(self, sender_id, language, probability):
+        """ Whisper detected `language` (probability None = it was hinted, nothing learned) """
+        if probability is None:
+            return
+        with self._lock:
+            if probability < HINT_MIN_PROBABILITY:
+                # Unsure: don't keep hinting an older guess either - detect again next time
+                self.languages.pop(sender_id, None)
+                return
+            self._set(sender_id, language, self.reuses if probability >= HINT_SURE_PROBABILITY else 1)
+
+    def warm_start(self, sender_id, language):
+        """ A typed Indic-script message: hint their next voice note once, then let Whisper detect """
+        with self._lock:
+            entry = self._entry(sender_id)
+            if entry is None or entry[0] != language:
+                self._set(sender_id, language, 1)
+
+
+class _Job:
+    __slots__ = ("audio", "duration", "tier", "language", "future")
+
+    def __init__(self, audio, tier, language, future):
+        self.audio = audio
+        self.duration = len(audio) / SAMPLE_RATE
+        self.tier = tier
+        self.language = language    # Hint, or None to detect
+        self.future = future
+
+
+class TranscriptionService:
+
+    def __init__(self, workers=STT_WORKERS, cpu_threads=STT_CPU_THREADS, batch_size=STT_BATCH_SIZE, batch_window=STT_BATCH_WINDOW, tiers=STT_TIERS, vad=STT_VAD):
+        self.workers = workers
+        self.cpu_threads = cpu_threads
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.tiers = parse_tiers(tiers) if isinstance(tiers, str) else list(tiers)
+        self.vad = vad
+        self.models = [{} for _ in range(workers)]     # worker -> {model name: WhisperModel}
+        self.executors = []
+        self.loading = []               # Futures of the background model loads started by start()
+        self.load_errors = []
+        self.stats = {
+            "jobs": 0, "batches": 0, "batched_jobs": 0, "audio_seconds": 0.0, "busy_seconds": 0.0,
+            "trimmed_seconds": 0.0, "silent_clips": 0, "hinted_jobs": 0,
+        }
+        self.tier_stats = {name: {"jobs": 0, "audio_seconds": 0.0, "busy_seconds": 0.0, "cpu_seconds": 0.0} for name, _ in self.tiers}
+        self._queue = None
+        self._idle = None
+        self._dispatcher = None
+        self._running = set()
+
+    # --- LIFECYCLE ---
+    def start(self):
+        """ Spawn the worker threads (models load in the background) and the dispatcher """
+        if self._dispatcher is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._idle = asyncio.Queue()
+        for i in range(self.workers):
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"whisper-{i}")
+            for name, _ in self.tiers:
+                self.loading.append(executor.submit(self._load_model, i, name))
+            self.executors.append(executor)
+            self._idle.put_nowait(i)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        tiers = ", ".join(f"{name} <= {limit:g}s" if limit != float("inf") else name for name, limit in self.tiers)
+        print(f"👂 Transcriber: {self.workers} workers x {self.cpu_threads} CPU threads ({tiers})")
+
+    async def stop(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        for executor in self.executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors.clear()
+        self.loading.clear()
+
+    def _load_model(self, worker_id, name):
+        models = self.models[worker_id]
+        if name not in models:
+            from faster_whisper import WhisperModel
+            print(f"⏳ Loading Whisper ({name}) on worker {worker_id}...")
+            try:
+                models[name] = WhisperModel(
+                    name, device="cpu", compute_type="int8",
+                    cpu_threads=self.cpu_threads, num_workers=1,
+                )
+            except Exception as e:
+                # Kept for /readyz; the next voice note on this worker tries again
+                self.load_errors.append(f"{name} (worker {worker_id}): {type(e).__name__}: {e}")
+                raise
+            print(f"✅ Whisper {name} ready on worker {worker_id}")
+        return models[name]
+
+    def is_ready(self):
+        """ Every worker holds every tier's model """
+        return all(name in models for models in self.models for name, _ in self.tiers)
+
+    def is_loading(self):
+        """ The startup loads are still running (a voice note now would wait for them) """
+        return any(not future.done() for future in self.loading)
+
+    async def wait_ready(self):
+        """ Wait for the background loads started by start(); True if all of them succeeded """
+        results = await asyncio.gather(*(asyncio.wrap_future(f) for f in self.loading), return_exceptions=True)
+        return self.is_ready() and not any(isinstance(r, BaseException) for r in results)
+
+    def warm_vad(self):
+        """ First Silero call builds the ONNX session (~50 ms) - do it before a patient waits """
+        if self.vad:
+            trim_silence(np.zeros(SAMPLE_RATE // 2, dtype=np.float32))
+
+    def pick_tier(self, duration):
+        for name, limit in self.tiers:
+            if duration <= limit:
+                return name
+        return self.tiers[-1][0]
+
+    def _prepare(self, source):
+        """ Decode to 16 kHz mono PCM (PyAV) and trim the silent edges - runs off the event loop """
+        from faster_whisper import decode_audio
+        audio = source if isinstance(source, np.ndarray) else decode_audio(source, SAMPLE_RATE)
+        if not self.vad or len(audio) == 0:
+            return audio, len(audio) / SAMPLE_RATE
+        trimmed = trim_silence(audio)
+        return trimmed, len(audio) / SAMPLE_RATE
+
+    # --- PUBLIC API ---
+    async def transcribe(self, source, language=None):
+        """
+        Transcribe raw bytes (e.g. the downloaded OGG), a file-like object,
+        a file path or an already decoded 16 kHz float32 array.
+        `language` skips Whisper's language detection.
+        Returns tuple: (text, language_code, language_probability) - probability is None when hinted
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        audio, raw_duration = await loop.run_in_executor(None, self._prepare, source)
+        self.stats["trimmed_seconds"] += raw_duration - len(audio) / SAMPLE_RATE
+        if len(audio) == 0:
+            # Nothing but silence/noise: Whisper would only hallucinate ("Thank you.")
+            self.stats["silent_clips"] += 1
+            return "", language or "en", None
+        if language:
+            self.stats["hinted_jobs"] += 1
+        job = _Job(audio, self.pick_tier(len(audio) / SAMPLE_RATE), language, loop.create_future())
+        await self._queue.put(job)
+        return await job.future
+
+    # --- DISPATCH ---
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        carry = None
+        while True:
+            worker_id = await self._idle.get()
+            first = carry or await self._queue.get()
+            carry = None
+            batch = [first]
+
+            # Long clips run alone; short ones pick up whatever else is waiting for the same model
+            if first.duration <= SHORT_CLIP_SECONDS:
+                deadline = loop.time() + self.batch_window
+                while len(batch) < self.batch_size:
+                    if not self._queue.empty():
+                        job = self._queue.get_nowait()
+                    else:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        try:
+                            job = await asyncio.wait_for(self._queue.get(), remaining)
+                        except asyncio.TimeoutError:
+                            break
+                    if job.duration > SHORT_CLIP_SECONDS or job.tier != first.tier:
+                        carry = job
+                        break
+                    batch.append(job)
+
+            task = asyncio.create_task(self._run(worker_id, batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, worker_id, batch):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        tier = batch[0].tier
+        try:
+            results = await loop.run_in_executor(self.executors[worker_id], self._transcribe_jobs, worker_id, batch)
+            for job, result in zip(batch, results):
+                if not job.future.done():
+                    job.future.set_result(result)
+        except Exception as e:
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+        finally:
+            busy = time.perf_counter() - started
+            # Process-wide CPU: exact with one worker, shared out between overlapping batches otherwise
+            cpu = time.process_time() - cpu_started
+            audio_seconds = sum(job.duration for job in batch)
+            self.stats["jobs"] += len(batch)
+            self.stats["batches"] += 1
+            if len(batch) > 1:
+                self.stats["batched_jobs"] += len(batch)
+            self.stats["audio_seconds"] += audio_seconds
+            self.stats["busy_seconds"] += busy
+            tier_stats = self.tier_stats[tier]
+            tier_stats["jobs"] += len(batch)
+            tier_stats["audio_seconds"] += audio_seconds
+            tier_stats["busy_seconds"] += busy
+            tier_stats["cpu_seconds"] += cpu
+            STT_CPU_SECONDS.inc(cpu, tier=tier)
+            STT_AUDIO_SECONDS.inc(audio_seconds, tier=tier)
+            self._idle.put_nowait(worker_id)
+
+    # --- INFERENCE (runs on the worker thread) ---
+    def _transcribe_jobs(self, worker_id, batch):
+        model = self._load_model(worker_id, batch[0].tier)
+        if len(batch) == 1:
+            job = batch[0]
+            segments, info = model.transcribe(job.audio, beam_size=1, language=job.language)
+            text = " ".join([segment.text for segment in segments])
+            return [(text.strip(), info.language, None if job.language else info.language_probability)]
+        return _transcribe_batch(model, [job.audio for job in batch], [job.language for job in batch])
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            "trimmed_seconds": round(self.stats["trimmed_seconds"], 2),
+            "tiers": {
+                name: {
+                    **stats,
+                    # CPU seconds per second of speech - the number to compare tiers by
+                    "cpu_per_audio_second": round(stats["cpu_seconds"] / stats["audio_seconds"], 3) if stats["audio_seconds"] else None,
+                }
+                for name, stats in self.tier_stats.items()
+            },
+            "workers": self.workers,
+            "cpu_threads": self.cpu_threads,
+            "models_ready": self.is_ready(),
+            "load_errors": self.load_errors[-5:],
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+        }
+
+
+def _transcribe_batch(model, audios, hints=None):
+    """
+    Several short (<30s) clips in ONE encoder + decoder call.
+    Same steps as faster-whisper's BatchedInferencePipeline, but the batch is
+    made of different clips (each with its own language: hinted or detected).
+    Returns [(text, language, probability or None if hinted)].
+    """
+    from faster_whisper.audio import pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+    from faster_whisper.transcribe import get_suppressed_tokens
+    hints = hints or [None] * len(audios)
+    features = np.stack([pad_or_trim(model.feature_extractor(audio)[..., :-1]) for audio in audios])
+    encoder_output = model.encode(features)
+
+    tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language="en")
+    prompt = model.get_prompt(tokenizer, [], without_timestamps=True)
+    prompts = [prompt.copy() for _ in audios]
+    languages = [hint or "en" for hint in hints]
+    probabilities = [None] * len(audios)
+
+    if model.model.is_multilingual:
+        language_index = prompt.index(tokenizer.language)
+        if not all(hints):
+            # Detection runs on the whole batch; hinted clips keep their hint
+            for i, probs in enumerate(model.model.detect_language(encoder_output)):
+                if hints[i] is None:
+                    token, probabilities[i] = probs[0]      # e.g. ("<|hi|>", 0.93)
+                    languages[i] = token[2:-2]
+        for i, language in enumerate(languages):
+            prompts[i][language_index] = tokenizer.tokenizer.token_to_id(f"<|{language}|>")
+
+    results = model.model.generate(
+        encoder_output,
+        prompts,
+        beam_size=1,
+        max_length=model.max_length,
+        suppress_blank=True,
+        suppress_tokens=get_suppressed_tokens(tokenizer, [-1]),
+    )
+    return [
+        (tokenizer.decode(result.sequences_ids[0]).strip(), language, probability)
+        for result, language, probability in zip(results, languages, probabilities)
+    ]
+
+
+TRANSCRIBER = TranscriptionService()
+LANGUAGE_HINTS = LanguageHints()
+
+
+async def transcribe(source, sender_id=None):
+    """
+    Returns tuple: (text, language_code)
+    With `sender_id` the sender's last confident language is used as a hint for a few clips
+    (no detection pass); then Whisper detects again and that detection becomes the new hint.
+    """
+    try:
+        hint = LANGUAGE_HINTS.take(sender_id) if sender_id and STT_LANGUAGE_HINTS else None
+        text, detected_lang, probability = await TRANSCRIBER.transcribe(source, language=hint)
+        if sender_id:
+            LANGUAGE_HINTS.confirm(sender_id, detected_lang, probability)
+        # Whisper automatically detects language (e.g., 'hi', 'kn') unless we hinted it
+        print(f"🌍 {'Hinted' if hint else 'Detected'} Language: {detected_lang}")
+        return text, detected_lang
+    except Exception as e:
+        print(f"❌ Transcribe Error: {e}")
+        record_error("stt")
+        return "", "en"
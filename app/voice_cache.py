@@ -0,0 +1,136 @@
+# app/voice_cache.py
+# 🗃️ Voice-note cache. Same text + same voice = same audio, so we only synthesize it once.
+#   Tier 1: OGG/Opus files on disk (bounded LRU, survives restarts)
+#   Tier 2: WhatsApp media IDs of already-uploaded notes (skips upload too)
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+VOICE_CACHE_DIR = os.getenv("VOICE_CACHE_DIR", "data/voice_cache")
+VOICE_CACHE_MAX_ENTRIES = int(os.getenv("VOICE_CACHE_MAX_ENTRIES", "500"))
+VOICE_CACHE_MAX_BYTES = int(os.getenv("VOICE_CACHE_MAX_MB", "50")) * 1024 * 1024
+# Meta keeps uploaded media for 30 days - stop reusing IDs a bit before that
+VOICE_MEDIA_TTL = float(os.getenv("VOICE_MEDIA_TTL_HOURS", str(24 * 25))) * 3600
+
+
+def cache_key(clean_text, voice):
+    return hashlib.sha256(f"{voice}\n{clean_text}".encode("utf-8")).hexdigest()
+
+
+class VoiceCache:
+
+    def __init__(self, directory=VOICE_CACHE_DIR, max_entries=VOICE_CACHE_MAX_ENTRIES, max_bytes=VOICE_CACHE_MAX_BYTES, media_ttl=VOICE_MEDIA_TTL):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.media_ttl = media_ttl
+        self.files = OrderedDict()      # key -> size in bytes (oldest first)
+        self.total_bytes = 0
+        self.media_ids = {}             # key -> (media_id, expires_at)
+        self.stats = {"media_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "media_expired": 0}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        """ Rebuild the LRU order from whatever is already on disk (oldest mtime first) """
+        if self._loaded:
+            return
+        self._loaded = True
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".ogg"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.files[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.ogg")
+
+    def _evict(self):
+        while self.files and (len(self.files) > self.max_entries or self.total_bytes > self.max_bytes):
+            key, size = self.files.popitem(last=False)
+            self.total_bytes -= size
+            self.media_ids.pop(key, None)
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    # --- TIER 2: MEDIA IDs ---
+    def get_media_id(self, key):
+        with self._lock:
+            entry = self.media_ids.get(key)
+            if entry is None:
+                return None
+            media_id, expires_at = entry
+            if time.time() >= expires_at:
+                del self.media_ids[key]
+                self.stats["media_expired"] += 1
+                return None
+            if key in self.files:
+                self.files.move_to_end(key)
+            self.stats["media_hits"] += 1
+            return media_id
+
+    def put_media_id(self, key, media_id):
+        with self._lock:
+            self.media_ids[key] = (media_id, time.time() + self.media_ttl)
+
+    def forget_media_id(self, key):
+        """ Meta rejected the ID (deleted/expired early) - next time we re-upload """
+        with self._lock:
+            self.media_ids.pop(key, None)
+
+    # --- TIER 1: OGG FILES ---
+    def get_ogg(self, key):
+        with self._lock:
+            self._load()
+            if key not in self.files:
+                self.stats["misses"] += 1
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                self.total_bytes -= self.files.pop(key)
+                self.stats["misses"] += 1
+                return None
+            self.files.move_to_end(key)
+            self.stats["disk_hits"] += 1
+            return data
+
+    def put_ogg(self, key, ogg_bytes):
+        with self._lock:
+            self._load()
+            # Write to a unique temp name, then rename: readers never see half a file
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(ogg_bytes)
+            os.replace(tmp_path, self._path(key))
+            if key in self.files:
+                self.total_bytes -= self.files.pop(key)
+            self.files[key] = len(ogg_bytes)
+            self.total_bytes += len(ogg_bytes)
+            self._evict()
+
+    def get_stats(self):
+        lookups = self.stats["media_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["media_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self.files),
+            "bytes": self.total_bytes,
+            "media_ids": len(self.media_ids),
+        }
+
+
+VOICE_CACHE = VoiceCache()
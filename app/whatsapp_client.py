@@ -1,64 +1,151 @@
 # app/whatsapp_client.py
+# Async Graph API client: ONE pooled keep-alive connection set, timeouts and retries.
 import os
-import requests
+import random
+import asyncio
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
 
 TOKEN = os.getenv("WHATSAPP_TOKEN")
 PHONE_ID = os.getenv("PHONE_NUMBER_ID")
+GRAPH_URL = os.getenv("GRAPH_URL", "https://graph.facebook.com/v18.0")   # Overridable for offline benchmarks (bench/)
 
-def get_media_url(media_id):
+# ⏱️ TIMEOUTS (seconds) - API calls are small, media transfers get more room
+API_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+MEDIA_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# 🔁 RETRY POLICY - Rate limits (429) and server hiccups (5xx) are worth retrying
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5   # 0.5s, 1s, 2s (+ jitter)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# POST /messages is NOT idempotent: a 5xx or read timeout may come after Meta accepted
+# the message, and a retry would send the patient a duplicate. Those calls only retry
+# when the request provably never got through (rate limited, or no connection).
+SAFE_RETRY_STATUSES = {429}
+SAFE_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+CHUNK_SIZE = 64 * 1024
+
+_client = None
+
+
+def get_client():
+    """ Shared AsyncClient (created lazily so it binds to the running event loop) """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {TOKEN}"},
+            timeout=API_TIMEOUT,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _retry_delay(attempt, response=None):
+    # Respect Meta's Retry-After header when it tells us how long to wait
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return BACKOFF_BASE * (2 ** attempt) + random.uniform(0, 0.25)
+
+
+async def _send(method, url, stream=False, idempotent=True, **kwargs):
+    """
+    Send a request with retry + exponential backoff on 429/5xx and network errors.
+    idempotent=False (sending a message) retries only what cannot have been delivered.
+    With stream=True the caller must close the returned response.
+    """
+    client = get_client()
+    retry_statuses = RETRY_STATUSES if idempotent else SAFE_RETRY_STATUSES
+    retry_errors = httpx.TransportError if idempotent else SAFE_RETRY_ERRORS
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            request = client.build_request(method, url, **kwargs)
+            response = await client.send(request, stream=stream)
+        except retry_errors as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _retry_delay(attempt)
+            print(f"⚠️ Graph API {method} failed ({e!r}), retrying in {delay:.1f}s")
+        else:
+            if response.status_code not in retry_statuses or attempt == MAX_RETRIES:
+                if response.is_error:
+                    if stream:
+                        await response.aread()
+                    print(f"❌ Graph API {method} {response.status_code}: {response.text[:200]}")
+                return response
+            delay = _retry_delay(attempt, response)
+            if stream:
+                await response.aclose()
+            print(f"⚠️ Graph API {method} got {response.status_code}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def get_media_url(media_id):
     """ Get the download link for the user's audio """
-    url = f"https://graph.facebook.com/v18.0/{media_id}"
-    headers = {"Authorization": f"Bearer {TOKEN}"}
-    response = requests.get(url, headers=headers)
+    response = await _send("GET", f"{GRAPH_URL}/{media_id}")
+    if response.is_error:
+        return None
     return response.json().get("url")
 
-def download_media_file(media_url, save_path):
-    """ Download the user's audio to our laptop """
-    headers = {"Authorization": f"Bearer {TOKEN}"}
-    response = requests.get(media_url, headers=headers)
-    with open(save_path, "wb") as f:
-        f.write(response.content)
-    return save_path
-
-def upload_media(file_path):
-    """ Upload our OGG reply to WhatsApp """
-    url = f"https://graph.facebook.com/v18.0/{PHONE_ID}/media"
-    headers = {"Authorization": f"Bearer {TOKEN}"}
-    
+
+async def download_media(media_url):
+    """ Stream the user's audio into memory (no temp files). Returns bytes or None. """
+    if not media_url:
+        return None
+    response = await _send("GET", media_url, stream=True, timeout=MEDIA_TIMEOUT)
+    try:
+        if response.is_error:
+            return None
+        buffer = bytearray()
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            buffer.extend(chunk)
+    finally:
+        await response.aclose()
+    return bytes(buffer)
+
+
+async def upload_media(audio_bytes, filename="voice.ogg"):
+    """ Upload our OGG reply to WhatsApp straight from memory """
+    url = f"{GRAPH_URL}/{PHONE_ID}/media"
+
     # MIME type for OGG Voice Note
-    mime_type = "audio/ogg" 
-    
-    files = {
-        'file': (os.path.basename(file_path), open(file_path, 'rb'), mime_type)
-    }
+    mime_type = "audio/ogg"
     data = {'messaging_product': 'whatsapp'}
-    
-    response = requests.post(url, headers=headers, files=files, data=data)
+    files = {'file': (filename, audio_bytes, mime_type)}
+
+    response = await _send("POST", url, files=files, data=data, timeout=MEDIA_TIMEOUT)
+    if response.is_error:
+        return None
     return response.json().get("id")
 
-def send_whatsapp_audio(to_number, media_id):
-    """ Send the uploaded audio as a reply """
-    url = f"https://graph.facebook.com/v18.0/{PHONE_ID}/messages"
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
+
+async def send_whatsapp_audio(to_number, media_id):
+    """ Send the uploaded audio as a reply. Returns False if Meta rejected it (e.g. stale media ID). """
+    url = f"{GRAPH_URL}/{PHONE_ID}/messages"
+
     data = {
         "messaging_product": "whatsapp",
         "to": to_number,
         "type": "audio",
         "audio": {"id": media_id}
     }
-    
-    requests.post(url, headers=headers, json=data)
+
+    response = await _send("POST", url, idempotent=False, json=data)
+    return response.is_success
 
 # Keep the text sending function too
-def send_whatsapp_message(to_number, text_body):
-    url = f"https://graph.facebook.com/v18.0/{PHONE_ID}/messages"
-    headers = {"Authorization": f"Bearer {TOKEN}", "Content-Type": "application/json"}
+async def send_whatsapp_message(to_number, text_body):
+    url = f"{GRAPH_URL}/{PHONE_ID}/messages"
     data = {"messaging_product": "whatsapp", "to": to_number, "type": "text", "text": {"body": text_body}}
-    requests.post(url, headers=headers, json=data)
\ No newline at end of file
+    await _send("POST", url, idempotent=False, json=data)
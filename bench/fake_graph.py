@@ -0,0 +1,83 @@
+# bench/fake_graph.py
+# 📡 Local stand-in for the WhatsApp Graph API, so benchmarks run with no network.
+#   GET  /{version}/{media_id}           -> {"url": ...}   (media lookup)
+#   GET  /_media/{media_id}              -> the sample OGG voice note
+#   POST /{version}/{phone_id}/media     -> {"id": ...}    (upload)
+#   POST /{version}/{phone_id}/messages  -> recorded, so the driver can measure end-to-end latency
+#   GET  /_bench/sent                    -> everything "delivered" so far
+#
+#   python -m bench.fake_graph --port 9001 --voice-file sample.ogg --latency-ms 40
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from fastapi import FastAPI, Request, Response
+import uvicorn
+
+
+def create_app(voice_ogg=b"", latency_ms=0.0, jitter_ms=0.0):
+    app = FastAPI()
+    sent = []
+    counts = {"media_lookups": 0, "downloads": 0, "uploads": 0, "upload_bytes": 0, "messages": 0}
+    ids = itertools.count(1)
+
+    async def network_delay():
+        delay = (latency_ms + random.uniform(0, jitter_ms)) / 1000
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # Specific routes first: "/{version}/{media_id}" would swallow them otherwise
+    @app.get("/_bench/sent")
+    async def bench_sent():
+        return {"sent": sent, "counts": counts}
+
+    @app.get("/_media/{media_id}")
+    async def download(media_id: str):
+        await network_delay()
+        counts["downloads"] += 1
+        return Response(voice_ogg, media_type="audio/ogg")
+
+    @app.get("/{version}/{media_id}")
+    async def media_lookup(version: str, media_id: str, request: Request):
+        await network_delay()
+        counts["media_lookups"] += 1
+        return {"id": media_id, "url": f"{request.base_url}_media/{media_id}", "mime_type": "audio/ogg"}
+
+    @app.post("/{version}/{phone_id}/media")
+    async def upload(version: str, phone_id: str, request: Request):
+        body = await request.body()
+        await network_delay()
+        counts["uploads"] += 1
+        counts["upload_bytes"] += len(body)
+        return {"id": f"bench-media-{next(ids)}"}
+
+    @app.post("/{version}/{phone_id}/messages")
+    async def messages(version: str, phone_id: str, request: Request):
+        data = await request.json()
+        await network_delay()
+        counts["messages"] += 1
+        sent.append({"to": data.get("to"), "type": data.get("type"), "at": time.time()})
+        return {"messaging_product": "whatsapp", "messages": [{"id": f"wamid.bench.out.{next(ids)}"}]}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake WhatsApp Graph API")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--voice-file", help="OGG served for every media download")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    voice_ogg = b""
+    if args.voice_file:
+        with open(args.voice_file, "rb") as f:
+            voice_ogg = f.read()
+    app = create_app(voice_ogg, args.latency_ms, args.jitter_ms)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
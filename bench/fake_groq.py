@@ -0,0 +1,159 @@
+# bench/fake_groq.py
+# 🤖 Local stand-in for Groq's OpenAI-compatible chat API, for offline benchmarks.
+# Replies follow a script: the first rule whose regex matches the last user message wins.
+#   {"match": "sharma|gupta", "tool": "$0"}   -> check_doctor(name=<matched text>)
+#   {"match": ".*", "reply": "..."}           -> plain answer
+# After a tool result comes back, PHRASED_REPLY is returned. Latency is configurable.
+#
+#   python -m bench.fake_groq --port 9002 --latency-ms 350 --jitter-ms 150 [--script rules.json]
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+DEFAULT_SCRIPT = [
+    {"match": r"sharma|gupta|anjali|khan", "tool": "$0"},
+    {"match": r"cardio\w*|derma\w*|neuro\w*|general|skin|heart|chest", "tool": "$0"},
+    {"match": r"schedule|all doctors|everyone", "tool": "all"},
+    {"match": r".*", "reply": "I can help you with our doctors' timings. Which doctor or department are you looking for?"},
+]
+PHRASED_REPLY = "The doctor is available at the times shown in our schedule. This is a walk-in clinic, so you can come in directly."
+
+
+def _last_user_text(messages):
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def _has_tool_result(messages):
+    last = messages[-1] if messages else {}
+    return last.get("role") == "tool" or str(last.get("content", "")).startswith("TOOL RESULT")
+
+
+def pick_reply(script, messages, tools_offered):
+    """ Returns (content, tool_arguments) - exactly one of them is set """
+    if _has_tool_result(messages):
+        return PHRASED_REPLY, None
+    text = _last_user_text(messages)
+    for rule in script:
+        found = re.search(rule["match"], text, re.IGNORECASE)
+        if not found:
+            continue
+        if "tool" in rule and tools_offered:
+            name = found.group(0) if rule["tool"] == "$0" else rule["tool"]
+            return None, {"name": name}
+        if "reply" in rule:
+            return rule["reply"], None
+    return PHRASED_REPLY, None
+
+
+def _tokens(text):
+    return max(1, len(str(text)) // 4)
+
+
+def create_app(script=None, latency_ms=0.0, jitter_ms=0.0, status_429_rate=0.0):
+    app = FastAPI()
+    script = script or DEFAULT_SCRIPT
+    ids = itertools.count(1)
+    counts = {"requests": 0, "tool_calls": 0, "rate_limited": 0, "streamed": 0}
+
+    @app.get("/_bench/stats")
+    async def bench_stats():
+        return counts
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counts["requests"] += 1
+        if status_429_rate and random.random() < status_429_rate:
+            counts["rate_limited"] += 1
+            return _rate_limited()
+
+        await asyncio.sleep((latency_ms + random.uniform(0, jitter_ms)) / 1000)
+        messages = body.get("messages", [])
+        content, tool_args = pick_reply(script, messages, bool(body.get("tools")))
+        call_id = f"call_{next(ids)}"
+        model = body.get("model", "fake")
+        prompt_tokens = sum(_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = _tokens(content or json.dumps(tool_args))
+
+        tool_calls = None
+        if tool_args is not None:
+            counts["tool_calls"] += 1
+            tool_calls = [{"id": call_id, "type": "function",
+                           "function": {"name": "check_doctor", "arguments": json.dumps(tool_args)}}]
+
+        if body.get("stream"):
+            counts["streamed"] += 1
+            return StreamingResponse(_stream(call_id, model, content, tool_calls), media_type="text/event-stream")
+
+        return {
+            "id": f"chatcmpl-{call_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "tool_calls": tool_calls},
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    return app
+
+
+def _rate_limited():
+    return JSONResponse(
+        {"error": {"message": "Rate limit reached (fake)", "type": "tokens", "code": "rate_limit_exceeded"}},
+        status_code=429, headers={"retry-after": "1"},
+    )
+
+
+async def _stream(call_id, model, content, tool_calls):
+    """ Server-sent events, one word per chunk (tool calls arrive in a single chunk) """
+    def event(delta, finish_reason=None):
+        chunk = {"id": f"chatcmpl-{call_id}", "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    yield event({"role": "assistant", "content": ""})
+    if tool_calls:
+        yield event({"tool_calls": [{"index": 0, **tool_calls[0]}]})
+        yield event({}, "tool_calls")
+    else:
+        for word in re.findall(r"\S+\s*", content or ""):
+            await asyncio.sleep(0.005)
+            yield event({"content": word})
+        yield event({}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Groq chat completions API")
+    parser.add_argument("--port", type=int, default=9002)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--script", help="JSON file with a list of {match, tool|reply} rules")
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+    app = create_app(script, args.latency_ms, args.jitter_ms, args.rate_limit)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# bench/replay.py
+# 🏁 Offline end-to-end benchmark. Starts the fake Graph API + fake Groq (subprocesses),
+# runs the real FastAPI app in this process, fires text / OGG voice webhooks at a target
+# rate and reports throughput, end-to-end and per-stage p50/p95/p99, and peak RSS.
+#
+#   python init_db.py                                   # once
+#   python -m bench.replay --rate 5 --duration 30 --voice-ratio 0.3
+#
+# Everything except Whisper runs without network: TTS is replaced by a canned MP3 stream
+# (use --real-tts to hit edge-tts), and the Whisper model must already be downloaded.
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import httpx
+
+TEXT_SAMPLES = [
+    "hi",
+    "Is Dr. Sharma available?",
+    "When is the skin doctor in?",
+    "Is Dr. Gupta there tomorrow evening after 6?",
+    "I have chest pain, which doctor should I see?",
+    "Dr Khan timings",
+    "Can I come today?",
+    "नमस्ते",
+    "thanks",
+]
+
+BUCKET_LINE = re.compile(r'^vani_stage_seconds_bucket\{stage="([^"]+)",le="([^"]+)"\} (\S+)$')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _ffmpeg_tone(fmt, codec, seconds):
+    """ A short sine tone in the given container (ffmpeg is already required by app/audio.py) """
+    cmd = ["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+           "-ac", "1", "-c:a", codec, "-f", fmt, "pipe:1"]
+    return subprocess.run(cmd, check=True, capture_output=True).stdout
+
+
+def _wait_for(url, timeout=15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def _start_fake(module, port, extra):
+    process = subprocess.Popen([sys.executable, "-m", module, "--port", str(port), *extra])
+    return process
+
+
+class FakeCommunicate:
+    """ Drop-in for edge_tts.Communicate: streams a canned MP3 in chunks with a fixed delay """
+    mp3 = b""
+    first_byte_ms = 150.0
+    chunk_size = 4096
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+
+    async def stream(self):
+        await asyncio.sleep(self.first_byte_ms / 1000)
+        for i in range(0, len(self.mp3), self.chunk_size):
+            yield {"type": "audio", "data": self.mp3[i:i + self.chunk_size]}
+            await asyncio.sleep(0.002)
+
+
+def _quantile(buckets, q):
+    """ Prometheus-style histogram_quantile over [(upper_bound, cumulative_count)] """
+    total = buckets[-1][1]
+    if not total:
+        return 0.0
+    rank = q * total
+    prev_bound, prev_count = 0.0, 0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return prev_bound
+            span = count - prev_count
+            return prev_bound + (bound - prev_bound) * ((rank - prev_count) / span if span else 0)
+        prev_bound, prev_count = bound, count
+    return prev_bound
+
+
+def stage_quantiles(metrics_text):
+    stages = {}
+    for line in metrics_text.splitlines():
+        found = BUCKET_LINE.match(line)
+        if found:
+            stage, le, count = found.groups()
+            stages.setdefault(stage, []).append((float(le), float(count)))
+    report = {}
+    for stage, buckets in sorted(stages.items()):
+        buckets.sort()
+        report[stage] = {
+            "count": int(buckets[-1][1]),
+            "p50": round(_quantile(buckets, 0.50), 3),
+            "p95": round(_quantile(buckets, 0.95), 3),
+            "p99": round(_quantile(buckets, 0.99), 3),
+        }
+    return report
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _webhook(run_id, i, sender, voice):
+    message = {"from": sender, "id": f"wamid.bench.{run_id}.{i}", "timestamp": str(int(time.time()))}
+    if voice:
+        message.update(type="audio", audio={"id": f"bench-audio-{i}", "mime_type": "audio/ogg; codecs=opus"})
+    else:
+        message.update(type="text", text={"body": random.choice(TEXT_SAMPLES)})
+    return {"object": "whatsapp_business_account", "entry": [{"id": "bench", "changes": [{"field": "messages", "value": {
+        "messaging_product": "whatsapp", "metadata": {"phone_number_id": "bench-phone"}, "messages": [message],
+    }}]}]}
+
+
+async def drive(args, app_url, graph_url, run_id):
+    total = int(args.rate * args.duration)
+    sent_at = {}        # sender -> [send times] (FIFO, matched against deliveries)
+    posted = 0
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        started = time.time()
+        tasks = []
+        for i in range(total):
+            # Open-loop: message i goes out at started + i / rate, however slow the app is
+            delay = started + i / args.rate - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            sender = f"91{run_id}{(i % args.senders) if args.senders else i:06d}"
+            voice = random.random() < args.voice_ratio
+            sent_at.setdefault(sender, []).append(time.time())
+            tasks.append(asyncio.create_task(client.post(f"{app_url}/webhook", json=_webhook(run_id, i, sender, voice))))
+        for response in await asyncio.gather(*tasks, return_exceptions=True):
+            posted += not isinstance(response, Exception) and response.status_code == 200
+        send_done = time.time()
+
+        # Wait for every reply to show up at the fake Graph API
+        deadline = time.time() + args.drain_timeout
+        delivered = []
+        while time.time() < deadline:
+            delivered = (await client.get(f"{graph_url}/_bench/sent")).json()["sent"]
+            delivered = [d for d in delivered if d["to"] in sent_at]
+            if len(delivered) >= total:
+                break
+            await asyncio.sleep(0.25)
+
+        latencies = []
+        pending = {sender: list(times) for sender, times in sent_at.items()}
+        for d in sorted(delivered, key=lambda d: d["at"]):
+            if pending.get(d["to"]):
+                latencies.append(d["at"] - pending[d["to"]].pop(0))
+        metrics_text = (await client.get(f"{app_url}/metrics")).text
+        stats = (await client.get(f"{app_url}/stats")).json()
+
+    last = max((d["at"] for d in delivered), default=send_done)
+    return {
+        "messages_sent": total,
+        "webhooks_accepted": posted,
+        "replies_delivered": len(latencies),
+        "offered_rate": args.rate,
+        "throughput_per_s": round(len(latencies) / max(last - started, 1e-9), 2),
+        "end_to_end": {f"p{p}": round(_percentile(latencies, p), 3) for p in (50, 95, 99)},
+        "stages": stage_quantiles(metrics_text),
+        "scheduler": {k: stats.get(k) for k in ("wait_p50", "wait_p95", "run_p50", "run_p95", "failed")},
+        "admission": stats.get("admission", {}),
+    }
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def print_report(report):
+    print("\n📊 BENCHMARK REPORT")
+    print(f"   sent {report['messages_sent']} @ {report['offered_rate']}/s, "
+          f"delivered {report['replies_delivered']}, throughput {report['throughput_per_s']}/s")
+    e2e = report["end_to_end"]
+    print(f"   end-to-end  p50 {e2e['p50']:.3f}s  p95 {e2e['p95']:.3f}s  p99 {e2e['p99']:.3f}s")
+    print(f"   peak RSS    {report['peak_rss_mb']} MB")
+    admission = report.get("admission") or {}
+    if admission:
+        print(f"   shed        queue full {admission['shed_queue_full']}, mailbox full {admission['shed_mailbox_full']}  "
+              f"degraded: text {admission['degraded_text']}, busy {admission['degraded_busy']}")
+    phases = report.get("startup", {}).get("phases", {})
+    if phases:
+        print("   startup     " + "  ".join(f"{phase} {seconds:.2f}s" for phase, seconds in phases.items()))
+    print(f"   {'stage':<18}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for stage, q in report["stages"].items():
+        print(f"   {stage:<18}{q['count']:>7}{q['p50']:>9.3f}{q['p95']:>9.3f}{q['p99']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark for Vani")
+    parser.add_argument("--rate", type=float, default=5.0, help="Webhooks per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of traffic")
+    parser.add_argument("--voice-ratio", type=float, default=0.3, help="Fraction of voice notes (0 = text only)")
+    parser.add_argument("--senders", type=int, default=0, help="Distinct senders (0 = a new sender per message)")
+    parser.add_argument("--voice-file", help="Recorded OGG voice note to replay (default: a generated tone)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-script", help="JSON rules for the fake Groq server")
+    parser.add_argument("--graph-latency-ms", type=float, default=30.0)
+    parser.add_argument("--tts-first-byte-ms", type=float, default=150.0)
+    parser.add_argument("--real-tts", action="store_true", help="Use edge-tts (needs network)")
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists("data/clinic.db"):
+        sys.exit("❌ data/clinic.db not found - run `python init_db.py` first")
+
+    run_id = uuid.uuid4().hex[:4]
+    workdir = tempfile.mkdtemp(prefix="vani-bench-")
+    graph_port, groq_port, app_port = _free_port(), _free_port(), _free_port()
+    graph_url = f"http://127.0.0.1:{graph_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    voice_file = args.voice_file
+    if args.voice_ratio > 0 and not voice_file:
+        voice_file = os.path.join(workdir, "sample.ogg")
+        with open(voice_file, "wb") as f:
+            f.write(_ffmpeg_tone("ogg", "libopus", 4))
+
+    # Point the app at the fakes and keep its caches/DBs out of data/
+    os.environ.update({
+        "GRAPH_URL": f"{graph_url}/v18.0",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+        "GROQ_API_KEY": "bench",
+        "WHATSAPP_TOKEN": "bench",
+        "PHONE_NUMBER_ID": "bench-phone",
+        "ADMIN_PHONE": "0",
+        "MEMORY_DB_PATH": os.path.join(workdir, "memory.db"),
+        "SEEN_DB_PATH": os.path.join(workdir, "seen.db"),
+        "LOG_DB_PATH": os.path.join(workdir, "conversation_log.db"),
+        "VOICE_CACHE_DIR": os.path.join(workdir, "voice_cache"),
+    })
+
+    fakes = [
+        _start_fake("bench.fake_graph", graph_port, ["--latency-ms", str(args.graph_latency_ms)]
+                    + (["--voice-file", voice_file] if voice_file else [])),
+        _start_fake("bench.fake_groq", groq_port, ["--latency-ms", str(args.llm_latency_ms), "--jitter-ms", str(args.llm_jitter_ms)]
+                    + (["--script", args.llm_script] if args.llm_script else [])),
+    ]
+    server = None
+    try:
+        _wait_for(f"{graph_url}/_bench/sent")
+        _wait_for(f"http://127.0.0.1:{groq_port}/_bench/stats")
+
+        if not args.real_tts and args.voice_ratio > 0:
+            import app.audio
+            FakeCommunicate.mp3 = _ffmpeg_tone("mp3", "libmp3lame", 3)
+            FakeCommunicate.first_byte_ms = args.tts_first_byte_ms
+            app.audio.edge_tts.Communicate = FakeCommunicate
+
+        import uvicorn
+        server = uvicorn.Server(uvicorn.Config("app.main:app", host="127.0.0.1", port=app_port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        booted = time.time()
+        thread.start()
+        _wait_for(f"{app_url}/healthz", timeout=60)
+        serving = time.time() - booted
+        # Voice notes need Whisper in RAM: wait for readiness so load time stays out of the latencies
+        if args.voice_ratio > 0:
+            _wait_for(f"{app_url}/readyz", timeout=300)
+        print(f"🚀 App serving in {serving:.1f}s, ready in {time.time() - booted:.1f}s - sending {int(args.rate * args.duration)} webhooks")
+        startup = httpx.get(f"{app_url}/stats").json().get("startup", {})
+
+        report = asyncio.run(drive(args, app_url, graph_url, run_id))
+        report["peak_rss_mb"] = _peak_rss_mb()
+        report["startup"] = startup
+        print_report(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join(timeout=15)
+        for process in fakes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# bench/stt_eval.py
+# 🎯 Speech-to-text accuracy vs. cost, per Whisper tier, on your own reference recordings.
+# For every model it reports word error rate (WER), language accuracy and CPU seconds per
+# second of speech - plus the "adaptive" row: what STT_TIERS routing would have produced.
+#
+# Reference set = JSON lines, paths relative to the manifest:
+#   {"audio": "clips/yes_hi.ogg", "text": "हाँ ठीक है", "language": "hi"}
+#
+#   python -m bench.stt_eval refs/manifest.jsonl --models tiny,base,small [--hint] [--json stt.json]
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from faster_whisper import WhisperModel, decode_audio
+from app.transcriber import SAMPLE_RATE, STT_TIERS, STT_CPU_THREADS, parse_tiers, trim_silence
+
+
+def normalize_words(text):
+    """ Lowercase, drop punctuation (any script), split on whitespace """
+    text = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text.lower())
+    return re.sub(r"\s+", " ", text).split()
+
+
+def word_errors(reference, hypothesis):
+    """ Word-level Levenshtein distance (substitutions + deletions + insertions) """
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    clips = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                item["audio"] = os.path.join(base, item["audio"])
+                clips.append(item)
+    return clips
+
+
+def prepare(clips, vad):
+    """ Decode + trim once; every model sees exactly the same audio """
+    for clip in clips:
+        audio = decode_audio(clip["audio"], SAMPLE_RATE)
+        clip["raw_seconds"] = len(audio) / SAMPLE_RATE
+        clip["pcm"] = trim_silence(audio) if vad else audio
+        clip["seconds"] = len(clip["pcm"]) / SAMPLE_RATE
+
+
+def run_model(name, clips, cpu_threads, hint):
+    """ One model over every clip, serially, so process CPU time belongs to this clip alone """
+    model = WhisperModel(name, device="cpu", compute_type="int8", cpu_threads=cpu_threads, num_workers=1)
+    warmup = next((clip["pcm"] for clip in clips if len(clip["pcm"])), None)
+    if warmup is not None:
+        model.transcribe(warmup, beam_size=1)           # First call allocates - keep it out of the numbers
+    results = []
+    for clip in clips:
+        if len(clip["pcm"]) == 0:
+            results.append({"text": "", "language": None, "cpu": 0.0, "wall": 0.0})
+            continue
+        cpu, wall = time.process_time(), time.perf_counter()
+        segments, info = model.transcribe(clip["pcm"], beam_size=1, language=clip.get("language") if hint else None)
+        text = " ".join(segment.text for segment in segments).strip()
+        results.append({"text": text, "language": info.language,
+                        "cpu": time.process_time() - cpu, "wall": time.perf_counter() - wall})
+    return results
+
+
+def summarize(clips, results):
+    errors = words = correct_language = 0
+    cpu = wall = 0.0
+    for clip, result in zip(clips, results):
+        e, n = word_errors(clip["text"], result["text"])
+        errors += e
+        words += n
+        correct_language += result["language"] == clip.get("language")
+        cpu += result["cpu"]
+        wall += result["wall"]
+    speech = sum(clip["seconds"] for clip in clips)
+    return {
+        "clips": len(clips),
+        "wer": round(errors / words, 3) if words else None,
+        "language_accuracy": round(correct_language / len(clips), 3) if clips else None,
+        "cpu_seconds": round(cpu, 2),
+        "cpu_per_audio_second": round(cpu / speech, 3) if speech else None,
+        "mean_latency_s": round(wall / len(clips), 3) if clips else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper tier accuracy/cost on a reference set")
+    parser.add_argument("manifest", help="JSON lines: {audio, text, language}")
+    parser.add_argument("--models", help="Comma-separated models (default: the models in STT_TIERS)")
+    parser.add_argument("--tiers", default=STT_TIERS, help="Routing to evaluate as the 'adaptive' row")
+    parser.add_argument("--cpu-threads", type=int, default=STT_CPU_THREADS)
+    parser.add_argument("--hint", action="store_true", help="Pass the reference language (simulates a sender hint)")
+    parser.add_argument("--no-vad", action="store_true", help="Transcribe the raw clips (no silence trimming)")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    clips = load_manifest(args.manifest)
+    if not clips:
+        sys.exit("❌ Empty reference set")
+    tiers = parse_tiers(args.tiers)
+    models = args.models.split(",") if args.models else [name for name, _ in tiers]
+    models += [name for name, _ in tiers if name not in models]
+
+    prepare(clips, vad=not args.no_vad)
+    raw = sum(clip["raw_seconds"] for clip in clips)
+    speech = sum(clip["seconds"] for clip in clips)
+    print(f"🎧 {len(clips)} clips, {raw:.1f}s of audio -> {speech:.1f}s after silence trimming")
+
+    per_model = {}
+    for name in models:
+        print(f"⏳ {name}...")
+        per_model[name] = run_model(name, clips, args.cpu_threads, args.hint)
+
+    # Adaptive: each clip takes the result of the tier its (trimmed) duration routes to
+    def route(seconds):
+        return next(name for name, limit in tiers if seconds <= limit)
+
+    adaptive = [per_model[route(clip["seconds"])][i] for i, clip in enumerate(clips)]
+    report = {"clips": len(clips), "audio_seconds": round(raw, 1), "speech_seconds": round(speech, 1),
+              "hinted": args.hint, "tiers": args.tiers, "models": {}}
+    for name in models:
+        report["models"][name] = summarize(clips, per_model[name])
+    report["models"]["adaptive"] = summarize(clips, adaptive)
+
+    print(f"\n📊 STT REPORT ({'language hinted' if args.hint else 'language detected'}, tiers: {args.tiers})")
+    print(f"   {'model':<12}{'WER':>8}{'lang ok':>9}{'CPU s':>9}{'CPU/s speech':>14}{'latency':>10}")
+    for name, row in report["models"].items():
+        wer = f"{row['wer']:.3f}" if row["wer"] is not None else "-"
+        print(f"   {name:<12}{wer:>8}{row['language_accuracy']:>9.3f}{row['cpu_seconds']:>9.2f}"
+              f"{row['cpu_per_audio_second'] or 0:>14.3f}{row['mean_latency_s']:>9.3f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# conftest.py
+# Shared pytest fixtures: a seeded clinic DB in a temp dir (never data/clinic.db) and a fixed clock.
+import sqlite3
+import itertools
+from datetime import datetime, timedelta
+import pytest
+from app import database
+
+# Same rows as init_db.py
+SEED = [
+    ("Dr. Sharma", "Cardiology", "Monday", "10:00 AM - 02:00 PM"),
+    ("Dr. Sharma", "Cardiology", "Wednesday", "10:00 AM - 02:00 PM"),
+    ("Dr. Gupta", "Dermatology", "Tuesday", "09:00 AM - 05:00 PM"),
+    ("Dr. Gupta", "Dermatology", "Friday", "09:00 AM - 01:00 PM"),
+    ("Dr. Anjali", "General", "Daily", "08:00 AM - 08:00 PM"),
+    ("Dr. Khan", "Neurology", "Thursday", "04:00 PM - 08:00 PM"),
+]
+
+# A Monday: clock("Wednesday 11:00") counts forward from here
+MONDAY = datetime(2026, 10, 19)
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Every test DB gets its own snapshot version, so version-keyed indexes never carry over
+_versions = itertools.count(1000)
+
+
+@pytest.fixture
+def clinic_db(tmp_path, monkeypatch):
+    """ Old-style `schedule` table (no parsed columns) - the first read migrates it """
+    path = str(tmp_path / "clinic.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE schedule (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        doctor_name TEXT,
+        department TEXT,
+        day TEXT,
+        schedule_time TEXT,
+        current_status TEXT DEFAULT 'Available'
+    )
+    """)
+    conn.executemany("INSERT INTO schedule (doctor_name, department, day, schedule_time) VALUES (?, ?, ?, ?)", SEED)
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "DB_PATH", path)
+    monkeypatch.setattr(database, "_snapshot", None)
+    monkeypatch.setattr(database, "_watch_conn", None)
+    monkeypatch.setattr(database, "_local_version", next(_versions))
+    yield path
+    if database._watch_conn is not None:
+        database._watch_conn.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ clock("Monday 21:30") - what datetime.now() returns for availability facts """
+
+    def set_clock(when):
+        day, time_of_day = when.split()
+        hour, minute = map(int, time_of_day.split(":"))
+        moment = MONDAY + timedelta(days=WEEKDAYS.index(day), hours=hour, minutes=minute)
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return moment
+
+        monkeypatch.setattr(database, "datetime", FrozenDatetime)
+        return moment
+
+    return set_clock
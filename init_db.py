@@ -1,6 +1,8 @@
 # init_db.py
 import sqlite3
 import os
+import sys
+from app.database import migrate_schedule
 
 os.makedirs("data", exist_ok=True)
 DB_PATH = "data/clinic.db"
@@ -8,10 +10,12 @@ DB_PATH = "data/clinic.db"
 def init_db():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    
+
     cursor.execute("DROP TABLE IF EXISTS schedule")
-    
+
     # NEW SCHEMA: Separate Time and Status
+    # day_mask / open_minute / close_minute are parsed from day / schedule_time
+    # (app/schedule_hours.py) so "who is in now" is a SQL comparison, not an LLM guess.
     cursor.execute("""
     CREATE TABLE schedule (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -19,10 +23,13 @@ def init_db():
         department TEXT,
         day TEXT,
         schedule_time TEXT,       -- e.g., "10:00 AM - 02:00 PM" (Fixed)
-        current_status TEXT DEFAULT 'Available' -- e.g., "Available", "On Leave", "Emergency"
+        current_status TEXT DEFAULT 'Available', -- e.g., "Available", "On Leave", "Emergency"
+        day_mask INTEGER,         -- Weekday bitmask: bit 0 = Monday ... bit 6 = Sunday ("Daily" = 127)
+        open_minute INTEGER,      -- Minutes after midnight, e.g. 600 = 10:00 AM
+        close_minute INTEGER      -- > 1440 when the shift runs past midnight
     )
     """)
-    
+
     # Data now maps to (name, dept, day, schedule_time)
     # status defaults to 'Available' automatically
     doctors = [
@@ -33,12 +40,24 @@ def init_db():
         ("Dr. Anjali", "General", "Daily", "08:00 AM - 08:00 PM"),
         ("Dr. Khan", "Neurology", "Thursday", "04:00 PM - 08:00 PM")
     ]
-    
+
     cursor.executemany("INSERT INTO schedule (doctor_name, department, day, schedule_time) VALUES (?, ?, ?, ?)", doctors)
-    
     conn.commit()
+
+    # Parsed columns + indexes (same code path that upgrades old databases)
+    migrate_schedule(conn)
+    conn.close()
+    print(f"✅ Database upgrade complete: Added 'current_status' column + parsed hours and weekday masks.")
+
+def migrate_db():
+    # Keep the existing rows (and any admin edits) - just add/fill the parsed columns
+    conn = sqlite3.connect(DB_PATH)
+    filled = migrate_schedule(conn)
     conn.close()
-    print(f"✅ Database upgrade complete: Added 'current_status' column.")
+    print(f"✅ Migration complete: {filled} rows parsed.")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    if "--migrate" in sys.argv:
+        migrate_db()
+    else:
+        init_db()
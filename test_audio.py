@@ -0,0 +1,42 @@
+# test_audio.py
+import asyncio
+from app.audio import split_sentences
+
+
+def _split(pieces):
+    async def tokens():
+        for piece in pieces:
+            yield piece
+
+    async def collect():
+        return [sentence async for sentence in split_sentences(tokens())]
+
+    return asyncio.run(collect())
+
+
+def test_sentences_come_out_as_they_end():
+    pieces = ["Dr. Sharma is in on Monday", " and Wednesday. He sees pat", "ients from 10 AM to 2 PM. Come in directly!"]
+    assert _split(pieces) == [
+        "Dr. Sharma is in on Monday and Wednesday.",
+        "He sees patients from 10 AM to 2 PM.",
+        "Come in directly!",
+    ]
+
+
+def test_abbreviations_and_initials_do_not_end_a_sentence():
+    assert _split(["Please see Dr. A. P. Rao in the General department. Thanks for waiting today."]) == [
+        "Please see Dr. A. P. Rao in the General department.",
+        "Thanks for waiting today.",
+    ]
+
+
+def test_short_fragments_are_merged():
+    # "Yes." alone is too short to be worth its own TTS call
+    assert _split(["Yes. Dr. Anjali is available every day."]) == ["Yes. Dr. Anjali is available every day."]
+
+
+def test_indic_sentence_end():
+    assert _split(["डॉ. शर्मा सोमवार को उपलब्ध हैं। आप सीधे आ सकते हैं, यह वॉक-इन क्लिनिक है।"]) == [
+        "डॉ. शर्मा सोमवार को उपलब्ध हैं।",
+        "आप सीधे आ सकते हैं, यह वॉक-इन क्लिनिक है।",
+    ]
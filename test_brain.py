@@ -1,5 +1,6 @@
 # test_brain.py
 from dotenv import load_dotenv
+import asyncio
 import os
 
 load_dotenv()
@@ -11,7 +12,7 @@ try:
     from app.ai_engine import chat_with_llama
     print("✅ Import successful!")
     
-    response = chat_with_llama("Is Dr. Sharma available?")
+    response = asyncio.run(chat_with_llama("Is Dr. Sharma available?", "en"))
     print(f"🤖 AI Replied: {response}")
     
 except Exception as e:
@@ -0,0 +1,64 @@
+# test_dedup.py
+import asyncio
+import threading
+from app.dedup import SeenMessages
+
+
+def test_redelivery_is_dropped():
+    seen = SeenMessages(persist=False)
+    assert seen.check_and_add("wamid.1") is True
+    assert seen.check_and_add("wamid.1") is False
+    assert seen.check_and_add("wamid.2") is True
+    assert seen.get_stats()["duplicates"] == 1
+
+
+def test_expired_id_counts_as_new():
+    seen = SeenMessages(persist=False, ttl=0)
+    assert seen.check_and_add("wamid.1") is True
+    assert seen.check_and_add("wamid.1") is True
+
+
+def test_ram_is_bounded():
+    seen = SeenMessages(persist=False, max_entries=2)
+    for message_id in ("a", "b", "c", "d"):
+        seen.check_and_add(message_id)
+    assert len(seen.ids) <= seen.max_entries
+    assert list(seen.ids) == ["c", "d"]
+    assert seen.get_stats()["evictions"] == 2
+
+
+def test_sqlite_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "seen.db")
+    first, second = SeenMessages(db_path=path), SeenMessages(db_path=path)
+    assert first.check_and_add("wamid.1") is True
+    # Another uvicorn worker (or a restart): the ID is already claimed on disk
+    assert second.check_and_add("wamid.1") is False
+    assert second.get_stats()["db_duplicates"] == 1
+
+
+def test_async_check_claims_on_disk_off_the_loop(tmp_path):
+    seen = SeenMessages(db_path=str(tmp_path / "seen.db"))
+    loop_thread = threading.get_ident()
+    claim_threads = []
+    claim = seen._claim_on_disk
+
+    def spy(message_id, now):
+        claim_threads.append(threading.get_ident())
+        return claim(message_id, now)
+
+    seen._claim_on_disk = spy
+
+    async def main():
+        return [await seen.check_and_add_async(message_id) for message_id in ("wamid.1", "wamid.1", "wamid.2")]
+
+    assert asyncio.run(main()) == [True, False, True]
+    # The redelivery was caught in RAM; the two new IDs hit SQLite in a worker thread
+    assert len(claim_threads) == 2 and loop_thread not in claim_threads
+    assert seen.get_stats()["duplicates"] == 1
+
+
+def test_async_check_sees_other_workers(tmp_path):
+    path = str(tmp_path / "seen.db")
+    first, second = SeenMessages(db_path=path), SeenMessages(db_path=path)
+    assert asyncio.run(first.check_and_add_async("wamid.1")) is True
+    assert asyncio.run(second.check_and_add_async("wamid.1")) is False
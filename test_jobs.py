@@ -0,0 +1,100 @@
+# test_jobs.py
+# Mailbox scheduler: per-sender order, parallel senders, the admin lane and the bounded queue.
+import asyncio
+import pytest
+from app import jobs
+
+
+QUEUES = (jobs.MAILBOXES, jobs.ACTIVE, jobs.READY, jobs.PRIORITY_READY, jobs.PRIORITY_KEYS, jobs.SHED_NOTICES, jobs.NOTICE_KEYS)
+
+
+@pytest.fixture(autouse=True)
+def empty_scheduler(monkeypatch):
+    for queue in QUEUES:
+        queue.clear()
+    monkeypatch.setattr(jobs, "MAX_QUEUE_DEPTH", 200)
+    monkeypatch.setattr(jobs, "MAX_MAILBOX_DEPTH", 5)
+    yield
+    for queue in QUEUES:
+        queue.clear()
+
+
+async def _drain(expected, done):
+    for _ in range(200):
+        if len(done) >= expected:
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_same_sender_runs_in_order_one_at_a_time():
+    done, running = [], set()
+
+    async def handler(job):
+        sender, n = job
+        assert sender not in running        # Never two jobs of one sender at once
+        running.add(sender)
+        await asyncio.sleep(0.01)
+        running.discard(sender)
+        done.append(job)
+
+    async def main():
+        jobs.start_workers(handler, count=3)
+        for n in range(4):
+            jobs.enqueue(("alice", n), "alice")
+            jobs.enqueue(("bob", n), "bob")
+        await _drain(8, done)
+        await jobs.stop_workers()
+
+    asyncio.run(main())
+    assert [n for sender, n in done if sender == "alice"] == [0, 1, 2, 3]
+    assert [n for sender, n in done if sender == "bob"] == [0, 1, 2, 3]
+
+
+def test_admin_skips_the_line():
+    done = []
+
+    async def handler(job):
+        await asyncio.sleep(0.02)
+        done.append(job)
+
+    async def main():
+        jobs.start_workers(handler, count=1)
+        for n in range(5):
+            jobs.enqueue(f"patient-{n}", f"patient-{n}")
+        jobs.enqueue("admin", "admin", priority=True)
+        await _drain(6, done)
+        await jobs.stop_workers()
+
+    asyncio.run(main())
+    # The reserved priority worker picks it up while the only general worker is busy
+    assert done.index("admin") <= 1
+
+
+def test_full_mailbox_sheds_to_the_notice_lane(monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_MAILBOX_DEPTH", 2)
+    notices = []
+
+    async def handler(job):
+        await asyncio.sleep(0.05)
+
+    async def shed_handler(job):
+        notices.append(job)
+
+    async def main():
+        jobs.start_workers(handler, count=1, shed_handler=shed_handler)
+        depths = [jobs.enqueue(n, "alice") for n in range(4)]
+        admin = jobs.enqueue("admin", "admin", priority=True)
+        await _drain(1, notices)
+        await jobs.stop_workers()
+        return depths, admin
+
+    depths, admin = asyncio.run(main())
+    assert depths == [1, 2, None, None]
+    assert admin == 1                   # Priority jobs are never refused
+    assert notices == [2]               # One busy reply per sender, not one per refused message
+
+
+def test_full_queue_sheds(monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_QUEUE_DEPTH", 3)
+    monkeypatch.setattr(jobs, "_wakeup", asyncio.Event())
+    assert [jobs.enqueue(n, f"sender-{n}") for n in range(4)] == [1, 1, 1, None]
@@ -0,0 +1,56 @@
+# test_matching.py
+import pytest
+from app.database import get_doctor_info, NAMED_SCORE
+from app.matching import MatchIndex, PHONETIC_SCORE, phonetic_key, normalize
+from app.router import route, LOOKUP_THRESHOLD
+
+DOCTORS = ("Dr. Sharma", "Dr. Gupta", "Dr. Anjali", "Dr. Khan")
+DEPARTMENTS = ("Cardiology", "Dermatology", "General", "Neurology")
+
+
+@pytest.fixture
+def index():
+    return MatchIndex("test", DOCTORS, DEPARTMENTS)
+
+
+def test_phonetic_score_is_never_a_named_hit():
+    assert PHONETIC_SCORE < NAMED_SCORE
+    assert PHONETIC_SCORE < LOOKUP_THRESHOLD
+
+
+def test_normalize():
+    assert normalize("Dr. Sharma ji") == "sharma"
+    assert normalize("Cardiologist") == "cardiology"
+    assert normalize("Swarma") == "sharma"
+
+
+def test_phonetic_key():
+    assert phonetic_key("sharma") == phonetic_key("shaarma") == "srm"
+    assert phonetic_key("anjali") == phonetic_key("anjili") == "anjl"
+
+
+@pytest.mark.parametrize("query, doctor", [("Sharma", "Dr. Sharma"), ("dr gpta", "Dr. Gupta"), ("Anjly", "Dr. Anjali")])
+def test_names_and_typos(index, query, doctor):
+    assert index.best_per_kind(query)["doctor"].value == doctor
+
+
+def test_phonetic_hit_scores_below_named(index):
+    match = index.best_per_kind("shaarmaa")["doctor"]
+    assert match.value == "Dr. Sharma"
+    assert match.score >= PHONETIC_SCORE
+
+
+@pytest.mark.parametrize("query", ["knee pain", "kaun sa doctor aaj hai"])
+def test_short_keys_are_not_names(index, query):
+    # "khan", "knee" and "kaun" all reduce to "kn"
+    assert index.best_per_kind(query)["doctor"].score < NAMED_SCORE
+
+
+def test_knee_pain_is_a_symptom_not_dr_khan(clinic_db):
+    result = get_doctor_info("knee pain")
+    assert result["symptom"]["department"] == "General"
+    assert {row["doctor"] for row in result["data"]} == {"Dr. Anjali"}
+
+
+def test_kaun_goes_to_the_llm(clinic_db):
+    assert route("kaun sa doctor aaj hai", "en") == (None, None)
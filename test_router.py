@@ -0,0 +1,138 @@
+# test_router.py
+# Fast-path answers, especially "is the doctor in now / today?" against a fixed clock.
+import pytest
+from app import database
+from app.router import route, detect_text_language
+
+
+def test_availability_facts_after_hours(clinic_db, clock):
+    clock("Monday 21:30")
+    facts = database.get_doctor_info("Anjali")["facts"]["doctors"][0]
+    assert facts["in_now"] is False
+    assert facts["in_until"] is None
+    assert facts["next_opening"] == "tomorrow 08:00 AM"
+
+
+def test_availability_facts_in_hours(clinic_db, clock):
+    clock("Monday 11:00")
+    facts = database.get_doctor_info("Sharma")["facts"]["doctors"][0]
+    assert facts["in_now"] is True
+    assert facts["in_until"] == "02:00 PM"
+    assert facts["next_opening"] == "Wednesday 10:00 AM"
+
+
+def test_in_now_after_hours_is_not_yes(clinic_db, clock):
+    clock("Monday 21:30")
+    intent, reply = route("is dr anjali in now", "en")
+    assert intent == "lookup"
+    assert not reply.startswith("Yes")
+    assert "not in right now" in reply
+    assert "tomorrow, 08:00 AM" in reply
+    assert "come in directly" not in reply
+
+
+def test_today_after_the_shift_ended(clinic_db, clock):
+    clock("Monday 15:00")
+    intent, reply = route("is Dr Sharma available today", "en")
+    assert intent == "lookup"
+    assert "not in right now" in reply
+    assert "Wednesday, 10:00 AM" in reply
+
+
+def test_today_before_the_shift_starts(clinic_db, clock):
+    clock("Monday 08:30")
+    _, reply = route("is Dr Sharma available today", "en")
+    assert "not in right now" in reply
+    assert "today, 10:00 AM" in reply
+
+
+def test_in_now_during_the_shift(clinic_db, clock):
+    clock("Monday 11:00")
+    _, reply = route("is dr sharma in now", "en")
+    assert reply.startswith("Yes, Dr. Sharma is in right now, until 02:00 PM.")
+    assert "come in directly" in reply
+
+
+def test_in_now_is_translated(clinic_db, clock):
+    clock("Monday 21:30")
+    _, reply = route("is dr anjali in now", "hi")
+    assert "कल" in reply and "08:00 AM" in reply
+
+
+def test_on_leave_all_week(clinic_db, clock):
+    clock("Monday 11:00")
+    database.update_doctor_schedule("Dr. Sharma", "On Leave")
+    _, reply = route("is dr sharma in now", "en")
+    assert "Dr. Sharma is not in right now." in reply
+    assert "On Leave" in reply
+
+
+def test_weekly_schedule_without_today(clinic_db, clock):
+    clock("Monday 21:30")
+    intent, reply = route("is dr sharma available", "en")
+    assert intent == "lookup"
+    assert "Monday and Wednesday, 10:00 AM - 02:00 PM" in reply
+
+
+@pytest.mark.parametrize("text", [
+    "Is Dr. Sharma available tomorrow?",
+    "Is Dr. Gupta there tomorrow evening after 6?",
+    "is dr anjali in at 9",
+])
+def test_time_conditions_go_to_the_llm(clinic_db, text):
+    assert route(text, "en") == (None, None)
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("Hi!", "greeting"),
+    ("नमस्ते", "greeting"),
+    ("ok thanks", "closing"),
+    ("ಧನ್ಯವಾದಗಳು", "closing"),
+])
+def test_greetings_and_closings(clinic_db, text, intent):
+    assert route(text, "en")[0] == intent
+
+
+def test_symptom_today_uses_facts(clinic_db, clock):
+    clock("Monday 21:30")
+    intent, reply = route("I have fever today", "en")
+    assert intent == "symptom"
+    assert reply.startswith("For that, please see our General department.")
+    assert "not in right now" in reply
+
+
+def test_unknown_goes_to_the_llm(clinic_db):
+    assert route("can you tell me about parking near the clinic", "en") == (None, None)
+
+
+@pytest.mark.parametrize("text, language", [
+    ("is dr sharma in", "en"),
+    ("क्या डॉक्टर हैं", "hi"),
+    ("ವೈದ್ಯರು ಇದ್ದಾರಾ", "kn"),
+    ("ഡോക്ടർ ഉണ്ടോ", "ml"),
+])
+def test_detect_text_language(text, language):
+    assert detect_text_language(text) == language
+
+
+@pytest.mark.parametrize("text", [
+    "is dr sharma there",           # Function words alone are not an availability question
+    "sharma hai kya",
+    "shaarmaa kab milenge",         # Phonetic-only guess: the LLM confirms the name
+    "ಜ್ವರವಿದೆ",                      # Stem hit: the LLM confirms the symptom
+])
+def test_guesses_go_to_the_llm(clinic_db, text):
+    assert route(text, "en") == (None, None)
+
+
+def test_named_lookup_with_a_content_hint(clinic_db):
+    intent, reply = route("when is dr sharma in", "en")
+    assert intent == "lookup"
+    assert reply.startswith("Dr. Sharma (Cardiology)")
+
+
+def test_missing_specialty_is_named(clinic_db):
+    intent, reply = route("I have a toothache", "en")
+    assert intent == "symptom"
+    assert reply.startswith("Sorry, that needs Dentistry")
+    assert "Cardiology" in reply
@@ -0,0 +1,50 @@
+# test_schedule_hours.py
+import pytest
+from app.schedule_hours import parse_hours, parse_days, format_minutes, derived_columns
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("10:00 AM - 02:00 PM", (600, 840)),
+    ("08:00 AM - 08:00 PM", (480, 1200)),
+    ("9am to 5pm", (540, 1020)),
+    ("10 - 2 PM", (600, 840)),          # Open time borrows PM, which would be after closing -> AM
+    ("8 - 10 PM", (1200, 1320)),        # Both PM
+    ("10:00 PM - 06:00 AM", (1320, 1800)),  # Past midnight: close > 1440
+    ("10.30 AM - 1.15 PM", (630, 795)),
+    ("9 - 5", (540, 1020)),              # Bare hours: a day shift, the close is PM
+    ("12 - 4", (720, 960)),
+    ("9:00 - 13:00", (540, 780)),
+    ("22:00 - 06:00", (1320, 1800)),    # 24-hour clock overnight stays overnight
+])
+def test_parse_hours(text, expected):
+    assert parse_hours(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", None, "On call", "10:75 - 2 PM", "10:00 AM - 02:75 PM", "25:00 - 26:00"])
+def test_parse_hours_leaves_bad_text_unparsed(text):
+    assert parse_hours(text) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Monday", 0b0000001),
+    ("sunday", 0b1000000),
+    ("Daily", 0b1111111),
+    ("Weekdays", 0b0011111),
+    ("Mon-Fri", 0b0011111),
+    ("Fri - Mon", 0b1110001),           # Wraps around the weekend
+    ("Mon, Wed", 0b0000101),
+    ("Tuesday and Thursday", 0b0001010),
+    ("Someday", 0),
+])
+def test_parse_days(text, expected):
+    assert parse_days(text) == expected
+
+
+def test_format_minutes():
+    assert format_minutes(840) == "02:00 PM"
+    assert format_minutes(0) == "12:00 AM"
+    assert format_minutes(1800) == "06:00 AM"   # Overnight close wraps to the next day
+
+
+def test_derived_columns_unparsed_row():
+    assert derived_columns("Monday", "10:75 - 2 PM") == {"day_mask": 1, "open_minute": None, "close_minute": None}
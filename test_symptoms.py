@@ -0,0 +1,76 @@
+# test_symptoms.py
+import pytest
+from app.database import get_schedule_snapshot, get_doctor_info
+from app.symptoms import get_symptom_index, tokenize
+
+
+@pytest.fixture
+def index(clinic_db):
+    return get_symptom_index(get_schedule_snapshot())
+
+
+@pytest.mark.parametrize("text, department, method", [
+    ("I feel feverish", "General", "exact"),
+    ("I have a fever", "General", "exact"),
+    ("chest pain since morning", "Cardiology", "exact"),
+    ("सीने में दर्द", "Cardiology", "exact"),
+    ("ಜ್ವರವಿದೆ", "General", "stem"),             # "fever" + "is" glued together
+    ("പനിയുണ്ട്", "General", "stem"),
+    ("ಚರ್ಮದ ತುರಿಕೆ", "Dermatology", "exact"),
+    ("ഹൃദ്രോഗ വിദഗ്ധൻ", "Cardiology", "exact"),
+    ("cheast pain", "Cardiology", "ngram"),       # Misspelling
+    ("knee pain", "General", "exact"),            # Orthopedics -> no such department, a GP sees it
+    ("rashes on my arm", "Dermatology", "stem"),
+    ("coughing all night", "General", "stem"),
+])
+def test_symptom_to_department(index, text, department, method):
+    match = index.match(text)
+    assert match is not None
+    assert match.department == department
+    assert match.method == method
+
+
+def test_specialty_the_clinic_does_not_have(index):
+    match = index.match("toothache")
+    assert match.specialty == "Dentistry"
+    assert match.department is None
+
+
+@pytest.mark.parametrize("text", [
+    "Is the doctor available?", "thank you", "back", "early morning",
+    "Hi, this is Rashmi",                           # "rash" + "mi" is not an inflection
+    "Rashmi here, when is the clinic open",
+    "I am tired of waiting",                        # Idiom, not fatigue
+])
+def test_not_a_symptom(index, text):
+    assert index.match(text) is None
+
+
+def test_tokenize_folds_spelling_variants():
+    # Nukta and zero-width joiners don't make a different word
+    assert tokenize("बाल झड़ना") == tokenize("बाल झडना")
+    assert tokenize("ക്ഷീണം‌") == ["ക്ഷീണം"]
+
+
+def test_get_doctor_info_by_symptom(clinic_db):
+    result = get_doctor_info("I feel feverish")
+    assert result["type"] == "specific_result"
+    assert result["symptom"]["department"] == "General"
+    assert {row["doctor"] for row in result["data"]} == {"Dr. Anjali"}
+
+
+def test_named_doctor_beats_symptom(clinic_db):
+    result = get_doctor_info("Sharma has chest pain")
+    assert "symptom" not in result
+    assert {row["doctor"] for row in result["data"]} == {"Dr. Sharma"}
+
+
+def test_missing_specialty_is_not_found(clinic_db):
+    result = get_doctor_info("toothache")
+    assert result["error"] == "not_found"
+    assert result["specialty"] == "Dentistry"
+
+
+def test_name_is_not_a_symptom(clinic_db):
+    result = get_doctor_info("Hi, this is Rashmi")
+    assert "symptom" not in result
@@ -0,0 +1,57 @@
+# test_transcriber.py
+# Language hints: a hint warm-starts a few clips, then Whisper detects again and the detection wins.
+from app.transcriber import LanguageHints
+
+
+def test_sure_detection_hints_a_few_clips_then_redetects():
+    hints = LanguageHints(reuses=2)
+    hints.confirm("1", "hi", 0.95)
+    assert [hints.take("1") for _ in range(3)] == ["hi", "hi", None]
+    assert hints.get("1") == "hi"       # Replies still use it
+
+
+def test_hinted_run_does_not_refresh_the_hint():
+    hints = LanguageHints(reuses=1)
+    hints.confirm("1", "hi", 0.95)
+    assert hints.take("1") == "hi"
+    hints.confirm("1", "hi", None)      # Hinted transcription: no probability
+    assert hints.take("1") is None
+
+
+def test_borderline_detection_hints_once():
+    hints = LanguageHints(reuses=3)
+    hints.confirm("1", "kn", 0.8)
+    assert [hints.take("1") for _ in range(2)] == ["kn", None]
+
+
+def test_detection_replaces_the_hint():
+    hints = LanguageHints()
+    hints.confirm("1", "hi", 0.95)
+    hints.confirm("1", "en", 0.9)
+    assert hints.take("1") == "en"
+
+
+def test_unsure_detection_drops_the_hint():
+    hints = LanguageHints()
+    hints.confirm("1", "hi", 0.95)
+    hints.confirm("1", "ml", 0.4)
+    assert hints.take("1") is None and hints.get("1") is None
+
+
+def test_typed_message_only_warm_starts():
+    hints = LanguageHints()
+    hints.warm_start("1", "ml")
+    assert [hints.take("1") for _ in range(2)] == ["ml", None]
+
+
+def test_warm_start_keeps_a_matching_voice_hint():
+    hints = LanguageHints(reuses=3)
+    hints.confirm("1", "kn", 0.95)
+    hints.warm_start("1", "kn")
+    assert [hints.take("1") for _ in range(3)] == ["kn", "kn", "kn"]
+
+
+def test_hints_expire():
+    hints = LanguageHints(ttl=-1)
+    hints.confirm("1", "hi", 0.95)
+    assert hints.take("1") is None